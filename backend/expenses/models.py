@@ -1,6 +1,7 @@
 # expenses/models.py
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.utils import timezone
 import shortuuid
@@ -116,17 +117,30 @@ class Expense(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.expense_id} - ${self.amount}"
 
+    @classmethod
+    def next_display_id(cls, user_id):
+        """The user's next free display_id, locked for the caller until commit.
+
+        Must run inside a transaction; the caller may use a consecutive range
+        from the returned id. The user's row is locked with a no-op UPDATE,
+        which also takes SQLite's write lock where select_for_update does
+        nothing, so concurrent saves and conversions for one user are
+        serialized even before the user has any expenses.
+        """
+        User.objects.filter(pk=user_id).update(id=F('id'))
+        last = cls.objects.filter(user_id=user_id).order_by('-display_id').values_list(
+            'display_id', flat=True
+        ).first() or 0
+        return last + 1
+
     # --- NEW LOGIC ---
     # We override the save method to calculate the display_id before saving.
     def save(self, *args, **kwargs):
-        if not self.display_id:
-            last_expense = Expense.objects.filter(user=self.user).order_by('-display_id').first()
-            if last_expense:
-                self.display_id = last_expense.display_id + 1
-            else:
-                self.display_id = 1
-        self.full_clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.display_id:
+                self.display_id = Expense.next_display_id(self.user_id)
+            self.full_clean()
+            super().save(*args, **kwargs)
         
     def clean(self):
         from django.core.exceptions import ValidationError
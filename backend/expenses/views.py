@@ -127,10 +127,7 @@ class ExpenseAPIView(APIView):
         created_expenses_ids = []
         try:
             with transaction.atomic():
-                highest_display_id = Expense.objects.filter(user=user).order_by('-display_id').select_for_update().first()
-                next_display_id = 1
-                if highest_display_id:
-                    next_display_id = highest_display_id.display_id + 1
+                next_display_id = Expense.next_display_id(user.id)
                     
                 for i, expense_data in enumerate(expense_list):
                     new_expense = Expense.objects.create(
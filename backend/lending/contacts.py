@@ -0,0 +1,98 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+NON_WORD = re.compile(r'[^\w\s]')
+
+# Trigram similarity a name needs to be suggested as a possible contact
+SIMILARITY_THRESHOLD = 0.6
+MAX_SUGGESTIONS = 3
+
+
+def normalize_name(name):
+    """Case-folded name without accents, punctuation or repeated spaces"""
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(NON_WORD.sub(' ', text).casefold().split())
+
+
+def name_trigrams(normalized):
+    """Word trigrams padded like pg_trgm, so short words and prefixes still share trigrams"""
+    trigrams = set()
+    for word in normalized.split():
+        padded = f'  {word} '
+        trigrams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return trigrams
+
+
+def similarity(first, second):
+    """Share of trigrams two normalized names have in common, from 0 to 1"""
+    first, second = name_trigrams(first), name_trigrams(second)
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class ContactMatcher:
+    """Links free-text person names to a user's contacts.
+
+    Only exact matches of the normalized name are linked automatically;
+    "Rahul K" and "Rahul S" are close but different people. Near matches
+    come from an inverted trigram index as suggestions for the user to
+    confirm. Building the index is one pass over the contacts, so matching
+    many names costs no queries.
+    """
+
+    def __init__(self, contacts):
+        self.exact = {}
+        self.sizes = {}
+        self.index = defaultdict(set)
+        for contact_id, name in contacts:
+            normalized = normalize_name(name)
+            trigrams = name_trigrams(normalized)
+            self.exact.setdefault(normalized, contact_id)
+            self.sizes[contact_id] = len(trigrams)
+            for trigram in trigrams:
+                self.index[trigram].add(contact_id)
+
+    def match(self, name):
+        """The id of the contact whose normalized name equals name's, or None"""
+        normalized = normalize_name(name)
+        return self.exact.get(normalized) if normalized else None
+
+    def suggest(self, name, limit=MAX_SUGGESTIONS):
+        """(contact id, score) of the most similar other contacts at or above SIMILARITY_THRESHOLD"""
+        normalized = normalize_name(name)
+        trigrams = name_trigrams(normalized)
+        exact = self.exact.get(normalized)
+        shared = Counter(contact_id for trigram in trigrams for contact_id in self.index.get(trigram, ()))
+        scored = []
+        for contact_id, common in shared.items():
+            score = common / (len(trigrams) + self.sizes[contact_id] - common)
+            if contact_id != exact and score >= SIMILARITY_THRESHOLD:
+                scored.append((contact_id, round(score, 2)))
+        return sorted(scored, key=lambda entry: entry[1], reverse=True)[:limit]
+
+
+def link_transactions(user_id, transaction_model, contact_model):
+    """Attach a user's unlinked transactions to exactly matching contacts; returns rows linked.
+
+    Takes the model classes so data migrations can run it with historical
+    models. Transactions are grouped by name, so each matched contact
+    costs one UPDATE.
+    """
+    matcher = ContactMatcher(contact_model.objects.filter(user_id=user_id).values_list('id', 'name'))
+    if not matcher.sizes:
+        return 0
+
+    names_by_contact = defaultdict(list)
+    unlinked = transaction_model.objects.filter(user_id=user_id, contact__isnull=True)
+    for name in unlinked.order_by().values_list('person_name', flat=True).distinct():
+        contact_id = matcher.match(name)
+        if contact_id:
+            names_by_contact[contact_id].append(name)
+
+    return sum(
+        unlinked.filter(person_name__in=names).update(contact_id=contact_id)
+        for contact_id, names in names_by_contact.items()
+    )
@@ -0,0 +1,123 @@
+from collections import Counter
+from datetime import timedelta
+from django.utils import timezone
+
+from .models import LendingTransaction, accrued_interest
+
+
+def percent_change(current, previous):
+    if not previous:
+        return 100.0 if current else 0.0
+    return round((current - previous) / previous * 100, 1)
+
+
+class LoanPortfolio:
+    """A user's transactions held as columns for whole-portfolio interest calculations.
+
+    One query loads every loan's principal, rate, interest type, dates and
+    payments; amounts are converted to floats once and interest, balances
+    and trends are computed column-wise instead of through per-row model
+    properties.
+    """
+
+    COLUMNS = (
+        'transaction_type', 'status', 'person_name', 'amount', 'amount_paid',
+        'interest_rate', 'interest_type', 'transaction_date', 'date_completed',
+    )
+    OPEN_STATUSES = ('active', 'overdue', 'partial')
+
+    def __init__(self, user, today=None):
+        self.today = today or timezone.now().date()
+        rows = list(LendingTransaction.objects.filter(user=user).order_by().values_list(*self.COLUMNS))
+        columns = dict(zip(self.COLUMNS, zip(*rows))) if rows else {name: () for name in self.COLUMNS}
+        for name in ('amount', 'amount_paid', 'interest_rate'):
+            columns[name] = [float(value or 0) for value in columns[name]]
+        columns['date_completed'] = [
+            timezone.localdate(value) if value else None for value in columns['date_completed']
+        ]
+        self.columns = columns
+        self.size = len(rows)
+
+    def interest_until(self, end_dates):
+        """Interest accrued on every loan from its transaction date to the matching end date"""
+        c = self.columns
+        return [
+            accrued_interest(principal, rate, kind, (end - start).days) if end else 0.0
+            for principal, rate, kind, start, end in zip(
+                c['amount'], c['interest_rate'], c['interest_type'], c['transaction_date'], end_dates
+            )
+        ]
+
+    def balances(self):
+        """Accrued interest and outstanding balances of open loans, and interest realized on completed lends"""
+        c = self.columns
+        is_open = [status in self.OPEN_STATUSES for status in c['status']]
+        accrued = self.interest_until([self.today if flag else None for flag in is_open])
+        realized = self.interest_until([
+            completed if kind == 'lend' and status == 'completed' else None
+            for kind, status, completed in zip(c['transaction_type'], c['status'], c['date_completed'])
+        ])
+
+        receivable = payable = 0.0
+        for kind, flag, principal, paid, interest in zip(
+            c['transaction_type'], is_open, c['amount'], c['amount_paid'], accrued
+        ):
+            if not flag:
+                continue
+            outstanding = max(0.0, principal + interest - paid)
+            if kind == 'lend':
+                receivable += outstanding
+            else:
+                payable += outstanding
+
+        return {
+            'accrued_interest': round(sum(accrued), 2),
+            'realized_interest': round(sum(realized), 2),
+            'outstanding_receivable': round(receivable, 2),
+            'outstanding_payable': round(payable, 2),
+        }
+
+    def trends(self, period_start):
+        """Current period against the same number of days just before it"""
+        c = self.columns
+        length = timedelta(days=(self.today - period_start).days + 1)
+        previous_start = period_start - length
+
+        volume = {'current': 0.0, 'previous': 0.0}
+        started = Counter()
+        collected = Counter()
+        for principal, started_on, completed_on in zip(c['amount'], c['transaction_date'], c['date_completed']):
+            for window, day in (('started', started_on), ('collected', completed_on)):
+                if day is None or day < previous_start:
+                    continue
+                bucket = 'current' if day >= period_start else 'previous'
+                if window == 'started':
+                    volume[bucket] += principal
+                    started[bucket] += 1
+                else:
+                    collected[bucket] += 1
+
+        return {
+            'volume_trend': percent_change(volume['current'], volume['previous']),
+            'active_trend': percent_change(started['current'], started['previous']),
+            'collection_trend': percent_change(collected['current'], collected['previous']),
+        }
+
+    def collection_stats(self):
+        """Average days to collect a lend and the share of people lent to more than once"""
+        c = self.columns
+        durations = [
+            (completed - started).days
+            for kind, status, started, completed in zip(
+                c['transaction_type'], c['status'], c['transaction_date'], c['date_completed']
+            )
+            if kind == 'lend' and status == 'completed' and completed
+        ]
+        lends_per_person = Counter(
+            name.strip().lower() for kind, name in zip(c['transaction_type'], c['person_name']) if kind == 'lend'
+        )
+        repeat = sum(1 for count in lends_per_person.values() if count > 1)
+        return {
+            'average_days_to_collect': round(sum(durations) / len(durations), 1) if durations else 0,
+            'repeat_borrowers': round(repeat / len(lends_per_person) * 100, 1) if lends_per_person else 0,
+        }
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from lending.reminders import ReminderDispatcher
+
+
+class Command(BaseCommand):
+    help = "Write today's payment reminders for every user's due and overdue lending items"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=ReminderDispatcher.CHUNK_SIZE,
+                            help='Number of due transactions or installments evaluated per batch')
+
+    def handle(self, *args, **options):
+        created = ReminderDispatcher().dispatch(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} payment reminders'))
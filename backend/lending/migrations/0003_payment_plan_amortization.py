@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:24
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_principal(apps, schema_editor):
+    # Existing plans are fixed installments without interest
+    PaymentPlan = apps.get_model('lending', 'PaymentPlan')
+    PaymentInstallment = apps.get_model('lending', 'PaymentInstallment')
+    PaymentPlan.objects.update(principal=F('installment_amount') * F('total_installments'))
+    PaymentInstallment.objects.update(principal_amount=F('amount'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lending', '0002_enhanced_lending_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentinstallment',
+            name='interest_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='paymentinstallment',
+            name='principal_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='paymentplan',
+            name='amortization',
+            field=models.CharField(choices=[('none', 'Fixed installments'), ('equal_principal', 'Equal principal'), ('annuity', 'Annuity')], default='none', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='paymentplan',
+            name='principal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_principal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from lending.contacts import normalize_name
+
+
+def backfill_contacts(apps, schema_editor):
+    ContactProfile = apps.get_model('lending', 'ContactProfile')
+    LendingTransaction = apps.get_model('lending', 'LendingTransaction')
+
+    contacts = list(ContactProfile.objects.order_by('id').only('id', 'user_id', 'name'))
+    contact_ids = {}
+    for contact in contacts:
+        contact.normalized_name = normalize_name(contact.name)
+        contact_ids.setdefault((contact.user_id, contact.normalized_name), contact.id)
+    ContactProfile.objects.bulk_update(contacts, ['normalized_name'], batch_size=500)
+
+    # Only exact normalized matches are linked; near matches are left for the user to confirm
+    names_by_contact = {}
+    names = LendingTransaction.objects.filter(contact__isnull=True).order_by().values_list('user_id', 'person_name')
+    for user_id, name in names.distinct().iterator():
+        normalized = normalize_name(name)
+        contact_id = normalized and contact_ids.get((user_id, normalized))
+        if contact_id:
+            names_by_contact.setdefault((user_id, contact_id), []).append(name)
+
+    for (user_id, contact_id), names in names_by_contact.items():
+        LendingTransaction.objects.filter(
+            user_id=user_id, contact__isnull=True, person_name__in=names
+        ).update(contact_id=contact_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lending', '0003_payment_plan_amortization'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactprofile',
+            name='normalized_name',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='lendingtransaction',
+            name='contact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='lending.contactprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='contactprofile',
+            index=models.Index(fields=['user', 'normalized_name'], name='lending_con_user_id_7be829_idx'),
+        ),
+        migrations.RunPython(backfill_contacts, migrations.RunPython.noop),
+    ]
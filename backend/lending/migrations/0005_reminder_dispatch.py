@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:29
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_reminder_users(apps, schema_editor):
+    PaymentReminder = apps.get_model('lending', 'PaymentReminder')
+    LendingTransaction = apps.get_model('lending', 'LendingTransaction')
+    PaymentReminder.objects.filter(user__isnull=True).update(user_id=Subquery(
+        LendingTransaction.objects.filter(pk=OuterRef('transaction_id')).values('user_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lending', '0004_contact_resolution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='dedupe_key',
+            field=models.CharField(blank=True, max_length=120, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='installment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='lending.paymentinstallment'),
+        ),
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('due_approaching', 'Due Date Approaching'), ('overdue', 'Overdue'), ('installment_due', 'Installment Due'), ('installment_overdue', 'Installment Overdue')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='payload',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='priority',
+            field=models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('urgent', 'Urgent')], default='medium', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='reminder_day',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='rule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='lending.notificationrule'),
+        ),
+        migrations.AddField(
+            model_name='paymentreminder',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='lendingtransaction',
+            index=models.Index(fields=['status', 'due_date'], name='lending_len_status_0ee554_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentinstallment',
+            index=models.Index(fields=['is_paid', 'due_date'], name='lending_pay_is_paid_a23321_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentreminder',
+            index=models.Index(fields=['user', 'reminder_day', 'reminder_type'], name='lending_pay_user_id_673836_idx'),
+        ),
+        migrations.RunPython(backfill_reminder_users, migrations.RunPython.noop),
+    ]
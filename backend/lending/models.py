@@ -1,10 +1,12 @@
 from django.db import models
+from django.db.models import DEFERRED
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
 import shortuuid
 from datetime import date
+from .contacts import ContactMatcher, link_transactions, normalize_name
 
 def generate_lending_id():
     return f"LND{shortuuid.random(length=22).upper()}"
@@ -12,6 +14,20 @@ def generate_lending_id():
 def get_current_date():
     return timezone.now().date()
 
+DAYS_PER_YEAR = 365
+
+def accrued_interest(principal, rate, interest_type, days):
+    """Interest on principal at an annual percentage rate after days, as a float"""
+    if not rate:
+        return 0.0
+    principal, rate = float(principal), float(rate) / 100
+    if interest_type == 'flat':
+        return principal * rate
+    years = max(days, 0) / DAYS_PER_YEAR
+    if interest_type == 'compound':
+        return principal * ((1 + rate) ** years - 1)
+    return principal * rate * years
+
 class LendingCategory(models.Model):
     """Categories for lending transactions"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -62,6 +78,10 @@ class LendingTransaction(models.Model):
     # Transaction details
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     person_name = models.CharField(max_length=100)
+    # Resolved from person_name on creation; see lending.contacts
+    contact = models.ForeignKey(
+        'ContactProfile', on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions'
+    )
     person_contact = models.CharField(max_length=100, blank=True)
     person_email = models.EmailField(blank=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
@@ -109,11 +129,19 @@ class LendingTransaction(models.Model):
             models.Index(fields=['user', 'transaction_date']),
             models.Index(fields=['user', 'status']),
             models.Index(fields=['user', 'transaction_type']),
+            models.Index(fields=['status', 'due_date']),
         ]
 
     def __str__(self):
         return f"{self.get_transaction_type_display()} ${self.amount} - {self.person_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Read through __dict__ so a deferred person_name is not loaded here
+        instance._original_person_name = instance.__dict__.get('person_name', DEFERRED)
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.display_id or self.display_id == 1:
             last_transaction = LendingTransaction.objects.filter(user=self.user).order_by('-display_id').first()
@@ -121,7 +149,24 @@ class LendingTransaction(models.Model):
                 self.display_id = int(last_transaction.display_id) + 1
             else:
                 self.display_id = 1
+        original = getattr(self, '_original_person_name', DEFERRED)
+        if self._state.adding:
+            if self.contact_id is None and self.person_name:
+                self.contact_id = ContactProfile.resolve(self.user_id, self.person_name)
+        elif self.__dict__.get('person_name', original) != original:
+            # Renamed to someone else, or set without the loaded name to compare; the old contact no longer applies
+            self.contact_id = ContactProfile.resolve(self.user_id, self.person_name)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'contact'}
         super().save(*args, **kwargs)
+        self._original_person_name = self.__dict__.get('person_name', DEFERRED)
+        from .reminders import mark_reminders_stale
+        mark_reminders_stale(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        from .reminders import mark_reminders_stale
+        mark_reminders_stale(self.user_id)
+        return super().delete(*args, **kwargs)
 
     @property
     def is_overdue(self):
@@ -129,20 +174,13 @@ class LendingTransaction(models.Model):
 
     @property
     def remaining_amount(self):
-        return self.amount - Decimal(str(self.amount_paid))
+        return max(Decimal('0'), self.amount - Decimal(str(self.amount_paid)))
 
     @property
     def total_with_interest(self):
-        if self.interest_rate > 0:
-            if self.interest_type == 'simple':
-                days = (timezone.now().date() - self.transaction_date).days
-                return self.amount * (1 + (self.interest_rate / 100) * (days / 365))
-            elif self.interest_type == 'compound':
-                days = (timezone.now().date() - self.transaction_date).days
-                return self.amount * ((1 + self.interest_rate / 100) ** (days / 365))
-            else:  # flat
-                return self.amount * (1 + self.interest_rate / 100)
-        return self.amount
+        days = (timezone.now().date() - self.transaction_date).days
+        interest = accrued_interest(self.amount, self.interest_rate, self.interest_type, days)
+        return self.amount + Decimal(str(round(interest, 2)))
 
     @property
     def days_overdue(self):
@@ -153,10 +191,7 @@ class LendingTransaction(models.Model):
     @property
     def contact_profile(self):
         """Get associated contact profile"""
-        try:
-            return ContactProfile.objects.get(user=self.user, name=self.person_name)
-        except ContactProfile.DoesNotExist:
-            return None
+        return self.contact
 
 class PaymentRecord(models.Model):
     """Track partial payments for lending transactions"""
@@ -172,6 +207,13 @@ class PaymentRecord(models.Model):
 
 class PaymentReminder(models.Model):
     """Reminders for lending transactions"""
+    KINDS = [
+        ('due_approaching', 'Due Date Approaching'),
+        ('overdue', 'Overdue'),
+        ('installment_due', 'Installment Due'),
+        ('installment_overdue', 'Installment Overdue'),
+    ]
+    
     transaction = models.ForeignKey(LendingTransaction, on_delete=models.CASCADE, related_name='reminders')
     reminder_date = models.DateTimeField()
     message = models.TextField()
@@ -182,9 +224,21 @@ class PaymentReminder(models.Model):
     ], default='notification')
     is_sent = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    
+    # Written by lending.reminders.ReminderDispatcher; dedupe_key allows
+    # one reminder per target, kind, channel and day
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    installment = models.ForeignKey('PaymentInstallment', on_delete=models.CASCADE, null=True, blank=True)
+    rule = models.ForeignKey('NotificationRule', on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=20, choices=KINDS, blank=True)
+    priority = models.CharField(max_length=10, choices=LendingTransaction.PRIORITY_CHOICES, default='medium')
+    payload = models.JSONField(default=dict, blank=True)
+    reminder_day = models.DateField(null=True, blank=True)
+    dedupe_key = models.CharField(max_length=120, unique=True, null=True, blank=True)
 
     class Meta:
         ordering = ['-reminder_date']
+        indexes = [models.Index(fields=['user', 'reminder_day', 'reminder_type'])]
 
 class LendingAnalytics(models.Model):
     """Cached analytics data for lending"""
@@ -207,6 +261,7 @@ class ContactProfile(models.Model):
     """Enhanced contact management for lending"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, blank=True, editable=False)
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=20, blank=True)
     relationship = models.CharField(max_length=50, choices=[
@@ -231,9 +286,37 @@ class ContactProfile(models.Model):
     class Meta:
         unique_together = ['user', 'name']
         ordering = ['name']
+        indexes = [models.Index(fields=['user', 'normalized_name'])]
     
     def __str__(self):
         return f"{self.user.username} - {self.name}"
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        self.normalized_name = normalize_name(self.name)
+        if kwargs.get('update_fields') is not None and 'name' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'normalized_name'}
+        super().save(*args, **kwargs)
+        # Earlier transactions written under exactly this name join the new contact
+        if adding:
+            link_transactions(self.user_id, LendingTransaction, ContactProfile)
+    
+    @classmethod
+    def resolve(cls, user_id, person_name):
+        """Id of the user's contact with the same normalized name, or None"""
+        normalized = normalize_name(person_name)
+        if not normalized:
+            return None
+        return cls.objects.filter(user_id=user_id, normalized_name=normalized).values_list('id', flat=True).first()
+    
+    @classmethod
+    def suggest(cls, user_id, person_name):
+        """Contacts person_name may refer to, most similar first, for the user to confirm"""
+        contacts = dict(cls.objects.filter(user_id=user_id).values_list('id', 'name'))
+        return [
+            {'id': contact_id, 'name': contacts[contact_id], 'similarity': score}
+            for contact_id, score in ContactMatcher(contacts.items()).suggest(person_name)
+        ]
 
 class PaymentPlan(models.Model):
     """Structured payment schedules"""
@@ -247,6 +330,13 @@ class PaymentPlan(models.Model):
         ('quarterly', 'Quarterly')
     ], default='monthly')
     start_date = models.DateField()
+    # How the transaction's interest_rate is spread over the installments
+    amortization = models.CharField(max_length=20, choices=[
+        ('none', 'Fixed installments'),
+        ('equal_principal', 'Equal principal'),
+        ('annuity', 'Annuity')
+    ], default='none')
+    principal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     auto_reminder = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -259,6 +349,8 @@ class PaymentInstallment(models.Model):
     installment_number = models.IntegerField()
     due_date = models.DateField()
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    principal_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    interest_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     is_paid = models.BooleanField(default=False)
     paid_date = models.DateField(null=True, blank=True)
     paid_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -266,6 +358,7 @@ class PaymentInstallment(models.Model):
     class Meta:
         ordering = ['installment_number']
         unique_together = ['payment_plan', 'installment_number']
+        indexes = [models.Index(fields=['is_paid', 'due_date'])]
 
 class TransactionTemplate(models.Model):
     """Reusable transaction templates"""
@@ -0,0 +1,243 @@
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LendingTransaction, NotificationRule, PaymentInstallment, PaymentReminder
+
+# Rule trigger each reminder kind answers to
+RULE_TRIGGERS = {
+    'due_approaching': 'due_date_approaching',
+    'installment_due': 'due_date_approaching',
+    'overdue': 'payment_overdue',
+    'installment_overdue': 'payment_overdue',
+}
+# NotificationRule.notification_methods entries mapped to reminder channels
+CHANNELS = {
+    'email': 'email',
+    'sms': 'sms',
+    'notification': 'notification',
+    'in_app': 'notification',
+    'push': 'notification',
+}
+
+
+# Day a user's reminders were last dispatched; dropped when their loans change.
+# The cache must be shared by every worker (the Redis cache in
+# settings_security.py): with a per-process LocMemCache, a change handled by
+# one worker leaves the other workers' markers in place and they keep serving
+# the reminders dispatched before it. A lost or evicted marker only costs a
+# re-dispatch.
+DISPATCHED_KEY = 'lending_reminders_dispatched_{user_id}'
+
+
+def mark_reminders_stale(user_id):
+    """Make the user's next notification read dispatch again, once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(DISPATCHED_KEY.format(user_id=user_id)))
+
+
+def ensure_dispatched(user, today):
+    """Dispatch the user's reminders unless that already happened today with no changes since"""
+    key = DISPATCHED_KEY.format(user_id=user.id)
+    if cache.get(key) == today.isoformat():
+        return
+    # Set first, so a change committed while dispatching marks the user stale again
+    cache.set(key, today.isoformat(), 60 * 60 * 24)
+    ReminderDispatcher().dispatch(today=today, user=user)
+
+
+class _TemplateFields(dict):
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+def render_message(template, fields):
+    """A rule's message_template filled from fields; unknown placeholders are left as written"""
+    try:
+        return template.format_map(_TemplateFields(fields))
+    except (ValueError, IndexError, AttributeError):
+        return template
+
+
+def reminder_priority(kind, days):
+    if kind in ('overdue', 'installment_overdue'):
+        return 'urgent' if days > 7 else 'high'
+    return 'high' if days <= 2 else 'medium'
+
+
+class ReminderDispatcher:
+    """Writes the day's PaymentReminder rows for every user in one pass.
+
+    Open transactions and unpaid installments due within the lookahead are
+    streamed in chunks through the (status, due_date) and (is_paid,
+    due_date) indexes. Active NotificationRules are loaded once and
+    evaluated in memory; every target also gets the default in-app
+    reminder. Each reminder has a dedupe_key of kind, target, channel and
+    day, so running the dispatcher again the same day writes nothing new;
+    existing rows only get their payload and message refreshed.
+
+    Dispatching for a single user also supersedes that user's unsent
+    reminders from earlier today that were not produced again, such as the
+    due_approaching reminder of a loan whose due date moved into the past.
+    """
+
+    CHUNK_SIZE = 1000
+    DEFAULT_LOOKAHEAD = 7
+    OPEN_STATUSES = ['active', 'partial', 'overdue']
+
+    def dispatch(self, today=None, chunk_size=None, user=None):
+        """Create any missing reminders for today; returns the number created"""
+        self.today = today or timezone.now().date()
+        self.now = timezone.now()
+        chunk_size = chunk_size or self.CHUNK_SIZE
+
+        rules = NotificationRule.objects.filter(is_active=True, trigger_event__in=set(RULE_TRIGGERS.values()))
+        if user is not None:
+            rules = rules.filter(user=user)
+        self.rules = defaultdict(list)
+        for rule in rules:
+            self.rules[rule.user_id].append(rule)
+        lookahead = max([self.DEFAULT_LOOKAHEAD] + [
+            rule.days_before for user_rules in self.rules.values() for rule in user_rules
+            if rule.trigger_event == 'due_date_approaching'
+        ])
+        horizon = self.today + timedelta(days=lookahead)
+
+        transactions = LendingTransaction.objects.filter(
+            status__in=self.OPEN_STATUSES, due_date__lte=horizon
+        )
+        installments = PaymentInstallment.objects.filter(
+            is_paid=False,
+            due_date__lte=horizon,
+            payment_plan__auto_reminder=True,
+            payment_plan__transaction__status__in=self.OPEN_STATUSES,
+        )
+        if user is not None:
+            transactions = transactions.filter(user=user)
+            installments = installments.filter(payment_plan__transaction__user=user)
+
+        transaction_rows = transactions.order_by().values_list(
+            'lending_id', 'user_id', 'person_name', 'amount', 'amount_paid', 'due_date'
+        ).iterator(chunk_size=chunk_size)
+        installment_rows = installments.order_by().values_list(
+            'id', 'installment_number', 'amount', 'paid_amount', 'due_date',
+            'payment_plan__transaction_id', 'payment_plan__transaction__user_id',
+            'payment_plan__transaction__person_name',
+        ).iterator(chunk_size=chunk_size)
+
+        self.produced = set()
+        created = 0
+        for rows in self._chunks(transaction_rows, chunk_size):
+            created += self._write([
+                reminder
+                for lending_id, user_id, person_name, amount, paid, due_date in rows
+                for reminder in self._reminders(
+                    user_id, lending_id, None, person_name, amount - paid, due_date, horizon
+                )
+            ])
+        for rows in self._chunks(installment_rows, chunk_size):
+            created += self._write([
+                reminder
+                for installment_id, number, amount, paid, due_date, lending_id, user_id, person_name in rows
+                for reminder in self._reminders(
+                    user_id, lending_id, (installment_id, number), person_name, amount - paid, due_date, horizon
+                )
+            ])
+        if user is not None:
+            PaymentReminder.objects.filter(
+                user=user, reminder_day=self.today, is_sent=False, dedupe_key__isnull=False
+            ).exclude(dedupe_key__in=self.produced).delete()
+        return created
+
+    @staticmethod
+    def _chunks(rows, size):
+        while True:
+            chunk = list(islice(rows, size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _reminders(self, user_id, lending_id, installment, person_name, remaining, due_date, horizon):
+        days = (due_date - self.today).days
+        if days < 0:
+            kind, days = ('installment_overdue' if installment else 'overdue'), -days
+        else:
+            kind = 'installment_due' if installment else 'due_approaching'
+        installment_id, installment_number = installment or (None, None)
+
+        payload = {
+            'type': kind,
+            'transaction_id': lending_id,
+            'person_name': person_name,
+            'amount': float(remaining),
+            'days_overdue' if kind in ('overdue', 'installment_overdue') else 'days_until_due': days,
+            'priority': reminder_priority(kind, days),
+        }
+        if installment_number is not None:
+            payload['installment_number'] = installment_number
+        default_message = (
+            f"{person_name}: {remaining} overdue by {days} days" if 'days_overdue' in payload
+            else f"{person_name}: {remaining} due in {days} days"
+        )
+
+        # User rules first, so their channel and message win over the default
+        # in-app reminder for the same dedupe_key
+        matches = []
+        for rule in self.rules.get(user_id, ()):
+            if rule.trigger_event != RULE_TRIGGERS[kind]:
+                continue
+            if rule.trigger_event == 'due_date_approaching' and days > rule.days_before:
+                continue
+            message = render_message(rule.message_template, payload) or default_message
+            for method in rule.notification_methods or ['notification']:
+                if method in CHANNELS:
+                    matches.append((rule.pk, CHANNELS[method], message))
+        if 'days_overdue' in payload or days <= self.DEFAULT_LOOKAHEAD:
+            matches.append((None, 'notification', default_message))
+
+        seen = set()
+        for rule_id, channel, message in matches:
+            key = f"{kind}:{lending_id}:{installment_id or ''}:{channel}:{self.today.isoformat()}"
+            if key in seen:
+                continue
+            seen.add(key)
+            yield PaymentReminder(
+                user_id=user_id,
+                transaction_id=lending_id,
+                installment_id=installment_id,
+                rule_id=rule_id,
+                kind=kind,
+                priority=payload['priority'],
+                payload=payload,
+                message=message,
+                reminder_type=channel,
+                reminder_date=self.now,
+                reminder_day=self.today,
+                dedupe_key=key,
+            )
+
+    def _write(self, reminders):
+        if not reminders:
+            return 0
+        self.produced.update(reminder.dedupe_key for reminder in reminders)
+        existing = {
+            key: (pk, payload, message, priority)
+            for key, pk, payload, message, priority in PaymentReminder.objects.filter(
+                dedupe_key__in=[reminder.dedupe_key for reminder in reminders]
+            ).values_list('dedupe_key', 'pk', 'payload', 'message', 'priority')
+        }
+        new, changed = [], []
+        for reminder in reminders:
+            if reminder.dedupe_key not in existing:
+                new.append(reminder)
+                continue
+            pk, payload, message, priority = existing[reminder.dedupe_key]
+            if (payload, message, priority) != (reminder.payload, reminder.message, reminder.priority):
+                reminder.pk = pk
+                changed.append(reminder)
+        # ignore_conflicts covers a concurrent dispatcher inserting the same keys
+        PaymentReminder.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+        PaymentReminder.objects.bulk_update(changed, ['payload', 'message', 'priority'], batch_size=500)
+        return len(new)
@@ -0,0 +1,66 @@
+import calendar
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+# Calendar step of each plan frequency and how many periods make a year
+FREQUENCY_STEPS = {
+    'weekly': ('days', 7),
+    'biweekly': ('days', 14),
+    'monthly': ('months', 1),
+    'quarterly': ('months', 3),
+}
+PERIODS_PER_YEAR = {'weekly': 52, 'biweekly': 26, 'monthly': 12, 'quarterly': 4}
+
+
+def add_months(day, months):
+    """day moved by whole months, clamped to the end of shorter months"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def installment_dates(start_date, frequency, periods):
+    """Due dates for the given period offsets, each counted from start_date.
+
+    Offsets are anchored to the start date rather than chained, so a plan
+    starting on the 31st falls due on the 28th/29th of February and on the
+    31st again in March.
+    """
+    unit, step = FREQUENCY_STEPS[frequency]
+    if unit == 'days':
+        return [start_date + timedelta(days=step * period) for period in periods]
+    return [add_months(start_date, step * period) for period in periods]
+
+
+def amortize(principal, annual_rate, frequency, count, method='none'):
+    """(amount, principal, interest) for each of count installments repaying principal.
+
+    'annuity' pays a constant amount, 'equal_principal' repays the same
+    principal every period with interest on the remaining balance, and
+    'none' splits the principal evenly without interest. Every row comes
+    from a closed form, so long schedules need no running balance; amounts
+    are rounded to cents and the last installment absorbs the rounding.
+    """
+    if count <= 0:
+        return []
+    balance = float(principal)
+    rate = float(annual_rate or 0) / 100 / PERIODS_PER_YEAR[frequency] if method != 'none' else 0.0
+    periods = range(count)
+
+    if method == 'annuity' and rate:
+        payment = balance * rate / (1 - (1 + rate) ** -count)
+        growth = [(1 + rate) ** k for k in periods]
+        interest = [_cents((balance * g - payment * (g - 1) / rate) * rate) for g in growth]
+        principal_parts = [_cents(payment) - charge for charge in interest]
+    else:
+        interest = [_cents((balance - balance / count * k) * rate) for k in periods]
+        principal_parts = [_cents(balance / count)] * count
+
+    principal_parts[-1] += Decimal(principal).quantize(CENT) - sum(principal_parts)
+    return [(part + charge, part, charge) for part, charge in zip(principal_parts, interest)]
+
+
+def _cents(value):
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
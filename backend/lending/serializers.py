@@ -61,15 +61,16 @@ class ContactProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['reliability_score', 'created_at', 'updated_at']
     
     def get_lending_history(self, obj):
+        # Listings precompute every contact's ledger in two queries
         from .services import ContactManagementService
-        return ContactManagementService.get_contact_history(obj)
+        return ContactManagementService.get_contact_history(obj, self.context.get('contact_ledger'))
 
 class PaymentInstallmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = PaymentInstallment
         fields = [
-            'id', 'installment_number', 'due_date', 'amount', 'is_paid',
-            'paid_date', 'paid_amount'
+            'id', 'installment_number', 'due_date', 'amount', 'principal_amount',
+            'interest_amount', 'is_paid', 'paid_date', 'paid_amount'
         ]
 
 class PaymentPlanSerializer(serializers.ModelSerializer):
@@ -80,8 +81,8 @@ class PaymentPlanSerializer(serializers.ModelSerializer):
         model = PaymentPlan
         fields = [
             'id', 'total_installments', 'installment_amount', 'frequency',
-            'start_date', 'auto_reminder', 'created_at', 'installments',
-            'progress_percentage'
+            'start_date', 'amortization', 'principal', 'auto_reminder', 'created_at',
+            'installments', 'progress_percentage'
         ]
     
     def get_progress_percentage(self, obj):
@@ -1,4 +1,5 @@
-from django.db.models import Sum, Count, Q, Avg, F
+from django.db.models import Sum, Count, Q, Avg, F, Window
+from django.db.models.functions import RowNumber, TruncMonth
 from django.utils import timezone
 from django.db import transaction
 from datetime import datetime, timedelta
@@ -9,11 +10,100 @@ import json
 from .models import (
     LendingTransaction, LendingCategory, PaymentRecord, LendingAnalytics,
     ContactProfile, PaymentPlan, PaymentInstallment, TransactionTemplate,
-    LendingDocument, NotificationRule
+    LendingDocument, NotificationRule, PaymentReminder, accrued_interest
 )
+from .interest import LoanPortfolio
+from .schedule import add_months, amortize, installment_dates
 
 logger = logging.getLogger(__name__)
 
+class LendingAggregates:
+    """Every lending total, count and per-person figure for one user from a single query.
+    
+    Rows are grouped by person with conditional aggregates; user-wide
+    totals are the sums of the person rows, so summaries, analytics and
+    risk analysis share one scan of LendingTransaction. Use for_request()
+    to share one instance between the services called by a view.
+    """
+    
+    COUNTERS = (
+        'total_transactions', 'active_lends', 'active_borrows', 'active_count',
+        'completed_count', 'on_time_count', 'overdue_count', 'period_count', 'period_active',
+    )
+    AMOUNTS = ('total_lent', 'total_borrowed', 'active_amount', 'overdue_amount', 'period_volume')
+    
+    def __init__(self, user, period_start=None, today=None):
+        self.user = user
+        self.period_start = period_start
+        self.today = today or timezone.now().date()
+        self._people = None
+    
+    @classmethod
+    def for_request(cls, request, period_start=None):
+        """The aggregates for request.user, computed at most once per request and period"""
+        memo = getattr(request, '_lending_aggregates', None)
+        if memo is None:
+            memo = {}
+            request._lending_aggregates = memo
+        key = (request.user.pk, period_start)
+        if key not in memo:
+            memo[key] = cls(request.user, period_start)
+        return memo[key]
+    
+    @property
+    def people(self):
+        """Per-person rows, largest active amount first"""
+        if self._people is None:
+            active = Q(status='active')
+            lend, borrow = Q(transaction_type='lend'), Q(transaction_type='borrow')
+            overdue = active & Q(due_date__lt=self.today)
+            completed = Q(status='completed')
+            fields = {
+                'total_transactions': Count('lending_id'),
+                'active_lends': Count('lending_id', filter=active & lend),
+                'active_borrows': Count('lending_id', filter=active & borrow),
+                'active_count': Count('lending_id', filter=active),
+                'completed_count': Count('lending_id', filter=completed),
+                'on_time_count': Count('lending_id', filter=completed & Q(date_completed__lte=F('due_date'))),
+                'overdue_count': Count('lending_id', filter=overdue),
+                'total_lent': Sum('amount', filter=active & lend),
+                'total_borrowed': Sum('amount', filter=active & borrow),
+                'active_amount': Sum('amount', filter=active),
+                'overdue_amount': Sum('amount', filter=overdue),
+            }
+            if self.period_start:
+                in_period = Q(transaction_date__gte=self.period_start)
+                fields.update(
+                    period_count=Count('lending_id', filter=in_period),
+                    period_active=Count('lending_id', filter=in_period & active),
+                    period_volume=Sum('amount', filter=in_period),
+                )
+            rows = LendingTransaction.objects.filter(user=self.user).order_by().values('person_name').annotate(**fields)
+            people = []
+            for row in rows:
+                for name in self.COUNTERS:
+                    row[name] = row.get(name) or 0
+                for name in self.AMOUNTS:
+                    row[name] = row.get(name) or Decimal('0')
+                people.append(row)
+            people.sort(key=lambda row: row['active_amount'], reverse=True)
+            self._people = people
+        return self._people
+    
+    @property
+    def totals(self):
+        totals = {name: 0 for name in self.COUNTERS}
+        totals.update({name: Decimal('0') for name in self.AMOUNTS})
+        for row in self.people:
+            for name in totals:
+                totals[name] += row[name]
+        return totals
+    
+    @property
+    def active_people(self):
+        return [row for row in self.people if row['active_amount'] > 0]
+
+
 class LendingService:
     """Core service for lending operations"""
     
@@ -46,37 +136,23 @@ class LendingService:
         return transaction
     
     @staticmethod
-    def get_summary_data(user):
+    def get_summary_data(user, aggregates=None):
         """Get summary statistics for user"""
-        transactions = LendingTransaction.objects.filter(user=user)
-        
-        # Active transactions
-        active_lends = transactions.filter(transaction_type='lend', status='active')
-        active_borrows = transactions.filter(transaction_type='borrow', status='active')
-        
-        # Totals
-        total_lent = active_lends.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        total_borrowed = active_borrows.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        
-        # Overdue
-        overdue_transactions = transactions.filter(
-            due_date__lt=timezone.now().date(),
-            status='active'
-        )
+        totals = (aggregates or LendingAggregates(user)).totals
         
         return {
-            'total_lent': float(total_lent),
-            'total_borrowed': float(total_borrowed),
-            'net_position': float(total_lent - total_borrowed),
-            'active_lends': active_lends.count(),
-            'active_borrows': active_borrows.count(),
-            'overdue_count': overdue_transactions.count(),
-            'overdue_amount': float(overdue_transactions.aggregate(total=Sum('amount'))['total'] or Decimal('0')),
-            'total_transactions': transactions.count()
+            'total_lent': float(totals['total_lent']),
+            'total_borrowed': float(totals['total_borrowed']),
+            'net_position': float(totals['total_lent'] - totals['total_borrowed']),
+            'active_lends': totals['active_lends'],
+            'active_borrows': totals['active_borrows'],
+            'overdue_count': totals['overdue_count'],
+            'overdue_amount': float(totals['overdue_amount']),
+            'total_transactions': totals['total_transactions']
         }
     
     @staticmethod
-    def get_analytics_data(user, period='month'):
+    def get_analytics_data(user, period='month', aggregates=None):
         """Get comprehensive analytics data"""
         now = timezone.now()
         
@@ -90,57 +166,44 @@ class LendingService:
         else:
             start_date = now.date() - timedelta(days=30)
         
-        transactions = LendingTransaction.objects.filter(
-            user=user,
-            transaction_date__gte=start_date
-        )
+        if aggregates is None or aggregates.period_start != start_date:
+            aggregates = LendingAggregates(user, period_start=start_date)
+        totals = aggregates.totals
         
-        all_transactions = LendingTransaction.objects.filter(user=user)
-        
-        # Calculate metrics
-        total_volume = transactions.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        active_transactions = transactions.filter(status='active').count()
-        completed_transactions = all_transactions.filter(status='completed').count()
-        total_transactions = all_transactions.count()
+        completed_transactions = totals['completed_count']
+        total_transactions = totals['total_transactions']
         
         # Collection rate
         collection_rate = (completed_transactions / max(total_transactions, 1)) * 100
         
         # Risk score calculation
-        overdue_count = all_transactions.filter(
-            due_date__lt=now.date(),
-            status='active'
-        ).count()
-        risk_score = min(10, (overdue_count / max(total_transactions, 1)) * 10)
+        risk_score = min(10, (totals['overdue_count'] / max(total_transactions, 1)) * 10)
         
         # Performance metrics
-        on_time_payments = all_transactions.filter(
-            status='completed',
-            date_completed__lte=F('due_date')
-        ).count()
-        on_time_rate = (on_time_payments / max(completed_transactions, 1)) * 100
+        on_time_rate = (totals['on_time_count'] / max(completed_transactions, 1)) * 100
         
-        # Interest earned
-        interest_earned = 0
-        for t in all_transactions.filter(status='completed', transaction_type='lend'):
-            try:
-                interest_earned += float(t.total_with_interest) - float(t.amount)
-            except (TypeError, AttributeError):
-                pass
+        # Interest, balances and trends from one columnar pass over the portfolio
+        portfolio = LoanPortfolio(user, today=now.date())
+        balances = portfolio.balances()
+        trends = portfolio.trends(start_date)
+        collection = portfolio.collection_stats()
         
         return {
-            'total_volume': float(total_volume),
-            'transaction_count': transactions.count(),
-            'active_transactions': active_transactions,
+            'total_volume': float(totals['period_volume']),
+            'transaction_count': totals['period_count'],
+            'active_transactions': totals['period_active'],
             'collection_rate': collection_rate,
             'risk_score': risk_score,
-            'volume_trend': 5.2,
-            'active_trend': 2.1,
-            'collection_trend': 1.8,
+            'volume_trend': trends['volume_trend'],
+            'active_trend': trends['active_trend'],
+            'collection_trend': trends['collection_trend'],
             'on_time_payments': on_time_rate,
-            'average_days_to_collect': 15,
-            'repeat_borrowers': 25,
-            'interest_earned': interest_earned,
+            'average_days_to_collect': collection['average_days_to_collect'],
+            'repeat_borrowers': collection['repeat_borrowers'],
+            'interest_earned': balances['realized_interest'],
+            'accrued_interest': balances['accrued_interest'],
+            'outstanding_receivable': balances['outstanding_receivable'],
+            'outstanding_payable': balances['outstanding_payable'],
             'period': period
         }
     
@@ -152,6 +215,9 @@ class LendingService:
             user=user
         )
         
+        from .reminders import mark_reminders_stale
+        mark_reminders_stale(user.id)
+        
         if operation == 'delete':
             count = transactions.count()
             transactions.delete()
@@ -240,11 +306,12 @@ class LendingAnalyticsService:
         return analytics
     
     @staticmethod
-    def get_risk_analysis(user):
+    def get_risk_analysis(user, aggregates=None):
         """Analyze lending risk factors"""
-        transactions = LendingTransaction.objects.filter(user=user)
+        aggregates = aggregates or LendingAggregates(user)
+        totals = aggregates.totals
         
-        if not transactions.exists():
+        if not totals['total_transactions']:
             return {
                 'risk_score': 0,
                 'risk_factors': [],
@@ -255,11 +322,7 @@ class LendingAnalyticsService:
         risk_score = 0
         
         # Overdue analysis
-        overdue_transactions = transactions.filter(
-            due_date__lt=timezone.now().date(),
-            status='active'
-        )
-        overdue_ratio = overdue_transactions.count() / transactions.count()
+        overdue_ratio = totals['overdue_count'] / totals['total_transactions']
         
         if overdue_ratio > 0.2:
             risk_factors.append(f'High overdue ratio: {overdue_ratio:.1%}')
@@ -269,22 +332,15 @@ class LendingAnalyticsService:
             risk_score += 15
         
         # Concentration risk
-        person_totals = transactions.filter(status='active').values('person_name').annotate(
-            total=Sum('amount')
-        ).order_by('-total')
-        
-        if person_totals:
-            total_active = sum(p['total'] for p in person_totals)
-            if total_active > 0:
-                top_person_ratio = person_totals[0]['total'] / total_active
-                if top_person_ratio > 0.5:
-                    risk_factors.append(f'High concentration: {top_person_ratio:.1%} with one person')
-                    risk_score += 25
+        person_totals = aggregates.active_people
+        total_active = totals['active_amount']
+        top_person_ratio = float(person_totals[0]['active_amount'] / total_active) if person_totals else 0
+        if top_person_ratio > 0.5:
+            risk_factors.append(f'High concentration: {top_person_ratio:.1%} with one person')
+            risk_score += 25
         
         # Large exposure
-        active_lends = transactions.filter(transaction_type='lend', status='active')
-        total_lent = active_lends.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        total_lent_float = float(total_lent)
+        total_lent_float = float(totals['total_lent'])
         
         if total_lent_float > 50000:
             risk_factors.append(f'High lending exposure: ${total_lent_float:,.2f}')
@@ -302,18 +358,18 @@ class LendingAnalyticsService:
         # Calculate concentration risk
         concentration_risk = 0
         if person_totals:
-            total_active = sum(float(p['total']) for p in person_totals)
-            if total_active > 0:
-                top_person_ratio = float(person_totals[0]['total']) / total_active
-                concentration_risk = min(100, max(0, (top_person_ratio - 0.3) / 0.4) * 100)
+            concentration_risk = min(100, max(0, (top_person_ratio - 0.3) / 0.4) * 100)
         
-        completion_rate = (transactions.filter(status='completed').count() / max(transactions.count(), 1)) * 100
+        completion_rate = (totals['completed_count'] / totals['total_transactions']) * 100
         
         # Generate risk transactions for display
         high_risk_transactions = []
         medium_risk_transactions = []
         
-        for t in transactions.filter(status='active')[:10]:
+        active_transactions = LendingTransaction.objects.filter(user=user, status='active').only(
+            'person_name', 'amount', 'due_date'
+        )
+        for t in active_transactions[:10]:
             risk_data = {
                 'person_name': t.person_name,
                 'amount': float(t.amount),
@@ -356,106 +412,207 @@ class ContactManagementService:
     @staticmethod
     def calculate_reliability_score(contact: ContactProfile) -> float:
         """Calculate reliability score based on payment history"""
-        transactions = LendingTransaction.objects.filter(
-            user=contact.user,
-            person_name=contact.name
-        )
-        
-        if not transactions.exists():
+        entry = ContactLedgerService.build(contact.user, [contact.pk]).get(contact.pk)
+        if not entry:
             return 5.0
         
-        total = transactions.count()
-        completed_on_time = transactions.filter(
-            status='completed',
-            date_completed__lte=F('due_date')
-        ).count()
-        
-        overdue = transactions.filter(status='overdue').count()
-        
-        # Score calculation (1-10 scale)
-        on_time_ratio = completed_on_time / total if total > 0 else 0
-        overdue_penalty = min(overdue * 0.5, 3.0)
-        score = max(1.0, min(10.0, (on_time_ratio * 8) + 2 - overdue_penalty))
-        
+        score = ContactLedgerService.reliability(entry)
         contact.reliability_score = score
-        contact.save()
+        contact.save(update_fields=['reliability_score', 'updated_at'])
         
         return score
     
     @staticmethod
-    def get_contact_history(contact: ContactProfile) -> Dict:
+    def get_contact_history(contact: ContactProfile, ledger: Optional[Dict] = None) -> Dict:
         """Get comprehensive lending history for contact"""
-        transactions = LendingTransaction.objects.filter(
-            user=contact.user,
-            person_name=contact.name
-        ).order_by('-transaction_date')
-        
-        total_lent = transactions.filter(transaction_type='lend').aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-        
-        total_borrowed = transactions.filter(transaction_type='borrow').aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-        
-        pending = transactions.filter(
-            status__in=['active', 'partial', 'overdue']
-        ).aggregate(total=Sum('amount'))['total'] or 0
+        if ledger is None:
+            ledger = ContactLedgerService.build(contact.user, [contact.pk])
+        entry = ledger.get(contact.pk) or ContactLedgerService.empty_entry()
         
         return {
-            'total_transactions': transactions.count(),
-            'total_lent': float(total_lent),
-            'total_borrowed': float(total_borrowed),
-            'pending_amount': float(pending),
+            'total_transactions': entry['total_transactions'],
+            'total_lent': float(entry['total_lent']),
+            'total_borrowed': float(entry['total_borrowed']),
+            'pending_amount': float(entry['pending_amount']),
+            'on_time_ratio': entry['on_time_ratio'],
             'reliability_score': contact.reliability_score,
-            'recent_transactions': list(transactions[:5].values(
-                'lending_id', 'amount', 'status', 'transaction_date'
-            ))
+            'recent_transactions': entry['recent_transactions']
         }
 
+class ContactLedgerService:
+    """Lending figures for many contacts at once.
+    
+    One query grouped by the contact foreign key gives every contact's
+    totals, pending amount and on-time counts; one windowed query gives
+    each contact's most recent transactions. Listings pass the result to ContactProfileSerializer
+    instead of querying per contact.
+    """
+    
+    RECENT_LIMIT = 5
+    OPEN_STATUSES = ['active', 'partial', 'overdue']
+    
+    @staticmethod
+    def empty_entry() -> Dict:
+        return {
+            'total_transactions': 0,
+            'total_lent': Decimal('0'),
+            'total_borrowed': Decimal('0'),
+            'pending_amount': Decimal('0'),
+            'completed_on_time': 0,
+            'overdue_count': 0,
+            'on_time_ratio': 0,
+            'recent_transactions': [],
+        }
+    
+    @staticmethod
+    def build(user, contact_ids: List[int]) -> Dict[int, Dict]:
+        """Ledger entries keyed by contact id for the given contacts"""
+        contact_ids = list(set(contact_ids))
+        if not contact_ids:
+            return {}
+        transactions = LendingTransaction.objects.filter(user=user, contact_id__in=contact_ids).order_by()
+        
+        ledger = {}
+        for row in transactions.values('contact_id').annotate(
+            total_transactions=Count('lending_id'),
+            total_lent=Sum('amount', filter=Q(transaction_type='lend')),
+            total_borrowed=Sum('amount', filter=Q(transaction_type='borrow')),
+            pending_amount=Sum('amount', filter=Q(status__in=ContactLedgerService.OPEN_STATUSES)),
+            completed_on_time=Count('lending_id', filter=Q(status='completed', date_completed__lte=F('due_date'))),
+            overdue_count=Count('lending_id', filter=Q(status='overdue')),
+        ):
+            entry = ContactLedgerService.empty_entry()
+            entry.update({key: value for key, value in row.items() if value is not None})
+            entry['on_time_ratio'] = entry['completed_on_time'] / entry['total_transactions']
+            ledger[row['contact_id']] = entry
+        
+        recent = transactions.annotate(
+            recency=Window(
+                RowNumber(),
+                partition_by=[F('contact_id')],
+                order_by=[F('transaction_date').desc(), F('created_at').desc()]
+            )
+        ).filter(recency__lte=ContactLedgerService.RECENT_LIMIT).order_by('contact_id', 'recency')
+        for row in recent.values('contact_id', 'lending_id', 'amount', 'status', 'transaction_date'):
+            ledger[row.pop('contact_id')]['recent_transactions'].append(row)
+        
+        return ledger
+    
+    @staticmethod
+    def reliability(entry: Dict) -> float:
+        """1-10 score from the on-time ratio, less half a point per overdue transaction"""
+        overdue_penalty = min(entry['overdue_count'] * 0.5, 3.0)
+        return max(1.0, min(10.0, (entry['on_time_ratio'] * 8) + 2 - overdue_penalty))
+
 class PaymentPlanService:
     """Advanced payment plan management"""
     
     @staticmethod
     @transaction.atomic
     def create_payment_plan(transaction_obj: LendingTransaction, plan_data: Dict) -> PaymentPlan:
-        """Create structured payment plan with installments"""
+        """Create structured payment plan with installments.
+        
+        Fixed plans repay installment_amount per installment without
+        interest; amortized plans repay the transaction's remaining amount
+        at its interest_rate and derive the installment amount.
+        """
+        amortization = plan_data.get('amortization') or 'none'
+        total_installments = int(plan_data['total_installments'])
+        if amortization == 'none':
+            installment_amount = Decimal(str(plan_data['installment_amount']))
+            principal = installment_amount * total_installments
+        else:
+            installment_amount = Decimal('0')
+            principal = transaction_obj.remaining_amount
+        
         payment_plan = PaymentPlan.objects.create(
             transaction=transaction_obj,
-            total_installments=plan_data['total_installments'],
-            installment_amount=plan_data['installment_amount'],
+            total_installments=total_installments,
+            installment_amount=installment_amount,
             frequency=plan_data['frequency'],
             start_date=plan_data['start_date'],
+            amortization=amortization,
+            principal=principal,
             auto_reminder=plan_data.get('auto_reminder', True)
         )
         
         PaymentPlanService._create_installments(payment_plan)
+        from .reminders import mark_reminders_stale
+        mark_reminders_stale(transaction_obj.user_id)
         return payment_plan
     
     @staticmethod
     def _create_installments(payment_plan: PaymentPlan):
         """Create individual installments"""
-        frequency_days = {
-            'weekly': 7, 'biweekly': 14, 'monthly': 30, 'quarterly': 90
-        }
-        
-        days_increment = frequency_days[payment_plan.frequency]
-        current_date = payment_plan.start_date
+        installments = PaymentPlanService._schedule(
+            payment_plan, payment_plan.principal, range(payment_plan.total_installments)
+        )
+        PaymentInstallment.objects.bulk_create(installments)
         
-        installments = []
-        for i in range(1, payment_plan.total_installments + 1):
-            installment = PaymentInstallment(
+        if payment_plan.amortization != 'none' and installments:
+            payment_plan.installment_amount = installments[0].amount
+            PaymentPlan.objects.filter(pk=payment_plan.pk).update(installment_amount=payment_plan.installment_amount)
+    
+    @staticmethod
+    def _schedule(payment_plan: PaymentPlan, balance: Decimal, periods) -> List[PaymentInstallment]:
+        """Unsaved installments repaying balance over the given zero-based periods"""
+        periods = list(periods)
+        rows = amortize(
+            balance, payment_plan.transaction.interest_rate, payment_plan.frequency,
+            len(periods), payment_plan.amortization
+        )
+        due_dates = installment_dates(payment_plan.start_date, payment_plan.frequency, periods)
+        return [
+            PaymentInstallment(
                 payment_plan=payment_plan,
-                installment_number=i,
-                due_date=current_date,
-                amount=payment_plan.installment_amount
+                installment_number=period + 1,
+                due_date=due_date,
+                amount=amount,
+                principal_amount=principal_amount,
+                interest_amount=interest_amount
             )
-            installments.append(installment)
-            current_date += timedelta(days=days_increment)
-        
-        PaymentInstallment.objects.bulk_create(installments)
+            for period, due_date, (amount, principal_amount, interest_amount) in zip(periods, due_dates, rows)
+        ]
+    
+    @staticmethod
+    def regenerate_remaining(payment_plan: PaymentPlan) -> int:
+        """Re-spread the outstanding principal over installments with no payment yet.
+        
+        Paid installments count the principal they actually repaid, so an
+        overpayment lowers the remaining installments. Installments it covers
+        completely drop to zero and are marked paid. Partly paid installments
+        keep their amounts. Due dates and ids are unchanged; the rest is
+        rewritten with one bulk_update.
+        """
+        installments = list(payment_plan.installments.all())
+        pending = [installment for installment in installments if not installment.is_paid and not installment.paid_amount]
+        if not pending:
+            return 0
+        
+        committed = sum(
+            (max(Decimal('0'), installment.paid_amount - installment.interest_amount) if installment.is_paid
+             else installment.principal_amount)
+            for installment in installments if installment.is_paid or installment.paid_amount
+        )
+        balance = max(Decimal('0'), payment_plan.principal - committed)
+        schedule = PaymentPlanService._schedule(
+            payment_plan, balance, [installment.installment_number - 1 for installment in pending]
+        )
+        today = timezone.now().date()
+        for installment, scheduled in zip(pending, schedule):
+            installment.amount = scheduled.amount
+            installment.principal_amount = scheduled.principal_amount
+            installment.interest_amount = scheduled.interest_amount
+            if not installment.amount:
+                installment.is_paid = True
+                installment.paid_date = today
+        PaymentInstallment.objects.bulk_update(
+            pending, ['amount', 'principal_amount', 'interest_amount', 'is_paid', 'paid_date']
+        )
+        return len(pending)
     
     @staticmethod
+    @transaction.atomic
     def record_installment_payment(installment: PaymentInstallment, amount: Decimal) -> Dict:
         """Record payment for installment"""
         installment.paid_amount += amount
@@ -466,6 +623,9 @@ class PaymentPlanService:
         
         installment.save()
         
+        if installment.is_paid:
+            PaymentPlanService.regenerate_remaining(installment.payment_plan)
+        
         # Update main transaction
         transaction_obj = installment.payment_plan.transaction
         transaction_obj.amount_paid += amount
@@ -481,7 +641,7 @@ class PaymentPlanService:
         
         return {
             'installment_paid': installment.is_paid,
-            'remaining_amount': float(installment.amount - installment.paid_amount),
+            'remaining_amount': float(max(Decimal('0'), installment.amount - installment.paid_amount)),
             'transaction_status': transaction_obj.status
         }
 
@@ -521,47 +681,31 @@ class NotificationService:
     
     @staticmethod
     def get_pending_notifications(user) -> List[Dict]:
-        """Get all pending notifications"""
-        notifications = []
-        today = timezone.now().date()
+        """Today's in-app reminders for items that are still open, with live remaining amounts.
         
-        # Due date approaching
-        upcoming = LendingTransaction.objects.filter(
-            user=user,
-            status='active',
-            due_date__lte=today + timedelta(days=7),
-            due_date__gte=today
-        )
+        Reminders are dispatched for the user first if the batch job has not
+        run today or their loans changed since; re-dispatching is idempotent.
+        """
+        from .reminders import ReminderDispatcher, ensure_dispatched
         
-        for transaction in upcoming:
-            days_until = (transaction.due_date - today).days
-            notifications.append({
-                'type': 'due_approaching',
-                'transaction_id': transaction.lending_id,
-                'person_name': transaction.person_name,
-                'amount': float(transaction.remaining_amount),
-                'days_until_due': days_until,
-                'priority': 'high' if days_until <= 2 else 'medium'
-            })
-        
-        # Overdue transactions
-        overdue = LendingTransaction.objects.filter(
+        today = timezone.now().date()
+        ensure_dispatched(user, today)
+        rows = PaymentReminder.objects.filter(
+            Q(installment__isnull=True) | Q(installment__is_paid=False),
             user=user,
-            status='active',
-            due_date__lt=today
+            reminder_day=today,
+            reminder_type='notification',
+            transaction__status__in=ReminderDispatcher.OPEN_STATUSES
+        ).order_by('id').values_list(
+            'payload', 'transaction__amount', 'transaction__amount_paid',
+            'installment__amount', 'installment__paid_amount'
         )
         
-        for transaction in overdue:
-            days_overdue = (today - transaction.due_date).days
-            notifications.append({
-                'type': 'overdue',
-                'transaction_id': transaction.lending_id,
-                'person_name': transaction.person_name,
-                'amount': float(transaction.remaining_amount),
-                'days_overdue': days_overdue,
-                'priority': 'urgent' if days_overdue > 7 else 'high'
-            })
-        
+        notifications = []
+        for payload, amount, amount_paid, installment_amount, installment_paid in rows:
+            if installment_amount is not None:
+                amount, amount_paid = installment_amount, installment_paid
+            notifications.append(dict(payload, amount=float(amount - amount_paid)))
         return notifications
     
     @staticmethod
@@ -619,14 +763,10 @@ class RiskAssessmentService:
     @staticmethod
     def _assess_person_risk(transaction_obj: LendingTransaction) -> float:
         """Assess risk based on person's history"""
-        try:
-            contact = ContactProfile.objects.get(
-                user=transaction_obj.user,
-                name=transaction_obj.person_name
-            )
-            return (10 - contact.reliability_score) * 10
-        except ContactProfile.DoesNotExist:
+        contact = transaction_obj.contact
+        if contact is None:
             return 60
+        return (10 - contact.reliability_score) * 10
     
     @staticmethod
     def _assess_duration_risk(transaction_obj: LendingTransaction) -> float:
@@ -681,34 +821,96 @@ class RiskAssessmentService:
 class AdvancedAnalyticsService:
     """Advanced analytics and forecasting"""
     
+    OPEN_STATUSES = ['active', 'partial', 'overdue']
+    MAX_FORECAST_MONTHS = 60
+    
     @staticmethod
     def get_cash_flow_forecast(user, months: int = 6) -> List[Dict]:
-        """Generate cash flow forecast"""
-        today = timezone.now().date()
-        forecast = []
+        """Expected inflows and outflows per calendar month.
+        
+        Open transactions without a payment plan are due in full on their
+        due date, plus the interest accrued by then; plan-backed ones are due
+        per unpaid installment. Each source is one query grouped by month
+        and transaction type, so the cost does not grow with the horizon.
+        Amounts already overdue are counted in the first month.
+        """
+        months = max(1, min(int(months), AdvancedAnalyticsService.MAX_FORECAST_MONTHS))
+        first_month = timezone.now().date().replace(day=1)
+        month_starts = [add_months(first_month, offset) for offset in range(months)]
+        horizon_end = add_months(first_month, months) - timedelta(days=1)
+        
+        buckets = {
+            month_start: {
+                'inflow': Decimal('0'), 'outflow': Decimal('0'),
+                'interest_inflow': Decimal('0'), 'interest_outflow': Decimal('0'),
+                'transaction_count': 0, 'installment_count': 0,
+            }
+            for month_start in month_starts
+        }
         
-        for i in range(months):
-            month_start = today.replace(day=1) + timedelta(days=32*i)
-            month_start = month_start.replace(day=1)
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            
-            expected_inflow = LendingTransaction.objects.filter(
-                user=user,
-                transaction_type='lend',
-                status__in=['active', 'partial'],
-                due_date__range=[month_start, month_end]
-            ).aggregate(total=Sum('amount'))['total'] or 0
-            
-            transaction_count = LendingTransaction.objects.filter(
-                user=user,
-                status__in=['active', 'partial'],
-                due_date__range=[month_start, month_end]
-            ).count()
-            
+        def bucket(day):
+            return buckets[max(first_month, day.replace(day=1))]
+        
+        unplanned = LendingTransaction.objects.filter(
+            user=user,
+            status__in=AdvancedAnalyticsService.OPEN_STATUSES,
+            payment_plan__isnull=True,
+            due_date__lte=horizon_end
+        ).order_by()
+        for row in unplanned.annotate(month=TruncMonth('due_date')).values('month', 'transaction_type').annotate(
+            outstanding=Sum(F('amount') - F('amount_paid')),
+            count=Count('lending_id')
+        ):
+            entry = bucket(row['month'])
+            entry['inflow' if row['transaction_type'] == 'lend' else 'outflow'] += row['outstanding'] or 0
+            entry['transaction_count'] += row['count']
+        
+        # Interest depends on each loan's rate, type and term, so only the
+        # interest-bearing rows are read and accrued up to their due date
+        for kind, amount, rate, interest_type, start, due in unplanned.filter(interest_rate__gt=0).values_list(
+            'transaction_type', 'amount', 'interest_rate', 'interest_type', 'transaction_date', 'due_date'
+        ):
+            interest = Decimal(str(round(accrued_interest(amount, rate, interest_type, (due - start).days), 2)))
+            bucket(due)['interest_inflow' if kind == 'lend' else 'interest_outflow'] += interest
+        
+        installments = PaymentInstallment.objects.filter(
+            payment_plan__transaction__user=user,
+            payment_plan__transaction__status__in=AdvancedAnalyticsService.OPEN_STATUSES,
+            is_paid=False,
+            due_date__lte=horizon_end
+        ).order_by()
+        for row in installments.annotate(month=TruncMonth('due_date')).values(
+            'month', 'payment_plan__transaction__transaction_type'
+        ).annotate(
+            outstanding=Sum(F('amount') - F('paid_amount')),
+            interest=Sum('interest_amount'),
+            count=Count('id')
+        ):
+            entry = bucket(row['month'])
+            lend = row['payment_plan__transaction__transaction_type'] == 'lend'
+            interest = row['interest'] or 0
+            entry['inflow' if lend else 'outflow'] += (row['outstanding'] or 0) - interest
+            entry['interest_inflow' if lend else 'interest_outflow'] += interest
+            entry['installment_count'] += row['count']
+        
+        forecast = []
+        running_balance = Decimal('0')
+        for month_start in month_starts:
+            entry = buckets[month_start]
+            inflow = entry['inflow'] + entry['interest_inflow']
+            outflow = entry['outflow'] + entry['interest_outflow']
+            running_balance += inflow - outflow
             forecast.append({
                 'month': month_start.strftime('%b %Y'),
-                'expected_inflow': float(expected_inflow),
-                'transaction_count': transaction_count
+                'month_start': month_start.isoformat(),
+                'expected_inflow': float(inflow),
+                'expected_outflow': float(outflow),
+                'interest_inflow': float(entry['interest_inflow']),
+                'interest_outflow': float(entry['interest_outflow']),
+                'net_flow': float(inflow - outflow),
+                'running_balance': float(running_balance),
+                'transaction_count': entry['transaction_count'],
+                'installment_count': entry['installment_count']
             })
         
         return forecast
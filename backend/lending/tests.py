@@ -1,3 +1,600 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from django.apps import apps
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from .contacts import ContactMatcher, normalize_name, similarity
+from .schedule import add_months, amortize, installment_dates
+
+# The model tests need the app's tables, see mysphere_core/test_settings.py
+requires_lending = skipUnless(apps.is_installed('lending'), 'lending is not in INSTALLED_APPS')
+
+
+class ScheduleTests(SimpleTestCase):
+
+    def test_month_end_due_dates_are_clamped_not_chained(self):
+        self.assertEqual(
+            installment_dates(date(2024, 1, 31), 'monthly', range(4)),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+        self.assertEqual(add_months(date(2023, 1, 31), 1), date(2023, 2, 28))
+        self.assertEqual(add_months(date(2023, 11, 30), 3), date(2024, 2, 29))
+        self.assertEqual(
+            installment_dates(date(2024, 11, 30), 'quarterly', [1, 2]),
+            [date(2025, 2, 28), date(2025, 5, 30)],
+        )
+        self.assertEqual(
+            installment_dates(date(2024, 1, 1), 'biweekly', [0, 1, 2]),
+            [date(2024, 1, 1), date(2024, 1, 15), date(2024, 1, 29)],
+        )
+
+    def test_annuity_is_level_and_repays_the_principal(self):
+        rows = amortize(Decimal('1200.00'), Decimal('12'), 'monthly', 12, 'annuity')
+
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[0], (Decimal('106.62'), Decimal('94.62'), Decimal('12.00')))
+        self.assertEqual(sum(part for _, part, _ in rows), Decimal('1200.00'))
+        for amount, part, charge in rows:
+            self.assertEqual(amount, part + charge)
+        # Only the last installment absorbs rounding
+        self.assertEqual({amount for amount, _, _ in rows[:-1]}, {Decimal('106.62')})
+        self.assertLessEqual(abs(rows[-1][0] - rows[0][0]), Decimal('0.05'))
+        interest = [charge for _, _, charge in rows]
+        self.assertEqual(interest, sorted(interest, reverse=True))
+
+    def test_equal_principal_and_interest_free_schedules(self):
+        rows = amortize(Decimal('1200.00'), Decimal('12'), 'monthly', 12, 'equal_principal')
+        self.assertEqual({part for _, part, _ in rows}, {Decimal('100.00')})
+        self.assertEqual([charge for _, _, charge in rows[:3]], [Decimal('12.00'), Decimal('11.00'), Decimal('10.00')])
+
+        rows = amortize(Decimal('100.00'), Decimal('12'), 'monthly', 3, 'none')
+        self.assertEqual([amount for amount, _, _ in rows], [Decimal('33.33'), Decimal('33.33'), Decimal('33.34')])
+        self.assertEqual({charge for _, _, charge in rows}, {Decimal('0.00')})
+
+        self.assertEqual(amortize(Decimal('100.00'), 0, 'monthly', 0), [])
+
+
+class ContactMatchingTests(SimpleTestCase):
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("  José  O'Brien-Smith "), 'jose o brien smith')
+        self.assertEqual(normalize_name('RAHUL   s.'), 'rahul s')
+        self.assertEqual(normalize_name(None), '')
+
+    def test_similarity(self):
+        self.assertEqual(similarity('rahul s', 'rahul s'), 1.0)
+        self.assertEqual(similarity('rahul k', 'rahul s'), 0.6)
+        self.assertEqual(similarity('', 'rahul'), 0.0)
+        self.assertLess(similarity('asha verma', 'rahul s'), 0.2)
+
+    def test_matcher_links_exact_names_and_only_suggests_near_ones(self):
+        matcher = ContactMatcher([(1, 'Rahul S'), (2, 'Asha Verma')])
+
+        self.assertEqual(matcher.match('  rahul   S.'), 1)
+        self.assertIsNone(matcher.match('Rahul K'))
+        self.assertIsNone(matcher.match(''))
+        self.assertEqual(matcher.suggest('Rahul K'), [(1, 0.6)])
+        # The exact match is linked, not suggested
+        self.assertEqual(matcher.suggest('Rahul S'), [])
+
+
+@requires_lending
+class PaymentPlanTests(TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from .models import LendingTransaction
+
+        self.user = User.objects.create_user(username='planner', password='testpassword')
+        self.transaction = LendingTransaction.objects.create(
+            user=self.user, transaction_type='lend', person_name='Asha',
+            amount=Decimal('1200.00'), interest_rate=Decimal('12'),
+        )
+
+    def test_overpaid_installment_lowers_the_remaining_ones(self):
+        from .services import PaymentPlanService
+
+        plan = PaymentPlanService.create_payment_plan(self.transaction, {
+            'total_installments': 12, 'frequency': 'monthly',
+            'start_date': date(2024, 1, 31), 'amortization': 'annuity',
+        })
+        first, second = plan.installments.order_by('installment_number')[:2]
+        self.assertEqual(first.amount, Decimal('106.62'))
+
+        PaymentPlanService.record_installment_payment(first, Decimal('300.00'))
+
+        pending = list(plan.installments.filter(is_paid=False).order_by('installment_number'))
+        self.assertEqual(len(pending), 11)
+        # 300 paid less 12.00 interest leaves 912.00 of principal to spread
+        self.assertEqual(sum(installment.principal_amount for installment in pending), Decimal('912.00'))
+        self.assertLess(pending[0].amount, second.amount)
+        self.assertEqual(pending[0].due_date, date(2024, 2, 29))
+
+    def test_partly_paid_installment_keeps_its_amount(self):
+        from .services import PaymentPlanService
+
+        plan = PaymentPlanService.create_payment_plan(self.transaction, {
+            'total_installments': 4, 'installment_amount': '100.00',
+            'frequency': 'monthly', 'start_date': date(2024, 1, 1),
+        })
+        first, second = plan.installments.order_by('installment_number')[:2]
+        PaymentPlanService.record_installment_payment(second, Decimal('40.00'))
+        PaymentPlanService.record_installment_payment(first, Decimal('100.00'))
+
+        second.refresh_from_db()
+        self.assertEqual(second.amount, Decimal('100.00'))
+        remaining = plan.installments.filter(is_paid=False, paid_amount=0)
+        self.assertEqual(sorted(installment.amount for installment in remaining), [Decimal('100.00')] * 2)
+
+    def test_overpayment_that_clears_the_plan_completes_it(self):
+        from .services import PaymentPlanService
+
+        self.transaction.amount = Decimal('300.00')
+        self.transaction.save()
+        plan = PaymentPlanService.create_payment_plan(self.transaction, {
+            'total_installments': 3, 'installment_amount': '100.00',
+            'frequency': 'monthly', 'start_date': date(2024, 1, 1),
+        })
+        first = plan.installments.get(installment_number=1)
+
+        result = PaymentPlanService.record_installment_payment(first, Decimal('300.00'))
+
+        self.assertEqual(result, {'installment_paid': True, 'remaining_amount': 0.0, 'transaction_status': 'completed'})
+        self.assertFalse(plan.installments.filter(is_paid=False).exists())
+        self.assertEqual(
+            list(plan.installments.order_by('installment_number').values_list('amount', flat=True)),
+            [Decimal('100.00'), Decimal('0.00'), Decimal('0.00')],
+        )
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, 'completed')
+        self.assertEqual(self.transaction.remaining_amount, Decimal('0'))
+
+    def test_overpaying_the_transaction_leaves_nothing_remaining(self):
+        from .services import PaymentPlanService
+
+        plan = PaymentPlanService.create_payment_plan(self.transaction, {
+            'total_installments': 2, 'installment_amount': '600.00',
+            'frequency': 'monthly', 'start_date': date(2024, 1, 1),
+        })
+        PaymentPlanService.record_installment_payment(plan.installments.get(installment_number=1), Decimal('1500.00'))
+
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, 'completed')
+        self.assertEqual(self.transaction.remaining_amount, Decimal('0'))
+
+
+@requires_lending
+class LendingAggregatesTests(TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from .models import LendingTransaction
+
+        self.user = User.objects.create_user(username='aggregates', password='testpassword')
+        other = User.objects.create_user(username='other', password='testpassword')
+        self.today = date(2024, 6, 15)
+        for person, kind, amount, due, state in [
+            ('Asha', 'lend', '500.00', date(2024, 6, 1), 'active'),
+            ('Asha', 'lend', '100.00', date(2024, 7, 1), 'active'),
+            ('Asha', 'borrow', '50.00', None, 'completed'),
+            ('Ravi', 'borrow', '300.00', date(2024, 8, 1), 'active'),
+        ]:
+            LendingTransaction.objects.create(
+                user=self.user, transaction_type=kind, person_name=person,
+                amount=Decimal(amount), due_date=due, status=state,
+            )
+        LendingTransaction.objects.create(user=other, transaction_type='lend', person_name='Asha', amount=Decimal('999'))
+
+    def test_totals_and_people_come_from_one_query(self):
+        from .services import LendingAggregates
+
+        aggregates = LendingAggregates(self.user, today=self.today)
+        with self.assertNumQueries(1):
+            people = aggregates.people
+            totals = aggregates.totals
+            active_people = aggregates.active_people
+
+        self.assertEqual([row['person_name'] for row in people], ['Asha', 'Ravi'])
+        asha = people[0]
+        self.assertEqual(asha['total_transactions'], 3)
+        self.assertEqual(asha['active_lends'], 2)
+        self.assertEqual(asha['overdue_count'], 1)
+        self.assertEqual(asha['overdue_amount'], Decimal('500.00'))
+        self.assertEqual(asha['total_borrowed'], Decimal('0'))
+
+        self.assertEqual(totals['total_transactions'], 4)
+        self.assertEqual(totals['completed_count'], 1)
+        self.assertEqual(totals['total_lent'], Decimal('600.00'))
+        self.assertEqual(totals['total_borrowed'], Decimal('300.00'))
+        self.assertEqual(totals['active_amount'], Decimal('900.00'))
+        self.assertEqual(totals['period_count'], 0)
+        self.assertEqual(len(active_people), 2)
+
+
+@requires_lending
+class LoanPortfolioTests(TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.utils import timezone
+        from .models import LendingTransaction
+
+        self.user = User.objects.create_user(username='portfolio', password='testpassword')
+        self.today = date(2024, 6, 15)
+        for person, kind, amount, paid, rate, interest, started, state, completed in [
+            ('Asha', 'lend', '1000.00', '200.00', '10', 'simple', self.today - timedelta(days=365), 'active', None),
+            ('Ravi', 'borrow', '500.00', '0', '4', 'flat', self.today - timedelta(days=10), 'active', None),
+            ('Mina', 'lend', '200.00', '200.00', '10', 'compound', self.today - timedelta(days=730), 'completed',
+             self.today - timedelta(days=365)),
+            ('asha ', 'lend', '100.00', '0', '0', 'simple', self.today - timedelta(days=5), 'active', None),
+        ]:
+            LendingTransaction.objects.create(
+                user=self.user, transaction_type=kind, person_name=person, amount=Decimal(amount),
+                amount_paid=Decimal(paid), interest_rate=Decimal(rate), interest_type=interest,
+                transaction_date=started, status=state,
+                date_completed=timezone.make_aware(datetime.combine(completed, time(12))) if completed else None,
+            )
+
+    def test_balances_come_from_one_query(self):
+        from .interest import LoanPortfolio
+
+        with self.assertNumQueries(1):
+            portfolio = LoanPortfolio(self.user, today=self.today)
+        self.assertEqual(portfolio.size, 4)
+
+        self.assertEqual(portfolio.balances(), {
+            'accrued_interest': 120.0,
+            # Interest on the completed loan stops at its completion date
+            'realized_interest': 20.0,
+            'outstanding_receivable': 1000.0,
+            'outstanding_payable': 520.0,
+        })
+
+    def test_trends_and_collection_stats(self):
+        from .interest import LoanPortfolio
+
+        portfolio = LoanPortfolio(self.user, today=self.today)
+
+        self.assertEqual(portfolio.trends(self.today - timedelta(days=29)), {
+            'volume_trend': 100.0, 'active_trend': 100.0, 'collection_trend': 0.0,
+        })
+        self.assertEqual(portfolio.trends(self.today - timedelta(days=9)), {
+            'volume_trend': -80.0, 'active_trend': 0.0, 'collection_trend': 0.0,
+        })
+        self.assertEqual(portfolio.collection_stats(), {
+            'average_days_to_collect': 365.0, 'repeat_borrowers': 50.0,
+        })
+
+    def test_empty_portfolio(self):
+        from django.contrib.auth.models import User
+        from .interest import LoanPortfolio
+
+        portfolio = LoanPortfolio(User.objects.create_user(username='empty', password='testpassword'))
+
+        self.assertEqual(portfolio.size, 0)
+        self.assertEqual(set(portfolio.balances().values()), {0.0})
+        self.assertEqual(portfolio.collection_stats(), {'average_days_to_collect': 0, 'repeat_borrowers': 0})
+
+
+@requires_lending
+class CashFlowForecastTests(TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.utils import timezone
+        from .models import LendingTransaction
+        from .services import PaymentPlanService
+
+        self.user = User.objects.create_user(username='forecast', password='testpassword')
+        self.month = timezone.now().date().replace(day=1)
+        LendingTransaction.objects.create(
+            user=self.user, transaction_type='lend', person_name='Asha',
+            amount=Decimal('200.00'), amount_paid=Decimal('50.00'), due_date=self.month - timedelta(days=10),
+        )
+        LendingTransaction.objects.create(
+            user=self.user, transaction_type='borrow', person_name='Ravi',
+            amount=Decimal('80.00'), due_date=add_months(self.month, 1),
+        )
+        LendingTransaction.objects.create(
+            user=self.user, transaction_type='lend', person_name='Closed',
+            amount=Decimal('500.00'), due_date=self.month, status='completed',
+        )
+        planned = LendingTransaction.objects.create(
+            user=self.user, transaction_type='lend', person_name='Mina', amount=Decimal('300.00'),
+        )
+        self.plan = PaymentPlanService.create_payment_plan(planned, {
+            'total_installments': 3, 'installment_amount': '100.00',
+            'frequency': 'monthly', 'start_date': self.month,
+        })
+
+    def test_query_count_does_not_grow_with_the_horizon(self):
+        from .services import AdvancedAnalyticsService
+
+        with self.assertNumQueries(3):
+            short = AdvancedAnalyticsService.get_cash_flow_forecast(self.user, 3)
+        with self.assertNumQueries(3):
+            long = AdvancedAnalyticsService.get_cash_flow_forecast(self.user, 36)
+        self.assertEqual(len(short), 3)
+        self.assertEqual(len(long), 36)
+        self.assertEqual(long[:3], short)
+
+    def test_months_are_bucketed_with_overdue_amounts_first(self):
+        from .services import AdvancedAnalyticsService
+
+        forecast = AdvancedAnalyticsService.get_cash_flow_forecast(self.user, 4)
+
+        self.assertEqual(forecast[0]['month_start'], self.month.isoformat())
+        self.assertEqual(forecast[0]['expected_inflow'], 250.0)
+        self.assertEqual(forecast[0]['transaction_count'], 1)
+        self.assertEqual(forecast[0]['installment_count'], 1)
+        self.assertEqual(forecast[1]['expected_inflow'], 100.0)
+        self.assertEqual(forecast[1]['expected_outflow'], 80.0)
+        self.assertEqual(forecast[2]['net_flow'], 100.0)
+        self.assertEqual(forecast[3]['net_flow'], 0.0)
+        self.assertEqual(forecast[3]['running_balance'], 370.0)
+
+    def test_installments_settled_by_an_overpayment_drop_out(self):
+        from .services import AdvancedAnalyticsService, PaymentPlanService
+
+        first = self.plan.installments.get(installment_number=1)
+        PaymentPlanService.record_installment_payment(first, Decimal('300.00'))
+
+        forecast = AdvancedAnalyticsService.get_cash_flow_forecast(self.user, 3)
+        self.assertEqual([month['expected_inflow'] for month in forecast], [150.0, 0.0, 0.0])
+        self.assertEqual(forecast[0]['installment_count'], 0)
+
+
+@requires_lending
+class ReminderDispatcherTests(TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        from django.utils import timezone
+        from .models import LendingTransaction
+        from .reminders import DISPATCHED_KEY
+
+        self.user = User.objects.create_user(username='reminders', password='testpassword')
+        # User ids are reused between tests, so drop any dispatch marker left behind
+        cache.delete(DISPATCHED_KEY.format(user_id=self.user.id))
+        self.addCleanup(cache.delete, DISPATCHED_KEY.format(user_id=self.user.id))
+        self.today = timezone.now().date()
+        self.overdue = LendingTransaction.objects.create(
+            user=self.user, transaction_type='lend', person_name='Asha',
+            amount=Decimal('200.00'), due_date=self.today - timedelta(days=3),
+        )
+        self.upcoming = LendingTransaction.objects.create(
+            user=self.user, transaction_type='borrow', person_name='Ravi',
+            amount=Decimal('80.00'), due_date=self.today + timedelta(days=2),
+        )
+        LendingTransaction.objects.create(
+            user=self.user, transaction_type='lend', person_name='Later',
+            amount=Decimal('10.00'), due_date=self.today + timedelta(days=30),
+        )
+
+    def test_dispatching_twice_a_day_writes_nothing_new(self):
+        from .models import PaymentReminder
+        from .reminders import ReminderDispatcher
+
+        self.assertEqual(ReminderDispatcher().dispatch(today=self.today), 2)
+        self.assertEqual(ReminderDispatcher().dispatch(today=self.today, chunk_size=1), 0)
+        self.assertEqual(
+            set(PaymentReminder.objects.values_list('kind', flat=True)), {'overdue', 'due_approaching'}
+        )
+        # A new day is a new reminder
+        self.assertEqual(ReminderDispatcher().dispatch(today=self.today + timedelta(days=1)), 2)
+
+    def test_rules_add_their_channels_and_messages(self):
+        from .models import NotificationRule, PaymentReminder
+        from .reminders import ReminderDispatcher
+
+        NotificationRule.objects.create(
+            user=self.user, name='Late', trigger_event='payment_overdue',
+            notification_methods=['email', 'in_app'], message_template='{person_name} is {days_overdue} days late',
+        )
+
+        self.assertEqual(ReminderDispatcher().dispatch(today=self.today, user=self.user), 3)
+        overdue = PaymentReminder.objects.filter(transaction=self.overdue)
+        self.assertEqual(sorted(overdue.values_list('reminder_type', flat=True)), ['email', 'notification'])
+        self.assertEqual(overdue.get(reminder_type='notification').message, 'Asha is 3 days late')
+        self.assertEqual(ReminderDispatcher().dispatch(today=self.today, user=self.user), 0)
+
+    def test_pending_notifications_follow_changes_made_the_same_day(self):
+        from .services import NotificationService
+
+        self.assertEqual(len(NotificationService.get_pending_notifications(self.user)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.overdue.amount_paid = Decimal('150.00')
+            self.overdue.save()
+            self.upcoming.status = 'completed'
+            self.upcoming.save()
+        notifications = NotificationService.get_pending_notifications(self.user)
+        self.assertEqual([(row['person_name'], row['amount']) for row in notifications], [('Asha', 50.0)])
+
+    def test_due_date_changes_supersede_the_days_reminders(self):
+        from .models import PaymentReminder
+        from .services import NotificationService
+
+        NotificationService.get_pending_notifications(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.overdue.due_date = self.today + timedelta(days=1)
+            self.overdue.save()
+            self.upcoming.due_date = self.today + timedelta(days=5)
+            self.upcoming.save()
+        notifications = NotificationService.get_pending_notifications(self.user)
+
+        self.assertEqual(
+            sorted((row['person_name'], row['type'], row['days_until_due']) for row in notifications),
+            [('Asha', 'due_approaching', 1), ('Ravi', 'due_approaching', 5)],
+        )
+        self.assertFalse(PaymentReminder.objects.filter(kind='overdue').exists())
+
+        # Moved past the lookahead, the loan has nothing to remind about today
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upcoming.due_date = self.today + timedelta(days=20)
+            self.upcoming.save()
+        notifications = NotificationService.get_pending_notifications(self.user)
+        self.assertEqual([row['person_name'] for row in notifications], ['Asha'])
+
+    def test_sent_reminders_are_kept(self):
+        from .models import PaymentReminder
+        from .reminders import ReminderDispatcher
+
+        ReminderDispatcher().dispatch(today=self.today, user=self.user)
+        PaymentReminder.objects.filter(transaction=self.overdue).update(is_sent=True)
+        self.overdue.due_date = self.today + timedelta(days=1)
+        self.overdue.save()
+
+        ReminderDispatcher().dispatch(today=self.today, user=self.user)
+        self.assertEqual(
+            sorted(PaymentReminder.objects.filter(transaction=self.overdue).values_list('kind', flat=True)),
+            ['due_approaching', 'overdue'],
+        )
+
+
+@requires_lending
+class ContactLedgerTests(TestCase):
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+        from django.utils import timezone
+        from .models import ContactProfile, LendingTransaction
+
+        self.user = User.objects.create_user(username='ledger', password='testpassword')
+        self.asha = ContactProfile.objects.create(user=self.user, name='Asha')
+        self.ravi = ContactProfile.objects.create(user=self.user, name='Ravi')
+        self.nobody = ContactProfile.objects.create(user=self.user, name='Nobody')
+        start = date(2024, 6, 1)
+
+        def completed_on(day):
+            return timezone.make_aware(datetime.combine(day, time(12)))
+
+        for person, kind, amount, offset, state, due, completed in [
+            ('Asha', 'lend', '100.00', 0, 'completed', start + timedelta(days=10), start + timedelta(days=5)),
+            ('Asha', 'lend', '50.00', 1, 'active', None, None),
+            ('Asha', 'borrow', '30.00', 2, 'overdue', start, None),
+            ('Asha', 'lend', '10.00', 3, 'active', None, None),
+            ('Asha', 'lend', '10.00', 4, 'partial', None, None),
+            ('Asha', 'lend', '10.00', 5, 'active', None, None),
+            ('Ravi', 'lend', '20.00', 0, 'completed', start, start + timedelta(days=3)),
+        ]:
+            LendingTransaction.objects.create(
+                user=self.user, transaction_type=kind, person_name=person, amount=Decimal(amount),
+                transaction_date=start + timedelta(days=offset), status=state, due_date=due,
+                date_completed=completed_on(completed) if completed else None,
+            )
+        other = User.objects.create_user(username='other', password='testpassword')
+        LendingTransaction.objects.create(
+            user=other, transaction_type='lend', person_name='Asha', amount=Decimal('999'), contact=self.asha,
+        )
+
+    def test_ledger_for_many_contacts_costs_two_queries(self):
+        from .services import ContactLedgerService
+
+        with self.assertNumQueries(2):
+            ledger = ContactLedgerService.build(self.user, [self.asha.id, self.ravi.id, self.nobody.id, self.asha.id])
+
+        self.assertEqual(set(ledger), {self.asha.id, self.ravi.id})
+        asha = ledger[self.asha.id]
+        self.assertEqual(asha['total_transactions'], 6)
+        self.assertEqual(asha['total_lent'], Decimal('180.00'))
+        self.assertEqual(asha['total_borrowed'], Decimal('30.00'))
+        self.assertEqual(asha['pending_amount'], Decimal('110.00'))
+        self.assertEqual(asha['completed_on_time'], 1)
+        self.assertEqual(asha['overdue_count'], 1)
+        self.assertEqual(
+            [row['amount'] for row in asha['recent_transactions']],
+            [Decimal('10.00'), Decimal('10.00'), Decimal('10.00'), Decimal('30.00'), Decimal('50.00')],
+        )
+
+        ravi = ledger[self.ravi.id]
+        self.assertEqual((ravi['completed_on_time'], ravi['on_time_ratio']), (0, 0.0))
+        self.assertEqual(ravi['total_borrowed'], Decimal('0'))
+        self.assertEqual(ContactLedgerService.build(self.user, []), {})
+
+    def test_history_and_reliability_read_the_ledger(self):
+        from .services import ContactLedgerService, ContactManagementService
+
+        history = ContactManagementService.get_contact_history(self.asha)
+        self.assertEqual(history['pending_amount'], 110.0)
+        self.assertAlmostEqual(history['on_time_ratio'], 1 / 6)
+        self.assertEqual(ContactManagementService.get_contact_history(self.nobody)['total_transactions'], 0)
+
+        entry = ContactLedgerService.build(self.user, [self.asha.id])[self.asha.id]
+        self.assertAlmostEqual(ContactLedgerService.reliability(entry), 8 / 6 + 2 - 0.5)
+        self.assertEqual(ContactManagementService.calculate_reliability_score(self.nobody), 5.0)
+
+    def test_contact_listing_query_count_does_not_grow_with_contacts(self):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from .models import ContactProfile
+        from .views import ContactProfileViewSet
+
+        view = ContactProfileViewSet.as_view({'get': 'list'})
+
+        def list_contacts():
+            request = APIRequestFactory().get('/contacts/')
+            force_authenticate(request, user=self.user)
+            return view(request)
+
+        with self.assertNumQueries(3):
+            response = list_contacts()
+        self.assertEqual(response.status_code, 200)
+        histories = {row['name']: row['lending_history'] for row in response.data}
+        self.assertEqual(histories['Asha']['total_transactions'], 6)
+        self.assertEqual(histories['Nobody']['total_transactions'], 0)
+
+        for index in range(5):
+            ContactProfile.objects.create(user=self.user, name=f'Friend {index}')
+        with self.assertNumQueries(3):
+            self.assertEqual(len(list_contacts().data), 8)
+
+
+@requires_lending
+class ContactLinkTests(TestCase):
+
+    def test_rename_relinks_to_the_exact_contact_only(self):
+        from django.contrib.auth.models import User
+        from .models import ContactProfile, LendingTransaction
+
+        user = User.objects.create_user(username='contacts', password='testpassword')
+        rahul = ContactProfile.objects.create(user=user, name='Rahul S')
+        asha = ContactProfile.objects.create(user=user, name='Asha Verma')
+
+        transaction = LendingTransaction.objects.create(
+            user=user, transaction_type='lend', person_name='Rahul K', amount=Decimal('10.00'),
+        )
+        self.assertIsNone(transaction.contact_id)
+        self.assertEqual(ContactProfile.suggest(user.id, 'Rahul K')[0]['id'], rahul.id)
+
+        transaction.person_name = 'asha verma'
+        transaction.save(update_fields=['person_name'])
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.contact_id, asha.id)
+
+    def test_rename_through_a_deferred_name_still_relinks(self):
+        from django.contrib.auth.models import User
+        from .models import ContactProfile, LendingTransaction
+
+        user = User.objects.create_user(username='deferred', password='testpassword')
+        asha = ContactProfile.objects.create(user=user, name='Asha Verma')
+        created = LendingTransaction.objects.create(
+            user=user, transaction_type='lend', person_name='Rahul S', amount=Decimal('10.00'),
+        )
+
+        unchanged = LendingTransaction.objects.defer('person_name').get(pk=created.pk)
+        unchanged.notes = 'Lunch'
+        with CaptureQueriesContext(connection) as queries:
+            unchanged.save(update_fields=['notes'])
+        # The name was never loaded or set, so the contact is not resolved again
+        self.assertFalse(any('lending_contactprofile' in query['sql'] for query in queries))
+
+        renamed = LendingTransaction.objects.defer('person_name').get(pk=created.pk)
+        renamed.person_name = 'Asha Verma'
+        renamed.save()
+        created.refresh_from_db()
+        self.assertEqual(created.contact_id, asha.id)
@@ -274,18 +274,24 @@ class LendingValidator:
             installments = int(data.get('total_installments', 0))
             if installments < 2:
                 errors['total_installments'] = 'Must have at least 2 installments'
-            elif installments > 60:
-                errors['total_installments'] = 'Cannot exceed 60 installments'
+            elif installments > 360:
+                errors['total_installments'] = 'Cannot exceed 360 installments'
         except (ValueError, TypeError):
             errors['total_installments'] = 'Invalid installments count'
         
+        # Amortized plans derive the installment amount from the transaction
+        amortization = data.get('amortization') or 'none'
+        if amortization not in ['none', 'equal_principal', 'annuity']:
+            errors['amortization'] = 'Invalid amortization method'
+        
         # Installment amount validation
-        try:
-            amount = Decimal(str(data.get('installment_amount', 0)))
-            if amount <= 0:
-                errors['installment_amount'] = 'Installment amount must be greater than 0'
-        except (InvalidOperation, ValueError):
-            errors['installment_amount'] = 'Invalid installment amount format'
+        if amortization == 'none':
+            try:
+                amount = Decimal(str(data.get('installment_amount', 0)))
+                if amount <= 0:
+                    errors['installment_amount'] = 'Installment amount must be greater than 0'
+            except (InvalidOperation, ValueError):
+                errors['installment_amount'] = 'Invalid installment amount format'
         
         # Frequency validation
         frequency = data.get('frequency')
@@ -28,7 +28,7 @@ from .serializers import (
     ContactProfileSerializer, PaymentPlanSerializer, TransactionTemplateSerializer,
     NotificationRuleSerializer
 )
-from .services import LendingService, LendingAnalyticsService
+from .services import LendingAggregates, LendingService, LendingAnalyticsService
 from .validators import LendingValidator
 from .ai_insights import get_lending_ai_insights
 
@@ -76,7 +76,9 @@ class LendingTransactionViewSet(viewsets.ModelViewSet):
     def summary(self, request):
         """Get summary statistics"""
         try:
-            summary_data = LendingService.get_summary_data(request.user)
+            summary_data = LendingService.get_summary_data(
+                request.user, LendingAggregates.for_request(request)
+            )
             return Response(summary_data, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Error getting summary for user {request.user.username}: {e}")
@@ -252,7 +254,9 @@ class LendingTransactionViewSet(viewsets.ModelViewSet):
     def risk_analysis(self, request):
         """Get overall risk analysis for all transactions"""
         try:
-            risk_data = LendingAnalyticsService.get_risk_analysis(request.user)
+            risk_data = LendingAnalyticsService.get_risk_analysis(
+                request.user, LendingAggregates.for_request(request)
+            )
             return Response(risk_data)
         except Exception as e:
             logger.error(f"Risk analysis failed: {e}")
@@ -277,11 +281,15 @@ class LendingTransactionViewSet(viewsets.ModelViewSet):
         """Create payment plan for transaction"""
         try:
             transaction = self.get_object()
+            plan_data = LendingValidator.validate_payment_plan(request.data.copy())
             from .services import PaymentPlanService
-            plan = PaymentPlanService.create_payment_plan(transaction, request.data)
+            plan = PaymentPlanService.create_payment_plan(transaction, plan_data)
             from .serializers import PaymentPlanSerializer
             serializer = PaymentPlanSerializer(plan)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
+        except ValidationError as e:
+            return Response({'errors': e.message_dict if hasattr(e, 'message_dict') else str(e)}, 
+                          status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Payment plan creation failed: {e}")
             return Response({'error': 'Failed to create payment plan'}, 
@@ -323,6 +331,40 @@ class ContactProfileViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    def list(self, request, *args, **kwargs):
+        from .services import ContactLedgerService
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        contacts = page if page is not None else list(queryset)
+        
+        context = self.get_serializer_context()
+        context['contact_ledger'] = ContactLedgerService.build(request.user, [contact.pk for contact in contacts])
+        serializer = self.get_serializer_class()(contacts, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def matches(self, request):
+        """Contact a person name links to, plus similar contacts it might mean"""
+        name = request.query_params.get('name', '')
+        return Response({
+            'contact_id': ContactProfile.resolve(request.user.id, name),
+            'suggestions': ContactProfile.suggest(request.user.id, name),
+        })
+    
+    @action(detail=True, methods=['post'])
+    def link_transactions(self, request, pk=None):
+        """Confirm a suggestion by linking the given transactions to this contact"""
+        contact = self.get_object()
+        transaction_ids = request.data.get('transaction_ids')
+        if not transaction_ids or not isinstance(transaction_ids, list):
+            return Response({'error': 'transaction_ids required'}, status=status.HTTP_400_BAD_REQUEST)
+        linked = LendingTransaction.objects.filter(
+            user=request.user, lending_id__in=transaction_ids
+        ).update(contact=contact)
+        return Response({'linked': linked})
+    
     @action(detail=True, methods=['post'])
     def update_reliability_score(self, request, pk=None):
         """Recalculate reliability score"""
@@ -430,13 +472,15 @@ class LendingDashboardView(APIView):
     def get(self, request):
         """Get dashboard data"""
         try:
-            summary = LendingService.get_summary_data(request.user)
+            # Summary and risk analysis share one aggregate query
+            aggregates = LendingAggregates.for_request(request)
+            summary = LendingService.get_summary_data(request.user, aggregates)
             recent_transactions = LendingService.get_user_transactions(request.user)[:10]
             transaction_serializer = LendingTransactionSerializer(recent_transactions, many=True)
             
             from .services import NotificationService, AdvancedAnalyticsService
             notifications = NotificationService.get_pending_notifications(request.user)
-            risk_analysis = LendingAnalyticsService.get_risk_analysis(request.user)
+            risk_analysis = LendingAnalyticsService.get_risk_analysis(request.user, aggregates)
             cash_flow = AdvancedAnalyticsService.get_cash_flow_forecast(request.user, 3)
             
             dashboard_data = {
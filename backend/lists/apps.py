@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ListsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lists'
+
+    def ready(self):
+        from .signals import connect_agenda_sources
+        connect_agenda_sources()
@@ -0,0 +1,145 @@
+# lists/cache.py
+
+import time
+from django.core.cache import cache
+
+
+def _version_key(user_id):
+    return f"list_data_version_{user_id}"
+
+
+def _agenda_version_key(user_id):
+    return f"agenda_data_version_{user_id}"
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed with a timestamp so an evicted counter never reuses old keys
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+
+
+def get_list_data_version(user_id):
+    """Current version of a user's list data, used to namespace cache keys."""
+    return _get_version(_version_key(user_id))
+
+
+def bump_list_data_version(user_id):
+    """Invalidate every cached result derived from a user's lists."""
+    _bump_version(_version_key(user_id))
+
+
+def get_agenda_version(user_id):
+    """Version of the non-list data (tasks, lending, subscriptions) in a user's agenda."""
+    return _get_version(_agenda_version_key(user_id))
+
+
+def bump_agenda_version(user_id):
+    """Invalidate cached agendas after a task, loan or subscription changes."""
+    _bump_version(_agenda_version_key(user_id))
+
+
+class ParsingContextSnapshot:
+    """Cached per-user, per-list-type context for AI item parsing.
+
+    Built from the database once and reused by add-items requests until a
+    list or item write retires it. Writes bump a per-user, per-list-type
+    version rather than patching the cached dict, so concurrent writes
+    cannot lose each other's updates, and a snapshot built from data read
+    before a write is stored under the old version, where no reader looks.
+    """
+
+    TIMEOUT = 60 * 60 * 24
+    MAX_QUANTITIES = 20
+    MAX_RECENT_LISTS = 4
+    RECENT_LIST_DAYS = 30
+
+    @staticmethod
+    def _version_key(user_id, list_type):
+        return f"list_parse_context_version_{user_id}_{list_type}"
+
+    @classmethod
+    def _key(cls, user_id, list_type):
+        version = _get_version(cls._version_key(user_id, list_type))
+        return f"list_parse_context_{user_id}_{list_type}_v{version}"
+
+    @classmethod
+    def get(cls, user_id, list_type):
+        key = cls._key(user_id, list_type)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = cls._build(user_id, list_type)
+            cache.set(key, snapshot, cls.TIMEOUT)
+        return snapshot
+
+    @classmethod
+    def _build(cls, user_id, list_type):
+        from datetime import timedelta
+        from django.db.models import Count
+        from django.utils import timezone
+        from .models import List, ListItem
+
+        items = ListItem.objects.filter(list__user_id=user_id, list__list_type=list_type)
+        category_counts = dict(
+            items.filter(category__isnull=False).values_list('category').annotate(
+                count=Count('id')
+            ).order_by()
+        )
+        quantities = list(dict.fromkeys(
+            items.filter(quantity__isnull=False).order_by('-created_at').values_list(
+                'quantity', flat=True
+            )[:cls.MAX_QUANTITIES * 3]
+        ))[:cls.MAX_QUANTITIES]
+        recent_lists = [
+            {'id': list_id, 'name': name, 'created_at': created_at.isoformat()}
+            for list_id, name, created_at in List.objects.filter(
+                user_id=user_id,
+                list_type=list_type,
+                created_at__gte=timezone.now() - timedelta(days=cls.RECENT_LIST_DAYS)
+            ).order_by('-created_at').values_list('id', 'name', 'created_at')[:cls.MAX_RECENT_LISTS]
+        ]
+        return {
+            'category_counts': category_counts,
+            'typical_quantities': quantities,
+            'recent_lists': recent_lists,
+        }
+
+    @classmethod
+    def invalidate(cls, user_id, list_types=None):
+        """Retire a user's snapshots for the given list types, or for all of them"""
+        if list_types is None:
+            from .models import List
+            list_types = [list_type for list_type, _ in List.LIST_TYPES]
+        for list_type in set(list_types):
+            _bump_version(cls._version_key(user_id, list_type))
+
+    @classmethod
+    def context_for(cls, list_obj, user_id):
+        """Parsing context (minus existing items) derived from the snapshot"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from django.utils.dateparse import parse_datetime
+
+        snapshot = cls.get(user_id, list_obj.list_type)
+        cutoff = timezone.now() - timedelta(days=cls.RECENT_LIST_DAYS)
+        recent_lists = [
+            entry['name'] for entry in snapshot['recent_lists']
+            if entry['id'] != list_obj.id and parse_datetime(entry['created_at']) >= cutoff
+        ][:3]
+        preferred = sorted(snapshot['category_counts'].items(), key=lambda entry: entry[1], reverse=True)[:5]
+        return {
+            'recent_lists': recent_lists,
+            'user_preferences': {
+                'preferred_categories': [category for category, _ in preferred],
+                'typical_quantities': snapshot['typical_quantities'],
+            },
+        }
@@ -0,0 +1,209 @@
+# lists/categorizer.py
+
+import re
+from bisect import bisect_right
+from collections import Counter
+from django.core.cache import cache
+
+from .cache import get_list_data_version
+
+# Keyword dictionaries per list type; earlier categories win ties
+CATEGORY_KEYWORDS = {
+    'shopping': {
+        'fruits': ['apple', 'banana', 'orange', 'grape', 'berry', 'mango', 'pineapple'],
+        'vegetables': ['carrot', 'broccoli', 'spinach', 'tomato', 'potato', 'onion', 'pepper'],
+        'dairy': ['milk', 'cheese', 'yogurt', 'butter', 'cream', 'eggs'],
+        'meat': ['chicken', 'beef', 'pork', 'fish', 'turkey', 'lamb'],
+        'pantry': ['rice', 'pasta', 'bread', 'flour', 'sugar', 'salt', 'oil'],
+        'beverages': ['water', 'juice', 'soda', 'coffee', 'tea', 'beer', 'wine'],
+        'household': ['detergent', 'soap', 'shampoo', 'toothpaste', 'paper', 'cleaner']
+    },
+    'todo': {
+        'work': ['meeting', 'report', 'email', 'presentation', 'project', 'call'],
+        'personal': ['exercise', 'doctor', 'family', 'hobby', 'social', 'self-care'],
+        'home': ['clean', 'repair', 'organize', 'maintenance', 'garden', 'cook'],
+        'finance': ['pay', 'budget', 'invest', 'tax', 'bank', 'insurance']
+    }
+}
+
+# Tag keywords applied to every list type, then per list type
+UNIVERSAL_TAG_KEYWORDS = {
+    'urgent': ['urgent', 'asap', 'important', 'priority'],
+    'organic': ['organic', 'natural', 'bio'],
+    'bulk': ['large', 'big', 'bulk', 'family'],
+}
+
+TYPE_TAG_KEYWORDS = {
+    'shopping': {
+        'frozen': ['frozen'],
+        'fresh': ['fresh', 'ripe'],
+    }
+}
+
+# Tags that only apply to items in a given category
+CATEGORY_TAG_KEYWORDS = {
+    'dairy': {
+        'dairy-type': ['low-fat', 'skim', 'whole'],
+    }
+}
+
+MAX_TAGS = 3
+OVERRIDE_CACHE_TIMEOUT = 3600
+
+
+def normalize_item_name(name):
+    """Lower-case, collapse whitespace; the key used for per-user overrides"""
+    return ' '.join((name or '').lower().split())
+
+
+class KeywordMatcher:
+    """Single alternation regex over a {label: [keywords]} dictionary.
+
+    Matching is substring based, like the `keyword in text` checks it
+    replaces, but runs one scan per text instead of one per keyword.
+    """
+
+    def __init__(self, keyword_map):
+        self.labels = list(keyword_map)
+        self._rank = {label: index for index, label in enumerate(self.labels)}
+        self._label_for = {}
+        for label, keywords in keyword_map.items():
+            for keyword in keywords:
+                self._label_for.setdefault(keyword, label)
+
+        # Longest keywords first so "pineapple" is not shadowed by "apple"
+        keywords = sorted(self._label_for, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(re.escape(keyword) for keyword in keywords)) if keywords else None
+
+    def labels_in(self, text):
+        """Labels whose keywords occur in text, in dictionary order"""
+        if not self._pattern:
+            return []
+        found = {self._label_for[match.group(0)] for match in self._pattern.finditer(text)}
+        return sorted(found, key=self._rank.get)
+
+    def labels_in_batch(self, texts):
+        """labels_in() for many texts using one scan over the joined text"""
+        results = [set() for _ in texts]
+        if not self._pattern or not texts:
+            return [[] for _ in texts]
+
+        # Newlines never occur in keywords, so matches cannot span two texts
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + 1
+        joined = '\n'.join(texts)
+
+        for match in self._pattern.finditer(joined):
+            index = bisect_right(offsets, match.start()) - 1
+            results[index].add(self._label_for[match.group(0)])
+        return [sorted(found, key=self._rank.get) for found in results]
+
+
+class ItemCategorizer:
+    """Keyword categorizer and tagger for list items.
+
+    The keyword dictionaries are compiled once per process. Per-user
+    overrides map a normalized item name to the category the user chose
+    when it differs from the keyword result.
+    """
+
+    _matchers = None
+
+    def __init__(self, overrides=None):
+        self.overrides = overrides or {}
+        if ItemCategorizer._matchers is None:
+            ItemCategorizer._matchers = self._compile()
+
+    @staticmethod
+    def _compile():
+        matchers = {
+            'categories': {
+                list_type: KeywordMatcher(mapping) for list_type, mapping in CATEGORY_KEYWORDS.items()
+            },
+            'universal_tags': KeywordMatcher(UNIVERSAL_TAG_KEYWORDS),
+            'type_tags': {
+                list_type: KeywordMatcher(mapping) for list_type, mapping in TYPE_TAG_KEYWORDS.items()
+            },
+            'category_tags': {
+                category: KeywordMatcher(mapping) for category, mapping in CATEGORY_TAG_KEYWORDS.items()
+            },
+        }
+        return matchers
+
+    @classmethod
+    def for_user(cls, user):
+        """Categorizer with the user's learned overrides, cached per data version"""
+        if user is None:
+            return cls()
+        cache_key = f"list_category_overrides_{user.id}_v{get_list_data_version(user.id)}"
+        overrides = cache.get(cache_key)
+        if overrides is None:
+            overrides = cls.learn_overrides(user)
+            cache.set(cache_key, overrides, OVERRIDE_CACHE_TIMEOUT)
+        return cls(overrides)
+
+    @classmethod
+    def learn_overrides(cls, user, limit=2000):
+        """Categories the user chose that disagree with the keyword result.
+
+        Looks at the user's most recently updated items whose category was
+        edited by the user, so categories assigned by AI or imports are not
+        learned, and keeps the most common category per normalized name.
+        """
+        from .models import ListItem
+
+        rows = ListItem.objects.filter(
+            list__user=user,
+            category_edited=True,
+            category__isnull=False
+        ).exclude(category='').order_by('-updated_at').values_list(
+            'name', 'category', 'list__list_type'
+        )[:limit]
+
+        default = cls()
+        votes = {}
+        for name, category, list_type in rows:
+            key = normalize_item_name(name)
+            if category == default.categorize(key, list_type):
+                continue
+            votes.setdefault(key, Counter())[category] += 1
+        return {key: counter.most_common(1)[0][0] for key, counter in votes.items()}
+
+    def categorize(self, item_name, list_type):
+        return self.categorize_many([item_name], list_type)[0]
+
+    def categorize_many(self, item_names, list_type):
+        """Categories for a batch of item names in one pass over the text"""
+        keys = [normalize_item_name(name) for name in item_names]
+        matcher = self._matchers['categories'].get(list_type)
+        matches = matcher.labels_in_batch(keys) if matcher else [[] for _ in keys]
+
+        categories = []
+        for key, labels in zip(keys, matches):
+            override = self.overrides.get(key)
+            categories.append(override or (labels[0] if labels else 'other'))
+        return categories
+
+    def tags(self, item_name, category, list_type):
+        return self.tags_many([item_name], [category], list_type)[0]
+
+    def tags_many(self, item_names, categories, list_type):
+        """Smart tags for a batch of items, at most MAX_TAGS each"""
+        keys = [normalize_item_name(name) for name in item_names]
+        results = self._matchers['universal_tags'].labels_in_batch(keys)
+
+        type_matcher = self._matchers['type_tags'].get(list_type)
+        if type_matcher:
+            for tags, type_tags in zip(results, type_matcher.labels_in_batch(keys)):
+                tags.extend(type_tags)
+
+            # Category-specific tags only apply within the list type's tagging
+            for index, (key, category) in enumerate(zip(keys, categories)):
+                category_matcher = self._matchers['category_tags'].get(category)
+                if category_matcher:
+                    results[index].extend(category_matcher.labels_in(key))
+
+        return [tags[:MAX_TAGS] for tags in results]
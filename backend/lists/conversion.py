@@ -0,0 +1,150 @@
+# lists/conversion.py
+
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_list_data_version
+from .models import List, ListItem, ListActivity
+
+# Only counted quantities multiply the price; measures such as "2 kg" are
+# one purchase at the item's price. "2 kg" at 120 is 120, "2 pcs" is 240
+COUNT_UNITS = {
+    'x', 'pc', 'pcs', 'piece', 'pieces', 'pack', 'packs', 'packet', 'packets',
+    'bottle', 'bottles', 'can', 'cans', 'box', 'boxes', 'unit', 'units',
+}
+QUANTITY_PATTERN = re.compile(
+    r'^\s*(?P<number>\d+\s+\d+/\d+|\d+/\d+|\d*\.?\d+)?\s*(?P<unit>[a-zA-Z]+)?\.?\s*$'
+)
+
+# Item categories from lists.categorizer mapped to expense categories
+EXPENSE_CATEGORIES = {
+    'household': 'Shopping',
+}
+DEFAULT_EXPENSE_CATEGORY = 'Groceries'
+
+
+def parse_quantity(text, unit=None):
+    """(amount, unit) from free-text quantities such as "2", "1.5 kg", "1/2 lb" or "3x".
+
+    Falls back to the item's separate unit field; amount is None when the
+    text has no readable number.
+    """
+    match = QUANTITY_PATTERN.match(str(text or ''))
+    if not match:
+        return None, (unit or '').lower() or None
+    number = match.group('number')
+    amount = None
+    if number:
+        try:
+            fraction = sum((Fraction(part) for part in number.split()), Fraction(0))
+            amount = (Decimal(fraction.numerator) / Decimal(fraction.denominator)).quantize(Decimal('0.001'))
+        except (ValueError, ZeroDivisionError, InvalidOperation):
+            amount = None
+    return amount, (match.group('unit') or unit or '').lower() or None
+
+
+def line_total(item):
+    """Amount spent on an item: price times count, or price alone for measured quantities"""
+    amount, unit = parse_quantity(item.quantity, item.unit)
+    if amount is None or amount <= 0 or (unit and unit not in COUNT_UNITS):
+        return item.price
+    return (item.price * amount).quantize(Decimal('0.01'))
+
+
+class ShoppingExpenseConverter:
+    """Turns completed, priced items of shopping lists into itemized expenses.
+
+    One expense is created per list and expense category, dated on the day
+    the list's last item was completed. All expenses are inserted with one
+    bulk_create inside a single transaction, using a display_id range
+    reserved under a lock on the user's row. Lists are stamped with expense_converted_at,
+    so converting them again is a no-op.
+    """
+
+    def convert(self, user, list_ids):
+        from expenses.models import Expense
+
+        with transaction.atomic():
+            lists = list(
+                List.objects.select_for_update().filter(
+                    user=user, pk__in=list_ids, expense_converted_at__isnull=True
+                ).order_by('created_at')
+            )
+            items_by_list = defaultdict(list)
+            for item in ListItem.objects.filter(
+                list__in=lists, is_completed=True, price__isnull=False
+            ).order_by('list_id', 'position'):
+                items_by_list[item.list_id].append(item)
+
+            lists = [list_obj for list_obj in lists if items_by_list[list_obj.pk]]
+            if not lists:
+                return {'expenses': [], 'lists': [], 'total_amount': 0.0, 'items_count': 0}
+
+            expenses, totals = self._build_expenses(user, lists, items_by_list)
+            first = Expense.next_display_id(user.id)
+            for offset, expense in enumerate(expenses):
+                expense.display_id = first + offset
+            Expense.objects.bulk_create(expenses)
+
+            now = timezone.now()
+            for list_obj in lists:
+                list_obj.actual_cost = totals[list_obj.pk]
+                list_obj.expense_converted_at = now
+            List.objects.bulk_update(lists, ['actual_cost', 'expense_converted_at'])
+            List.touch([list_obj.pk for list_obj in lists])
+            ListActivity.objects.bulk_create([
+                ListActivity(
+                    list=list_obj,
+                    user=user,
+                    action='updated',
+                    description=f'Converted to expenses: {totals[list_obj.pk]}',
+                    metadata={'expense_total': float(totals[list_obj.pk])}
+                )
+                for list_obj in lists
+            ])
+            bump_list_data_version(user.id)
+
+        return {
+            'expenses': [expense.expense_id for expense in expenses],
+            'lists': [list_obj.pk for list_obj in lists],
+            'total_amount': float(sum(totals.values())),
+            'items_count': sum(len(items_by_list[list_obj.pk]) for list_obj in lists),
+        }
+
+    def _build_expenses(self, user, lists, items_by_list):
+        from expenses.models import Expense
+
+        today = timezone.localdate()
+        expenses = []
+        totals = {}
+        for list_obj in lists:
+            items = items_by_list[list_obj.pk]
+            completed = [item.completed_at for item in items if item.completed_at]
+            transaction_date = min(timezone.localdate(max(completed)), today) if completed else today
+
+            by_category = defaultdict(list)
+            for item in items:
+                category = EXPENSE_CATEGORIES.get(item.category, DEFAULT_EXPENSE_CATEGORY)
+                by_category[category].append((item, line_total(item)))
+
+            totals[list_obj.pk] = Decimal('0.00')
+            for category, lines in by_category.items():
+                amount = sum(total for _, total in lines)
+                totals[list_obj.pk] += amount
+                expenses.append(Expense(
+                    user=user,
+                    amount=amount,
+                    category=category,
+                    description=f"Shopping: {list_obj.name} - " + ', '.join(
+                        f"{item.name}" + (f" ({item.quantity})" if item.quantity else '') + f" ₹{total}"
+                        for item, total in lines
+                    ),
+                    raw_text=list_obj.name,
+                    notes=f"Converted from list {list_obj.pk}",
+                    transaction_date=transaction_date
+                ))
+        return expenses, totals
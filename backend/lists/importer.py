@@ -0,0 +1,397 @@
+# lists/importer.py
+
+import codecs
+import csv
+import io
+import json
+import logging
+import re
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .categorizer import ItemCategorizer
+from .models import List, ListItem, ListActivity, ListImportJob
+from .validators import ListImportValidator
+
+logger = logging.getLogger(__name__)
+
+# CSV headers accepted for each item field, matched case-insensitively;
+# includes the headers written by ExportService.export_lists_csv
+CSV_COLUMNS = {
+    'list name': 'list_name', 'list': 'list_name',
+    'item name': 'name', 'item': 'name', 'name': 'name',
+    'description': 'description',
+    'quantity': 'quantity',
+    'unit': 'unit',
+    'category': 'category',
+    'priority': 'priority',
+    'completed': 'is_completed', 'is completed': 'is_completed',
+    'price': 'price',
+    'estimated price': 'estimated_price',
+    'notes': 'notes',
+}
+
+ITEM_FIELDS = {
+    'name', 'description', 'quantity', 'unit', 'category', 'priority',
+    'is_completed', 'price', 'estimated_price', 'notes',
+}
+
+TRUE_VALUES = {'yes', 'y', 'true', '1', 'x', 'done'}
+TXT_BULLET = re.compile(r'^\s*(?:[-*•]|\d+[.)])?\s*(?:\[(?P<check>[ xX])\]\s*)?')
+JSON_SPACE = re.compile(r'[ \t\n\r]*')
+
+
+class ImportJobReclaimed(Exception):
+    """The job was handed to another worker while this one was still running"""
+
+
+class ListImportService:
+    """Streaming import of lists and items from csv, json, ndjson or txt.
+
+    Rows are parsed lazily and written CHUNK_SIZE at a time with
+    List.bulk_add_items, categorizing items without a category locally.
+    Each imported list gets one summary activity rather than one per item.
+    Imports above SYNC_LIMIT items are stored as pending ListImportJobs for
+    the run_list_imports command, outside the web workers; uploaded files
+    are stored and parsed as streams rather than read into memory. CSV,
+    NDJSON, TXT and top-level JSON arrays are read incrementally; any other
+    JSON document is loaded whole. Jobs whose worker stops reporting for
+    STALE_AFTER are reclaimed.
+    """
+
+    CHUNK_SIZE = 1000
+    SYNC_LIMIT = 1000
+    STALE_AFTER = timedelta(minutes=10)
+    JSON_READ_SIZE = 64 * 1024
+    DEFAULT_LIST_NAME = 'Imported list'
+
+    # Parsing
+
+    def parse(self, format_type, stream):
+        """Yield item rows from a text stream in the given format"""
+        parsers = {
+            'csv': self._parse_csv,
+            'json': self._parse_json,
+            'ndjson': self._parse_ndjson,
+            'txt': self._parse_txt,
+        }
+        count = 0
+        for row in parsers[format_type](stream):
+            if not row.get('name'):
+                continue
+            count += 1
+            if count > ListImportValidator.MAX_ITEMS:
+                raise ValidationError(
+                    {'items': f'Cannot import more than {ListImportValidator.MAX_ITEMS} items at once'}
+                )
+            yield row
+
+    def _parse_csv(self, stream):
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if not header:
+            return
+        fields = [CSV_COLUMNS.get(' '.join(column.strip().lower().replace('_', ' ').split())) for column in header]
+        for values in reader:
+            yield {field: value.strip() for field, value in zip(fields, values) if field and value.strip()}
+
+    def _parse_json(self, stream):
+        # The standard library has no incremental JSON parser, so elements of
+        # a top-level array are decoded one at a time from a sliding buffer
+        decoder = json.JSONDecoder()
+        buffer = stream.read(self.JSON_READ_SIZE).lstrip()
+        if not buffer.startswith('['):
+            yield from self._rows_from_document(json.loads(buffer + stream.read()))
+            return
+
+        position, exhausted, expect_value = 1, False, True
+        while True:
+            position = JSON_SPACE.match(buffer, position).end()
+            if not exhausted and len(buffer) - position < self.JSON_READ_SIZE:
+                # Drop what has been decoded and top the buffer up
+                chunk = stream.read(self.JSON_READ_SIZE)
+                exhausted = not chunk
+                buffer = buffer[position:] + chunk
+                position = JSON_SPACE.match(buffer).end()
+            if buffer.startswith(']', position):
+                return
+            if not expect_value:
+                if not buffer.startswith(',', position):
+                    raise ValueError('Expected , or ] between JSON array elements')
+                position, expect_value = position + 1, True
+                continue
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+                # A number at the end of the buffer may continue in the next chunk
+                complete = exhausted or end < len(buffer)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+                complete = False
+            if not complete:
+                # The element runs past the buffer; read more of it
+                chunk = stream.read(self.JSON_READ_SIZE)
+                exhausted = not chunk
+                buffer += chunk
+                continue
+            yield from self._rows_from_document(element)
+            position, expect_value = end, False
+
+    def _parse_ndjson(self, stream):
+        for line in stream:
+            if line.strip():
+                yield from self._rows_from_document(json.loads(line))
+
+    def _rows_from_document(self, document):
+        if isinstance(document, list):
+            for entry in document:
+                yield from self._rows_from_document(entry)
+        elif isinstance(document, dict) and isinstance(document.get('items'), list):
+            # A whole list, as written by the JSON and NDJSON exports
+            for item in document['items']:
+                if isinstance(item, dict):
+                    yield dict(item, list_name=document.get('name'), list_type=document.get('list_type'))
+        elif isinstance(document, dict):
+            yield document
+        elif isinstance(document, str):
+            yield {'name': document}
+
+    def _parse_txt(self, stream):
+        list_name = None
+        for line in stream:
+            text = line.strip()
+            if not text:
+                continue
+            if text.endswith(':'):
+                list_name = text[:-1].strip()
+                continue
+            match = TXT_BULLET.match(text)
+            yield {
+                'name': text[match.end():].strip(),
+                'is_completed': (match.group('check') or ' ').lower() == 'x',
+                'list_name': list_name,
+            }
+
+    @staticmethod
+    def text_stream(binary):
+        """Lazily decoded text over a binary file, such as an upload or a stored job file"""
+        return codecs.getreader('utf-8-sig')(binary)
+
+    def estimate_items(self, format_type, content):
+        """Cheap upper bound on the number of items in the content"""
+        if format_type == 'json':
+            return sum(1 for _ in self.parse(format_type, io.StringIO(content)))
+        return content.count('\n') + 1
+
+    def estimate_upload(self, format_type, upload):
+        """estimate_items for an uploaded file, read chunk by chunk and rewound afterwards"""
+        if format_type == 'json':
+            count = sum(1 for _ in self.parse(format_type, self.text_stream(upload)))
+        else:
+            count = sum(chunk.count(b'\n') for chunk in upload.chunks()) + 1
+        upload.seek(0)
+        return count
+
+    # Writing
+
+    def import_rows(self, user, rows, list_name='', list_type='checklist', format_type='', progress=None):
+        """Create lists and items from parsed rows, CHUNK_SIZE rows at a time"""
+        categorizer = ItemCategorizer.for_user(user)
+        valid_types = {choice[0] for choice in List.LIST_TYPES}
+        lists = {}
+        counts = Counter()
+        processed = 0
+        rows = iter(rows)
+
+        while True:
+            chunk = list(islice(rows, self.CHUNK_SIZE))
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                grouped = {}
+                for row in chunk:
+                    name = (row.get('list_name') or list_name or self.DEFAULT_LIST_NAME).strip()[:100]
+                    if name not in lists:
+                        row_type = row.get('list_type')
+                        lists[name] = List.objects.create(
+                            user=user,
+                            name=name,
+                            list_type=row_type if row_type in valid_types else list_type
+                        )
+                    grouped.setdefault(name, []).append(self._item_fields(row))
+
+                for name, item_rows in grouped.items():
+                    list_obj = lists[name]
+                    self._categorize(categorizer, item_rows, list_obj.list_type)
+                    items = [
+                        self._build_item(user, fields, counts[name] + index)
+                        for index, fields in enumerate(item_rows)
+                    ]
+                    list_obj.bulk_add_items(items, batch_size=self.CHUNK_SIZE)
+                    counts[name] += len(items)
+
+                processed += len(chunk)
+                if progress:
+                    # Reported inside the chunk's transaction, so the recorded
+                    # lists always match what has been committed
+                    progress(processed, [list_obj.id for list_obj in lists.values()])
+
+        ListActivity.objects.bulk_create([
+            ListActivity(
+                list=list_obj,
+                user=user,
+                action='item_added',
+                description=f'Imported {counts[name]} items',
+                metadata={'source': 'import', 'format': format_type, 'items_count': counts[name]}
+            )
+            for name, list_obj in lists.items()
+        ])
+
+        return {
+            'list_ids': [list_obj.id for list_obj in lists.values()],
+            'items_imported': processed,
+        }
+
+    def _item_fields(self, row):
+        fields = {key: value for key, value in row.items() if key in ITEM_FIELDS and value not in (None, '')}
+        fields['name'] = str(fields['name']).strip()[:200]
+        for key, limit in (('quantity', 50), ('unit', 20), ('category', 50)):
+            if key in fields:
+                fields[key] = str(fields[key]).strip()[:limit]
+        if fields.get('priority') not in {choice[0] for choice in ListItem.PRIORITY_LEVELS}:
+            fields.pop('priority', None)
+        for key in ('price', 'estimated_price'):
+            if key in fields:
+                fields[key] = self._parse_price(fields[key])
+        completed = fields.get('is_completed', False)
+        fields['is_completed'] = completed if isinstance(completed, bool) else str(completed).strip().lower() in TRUE_VALUES
+        return fields
+
+    @staticmethod
+    def _parse_price(value):
+        try:
+            price = Decimal(str(value).strip().lstrip('$'))
+        except (InvalidOperation, ValueError):
+            return None
+        return price if 0 <= price <= Decimal('99999999.99') else None
+
+    @staticmethod
+    def _categorize(categorizer, item_rows, list_type):
+        missing = [fields for fields in item_rows if not fields.get('category')]
+        if not missing:
+            return
+        categories = categorizer.categorize_many([fields['name'] for fields in missing], list_type)
+        for fields, category in zip(missing, categories):
+            fields['category'] = category
+
+    @staticmethod
+    def _build_item(user, fields, order):
+        item = ListItem(order=order, **fields)
+        if item.is_completed:
+            item.completed_at = timezone.now()
+            item.completed_by = user
+        return item
+
+    # Background jobs
+
+    def create_job(self, user, format_type, content='', list_name='', list_type='checklist',
+                   total_items=None, upload=None):
+        """Store a large import as a pending job for the run_list_imports command"""
+        job = ListImportJob(
+            user=user,
+            format=format_type,
+            content=content or '',
+            list_name=list_name or '',
+            list_type=list_type,
+            total_items=total_items
+        )
+        if upload is not None:
+            # Copied to storage chunk by chunk
+            job.file.save(upload.name, upload, save=False)
+        job.save()
+        return job
+
+    def run_job(self, job_id):
+        """Process a pending job; returns False if another worker already claimed it"""
+        started = timezone.now()
+        claimed = ListImportJob.objects.filter(pk=job_id, status='pending').update(
+            status='running', started_at=started, heartbeat_at=started
+        )
+        if not claimed:
+            return False
+
+        job = ListImportJob.objects.select_related('user').get(pk=job_id)
+
+        def report(processed, list_ids):
+            # started_at identifies this run; a reclaimed job no longer matches
+            updated = ListImportJob.objects.filter(pk=job.pk, status='running', started_at=started).update(
+                processed_items=processed, list_ids=list_ids, heartbeat_at=timezone.now()
+            )
+            if not updated:
+                raise ImportJobReclaimed()
+
+        try:
+            if job.file:
+                stream = self.text_stream(job.file.open('rb'))
+            else:
+                stream = io.StringIO(job.content)
+            try:
+                result = self.import_rows(
+                    job.user, self.parse(job.format, stream), job.list_name, job.list_type, job.format,
+                    progress=report
+                )
+            finally:
+                if job.file:
+                    job.file.close()
+        except ImportJobReclaimed:
+            logger.error(f"List import job {job.pk} was reclaimed while running")
+            return True
+        except Exception as e:
+            logger.error(f"List import job {job.pk} failed: {e}")
+            ListImportJob.objects.filter(pk=job.pk, started_at=started).update(
+                status='failed', error=str(e), completed_at=timezone.now()
+            )
+            return True
+
+        # The content is only needed until the import has run
+        if job.file:
+            job.file.delete(save=False)
+        ListImportJob.objects.filter(pk=job.pk, started_at=started).update(
+            status='completed',
+            content='',
+            file='',
+            list_ids=result['list_ids'],
+            processed_items=result['items_imported'],
+            total_items=result['items_imported'],
+            completed_at=timezone.now()
+        )
+        return True
+
+    def reclaim_stale_jobs(self, now=None):
+        """Put running jobs without a recent heartbeat back to pending; returns how many.
+
+        Their worker died mid-import, so the lists it had already committed
+        are deleted first and the retry starts from the beginning.
+        """
+        from .services import delete_lists
+
+        cutoff = (now or timezone.now()) - self.STALE_AFTER
+        reclaimed = 0
+        stale = ListImportJob.objects.filter(status='running', heartbeat_at__lt=cutoff)
+        for job in stale.only('id', 'user_id', 'list_ids'):
+            with transaction.atomic():
+                # Re-checked in the UPDATE, in case the worker was only slow
+                reset = stale.filter(pk=job.pk).update(
+                    status='pending', processed_items=0, list_ids=[], started_at=None, heartbeat_at=None
+                )
+                if not reset:
+                    continue
+                delete_lists(List.objects.filter(user_id=job.user_id, pk__in=job.list_ids))
+            reclaimed += 1
+        return reclaimed
@@ -0,0 +1,35 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from lists.models import ListActivity
+
+
+class Command(BaseCommand):
+    help = 'Fold old per-item list activities into daily summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ListActivity.RETENTION_DAYS,
+                            help='Compact activities older than this many days')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # Cut at a day boundary so no day is split between raw rows and a summary
+        cutoff = timezone.localtime() - timedelta(days=options['days'])
+        cutoff = cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        list_ids = list(
+            ListActivity.objects.filter(
+                created_at__lt=cutoff, action__in=ListActivity.COMPACTABLE_ACTIONS
+            ).order_by('list_id').values_list('list_id', flat=True).distinct()
+        )
+
+        chunk_size = options['chunk_size']
+        removed = summaries = 0
+        for start in range(0, len(list_ids), chunk_size):
+            chunk_removed, chunk_summaries = ListActivity.compact(cutoff, list_ids[start:start + chunk_size])
+            removed += chunk_removed
+            summaries += chunk_summaries
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Folded {removed} activities into {summaries} daily summaries')
+        )
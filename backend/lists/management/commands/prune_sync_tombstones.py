@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from lists.models import SyncTombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than the retention window'
+
+    def handle(self, *args, **options):
+        deleted = SyncTombstone.prune()
+        self.stdout.write(
+            self.style.SUCCESS(f'Pruned {deleted} tombstones older than {SyncTombstone.RETENTION_DAYS} days')
+        )
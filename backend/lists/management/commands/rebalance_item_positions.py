@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Length
+from lists.models import List, ListItem
+
+
+class Command(BaseCommand):
+    help = 'Respace item order keys in lists where repeated moves made them long'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-length', type=int, default=ListItem.REBALANCE_POSITION_LENGTH,
+                            help='Rebalance lists with an order key longer than this')
+
+    def handle(self, *args, **options):
+        list_ids = list(
+            ListItem.objects.annotate(position_length=Length('position')).filter(
+                position_length__gt=options['min_length']
+            ).order_by('list_id').values_list('list_id', flat=True).distinct()
+        )
+        items = sum(List.rebalance_positions(list_id) for list_id in list_ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebalanced {len(list_ids)} lists ({items} items)'))
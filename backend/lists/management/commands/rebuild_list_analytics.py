@@ -0,0 +1,67 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from lists.cache import bump_list_data_version
+from lists.models import List, ListItem, ListAnalytics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild monthly ListAnalytics rollups from lists and list items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild rollups for this user id')
+
+    def handle(self, *args, **options):
+        lists = List.objects.all()
+        items = ListItem.objects.all()
+        if options.get('user'):
+            lists = lists.filter(user_id=options['user'])
+            items = items.filter(list__user_id=options['user'])
+
+        rollups = defaultdict(dict)
+
+        for row in lists.annotate(month=TruncMonth('created_at')).values('user_id', 'month').annotate(
+            count=Count('id'),
+            completed=Count('id', filter=Q(items_total__gt=0, items_completed__gte=F('items_total')))
+        ).order_by():
+            rollup = rollups[(row['user_id'], ListAnalytics.month_for(row['month']))]
+            rollup['total_lists'] = row['count']
+            rollup['completed_lists'] = row['completed']
+
+        for row in items.annotate(month=TruncMonth('created_at')).values('list__user_id', 'month').annotate(
+            count=Count('id'),
+            estimated_cost=Sum('estimated_price')
+        ).order_by():
+            rollup = rollups[(row['list__user_id'], ListAnalytics.month_for(row['month']))]
+            rollup['total_items'] = row['count']
+            rollup['estimated_cost'] = row['estimated_cost'] or 0
+
+        for row in items.filter(is_completed=True, completed_at__isnull=False).annotate(
+            month=TruncMonth('completed_at')
+        ).values('list__user_id', 'month').annotate(
+            count=Count('id'),
+            duration=Sum(F('completed_at') - F('created_at'))
+        ).order_by():
+            rollup = rollups[(row['list__user_id'], ListAnalytics.month_for(row['month']))]
+            rollup['completed_items'] = row['count']
+            rollup['total_completion_seconds'] = max(0.0, row['duration'].total_seconds()) if row['duration'] else 0.0
+
+        user_ids = {user_id for user_id, _ in rollups}
+        with transaction.atomic():
+            existing = ListAnalytics.objects.all()
+            if options.get('user'):
+                existing = existing.filter(user_id=options['user'])
+            existing.delete()
+            ListAnalytics.objects.bulk_create(
+                [ListAnalytics(user_id=user_id, month=month, **counts) for (user_id, month), counts in rollups.items()],
+                batch_size=500
+            )
+
+        for user_id in user_ids:
+            bump_list_data_version(user_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {len(rollups)} monthly rollups for {len(user_ids)} users')
+        )
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from lists.models import ListItem, ItemPrice
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the item price index from completed, priced list items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--global-only', action='store_true',
+                            help='Only refresh the cross-user rows; per-user rows are kept incrementally')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        rebuild_users = not options['global_only']
+        items = ListItem.objects.filter(
+            is_completed=True,
+            price__isnull=False
+        ).order_by('completed_at').values_list('list__user_id', 'name', 'unit', 'price')
+
+        pending = defaultdict(list)
+        seen = {'prices': 0, 'users': set()}
+
+        def flush():
+            for user_id, user_observations in pending.items():
+                ItemPrice.record(user_id, user_observations)
+            pending.clear()
+
+        def observations():
+            # One pass over the items feeds the global rows and, in batches
+            # of chunk_size prices, the per-user rows
+            for user_id, name, unit, price in items.iterator(chunk_size=chunk_size):
+                seen['prices'] += 1
+                seen['users'].add(user_id)
+                if rebuild_users:
+                    pending[user_id].append((name, unit, price))
+                    if seen['prices'] % chunk_size == 0:
+                        flush()
+                yield name, unit, price
+            flush()
+
+        with transaction.atomic():
+            if rebuild_users:
+                ItemPrice.objects.filter(user__isnull=False).delete()
+            global_rows = ItemPrice.rebuild_global(observations())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {seen['prices']} prices for {len(seen['users'])} users "
+            f'({ItemPrice.objects.count()} index rows, {global_rows} global)'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from lists.recurring import RecurringItemScheduler
+
+
+class Command(BaseCommand):
+    help = 'Reopen completed recurring list items whose next occurrence is due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=RecurringItemScheduler.LIST_CHUNK_SIZE,
+                            help='Number of lists reset per transaction')
+
+    def handle(self, *args, **options):
+        items, lists = RecurringItemScheduler().regenerate(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reopened {items} recurring items across {lists} lists'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from lists.models import List
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized list item counters and completion percentages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only repair lists owned by this user id')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        lists = List.objects.order_by('pk')
+        if options.get('user'):
+            lists = lists.filter(user_id=options['user'])
+
+        chunk_size = options['chunk_size']
+        list_ids = list(lists.values_list('pk', flat=True))
+
+        repaired = 0
+        for start in range(0, len(list_ids), chunk_size):
+            repaired += List.recount_items(list_ids[start:start + chunk_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Checked {len(list_ids)} lists, repaired {repaired} drifted counters')
+        )
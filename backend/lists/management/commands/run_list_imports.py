@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from lists.importer import ListImportService
+from lists.models import ListImportJob
+
+
+class Command(BaseCommand):
+    help = 'Process pending list import jobs, reclaiming running ones whose worker has stopped'
+
+    def handle(self, *args, **options):
+        service = ListImportService()
+        reclaimed = service.reclaim_stale_jobs()
+        job_ids = list(
+            ListImportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)
+        )
+        processed = sum(1 for job_id in job_ids if service.run_job(job_id))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} list import jobs ({reclaimed} reclaimed from stalled workers)'
+        ))
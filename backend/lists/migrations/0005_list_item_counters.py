@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:53
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_item_counters(apps, schema_editor):
+    List = apps.get_model('lists', 'List')
+    ListItem = apps.get_model('lists', 'ListItem')
+    counts = ListItem.objects.values('list_id').annotate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(is_completed=True))
+    )
+    for row in counts.iterator():
+        List.objects.filter(pk=row['list_id']).update(
+            items_total=row['total'],
+            items_completed=row['completed']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0004_merge_20250828_1144'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='items_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='items_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_item_counters, migrations.RunPython.noop),
+    ]
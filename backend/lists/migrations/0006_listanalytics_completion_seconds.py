@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0005_list_item_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listanalytics',
+            name='total_completion_seconds',
+            field=models.FloatField(default=0.0),
+        ),
+    ]
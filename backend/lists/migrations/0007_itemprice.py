@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lists', '0006_listanalytics_completion_seconds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name_key', models.CharField(max_length=200)),
+                ('unit', models.CharField(blank=True, default='', max_length=20)),
+                ('recent_prices', models.JSONField(blank=True, default=list)),
+                ('median_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('last_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('sample_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name_key', 'unit'], name='lists_itemp_name_ke_fd53d4_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='itemprice',
+            constraint=models.UniqueConstraint(fields=('user', 'name_key', 'unit'), name='unique_user_item_price'),
+        ),
+        migrations.AddConstraint(
+            model_name='itemprice',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('name_key', 'unit'), name='unique_global_item_price'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lists', '0007_itemprice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('baskets', models.JSONField(blank=True, default=dict)),
+                ('stats', models.JSONField(blank=True, default=dict)),
+                ('built_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='list',
+            index=models.Index(fields=['user', 'updated_at'], name='lists_list_user_id_059cf5_idx'),
+        ),
+        migrations.AddField(
+            model_name='purchaseprofile',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_profile', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
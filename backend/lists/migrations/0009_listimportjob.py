@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lists', '0008_purchaseprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(max_length=10)),
+                ('list_name', models.CharField(blank=True, default='', max_length=100)),
+                ('list_type', models.CharField(choices=[('checklist', 'Checklist'), ('shopping', 'Shopping List'), ('todo', 'To-Do List'), ('inventory', 'Inventory'), ('wishlist', 'Wishlist'), ('recipe', 'Recipe'), ('packing', 'Packing List'), ('other', 'Other')], default='checklist', max_length=20)),
+                ('content', models.TextField(blank=True, default='')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('total_items', models.PositiveIntegerField(blank=True, null=True)),
+                ('processed_items', models.PositiveIntegerField(default=0)),
+                ('list_ids', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='list_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='lists_listi_status_5ef842_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lists', '0009_listimportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('list', 'List'), ('item', 'Item')], max_length=10)),
+                ('object_id', models.CharField(max_length=25)),
+                ('list_id', models.CharField(max_length=25)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'deleted_at'], name='lists_synct_user_id_53edde_idx'), models.Index(fields=['list_id', 'deleted_at'], name='lists_synct_list_id_511d38_idx')],
+            },
+        ),
+    ]
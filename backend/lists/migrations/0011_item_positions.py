@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:09
+
+from django.db import migrations, models
+from django.utils import timezone
+
+from lists.ordering import spread_keys
+
+
+def backfill_item_positions(apps, schema_editor):
+    ListItem = apps.get_model('lists', 'ListItem')
+    now = timezone.now()
+    list_ids = ListItem.objects.order_by('list_id').values_list('list_id', flat=True).distinct()
+    for list_id in list_ids.iterator():
+        items = list(ListItem.objects.filter(list_id=list_id).order_by('order', 'created_at').only('id'))
+        for item, position in zip(items, spread_keys(len(items))):
+            item.position = position
+            item.updated_at = now
+        ListItem.objects.bulk_update(items, ['position', 'updated_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0010_list_sync'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='listitem',
+            options={'ordering': ['position', 'created_at']},
+        ),
+        migrations.AddField(
+            model_name='listitem',
+            name='position',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_item_positions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['list', 'position'], name='lists_listi_list_id_d586a3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['list', 'name'], name='lists_listi_list_id_16473b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['list', 'price'], name='lists_listi_list_id_82b559_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['list', 'created_at'], name='lists_listi_list_id_858bfc_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:11
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0011_item_positions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='listactivity',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='listactivity',
+            index=models.Index(fields=['list', 'created_at'], name='lists_lista_list_id_de1c31_idx'),
+        ),
+    ]
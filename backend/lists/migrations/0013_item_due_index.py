@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0012_activity_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['is_completed', 'due_date'], name='lists_listi_is_comp_759482_idx'),
+        ),
+    ]
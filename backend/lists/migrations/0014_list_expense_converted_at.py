@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0013_item_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='expense_converted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
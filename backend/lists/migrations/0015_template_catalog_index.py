@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0014_list_expense_converted_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listtemplate',
+            index=models.Index(fields=['is_public', 'category', 'use_count'], name='lists_listt_is_publ_464cf3_idx'),
+        ),
+    ]
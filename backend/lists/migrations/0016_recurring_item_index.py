@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0015_template_catalog_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listitem',
+            index=models.Index(fields=['is_recurring', 'completed_at'], name='lists_listi_is_recu_d9e07a_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0016_recurring_item_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listitem',
+            name='category_edited',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0017_item_category_edited'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listimportjob',
+            name='file',
+            field=models.FileField(blank=True, upload_to='list_imports/'),
+        ),
+        migrations.AddField(
+            model_name='listimportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='listimportjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:05
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def month_start(value):
+    return (value.date() if hasattr(value, 'hour') else value).replace(day=1)
+
+
+def backfill_rollup_figures(apps, schema_editor):
+    List = apps.get_model('lists', 'List')
+    ListItem = apps.get_model('lists', 'ListItem')
+    ListAnalytics = apps.get_model('lists', 'ListAnalytics')
+
+    figures = defaultdict(dict)
+    for row in List.objects.filter(items_total__gt=0, items_completed__gte=F('items_total')).annotate(
+        month=TruncMonth('created_at')
+    ).values('user_id', 'month').annotate(count=Count('id')).order_by():
+        figures[(row['user_id'], month_start(row['month']))]['completed_lists'] = row['count']
+    for row in ListItem.objects.filter(estimated_price__isnull=False).annotate(
+        month=TruncMonth('created_at')
+    ).values('list__user_id', 'month').annotate(cost=Sum('estimated_price')).order_by():
+        figures[(row['list__user_id'], month_start(row['month']))]['estimated_cost'] = row['cost']
+
+    for (user_id, month), values in figures.items():
+        if not ListAnalytics.objects.filter(user_id=user_id, month=month).update(**values):
+            ListAnalytics.objects.create(user_id=user_id, month=month, **values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0018_import_job_recovery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listanalytics',
+            name='estimated_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_rollup_figures, migrations.RunPython.noop),
+    ]
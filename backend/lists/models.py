@@ -1,10 +1,19 @@
 # lists/models.py
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import DEFERRED, Case, Count, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Greatest
 from django.contrib.auth.models import User
 from django.utils import timezone
 import shortuuid
 import json
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from .cache import bump_list_data_version, ParsingContextSnapshot
+from .categorizer import normalize_item_name
+from .ordering import key_between, keys_between, spread_keys
 
 # --- List Model ---
 def generate_list_id():
@@ -15,6 +24,10 @@ def generate_list_item_id():
     """Generates a unique, prefixed ID for a ListItem."""
     return f"ITM{shortuuid.random(length=22).upper()}"
 
+def as_amount(value):
+    """A price value as Decimal, with a missing price counted as zero"""
+    return Decimal(str(value)) if value not in (None, '') else Decimal('0')
+
 class ListTemplate(models.Model):
     """Reusable list templates"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -29,35 +42,45 @@ class ListTemplate(models.Model):
     def __str__(self):
         return f"{self.name} - {self.user.username}"
         
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_public', 'category', 'use_count']),
+        ]
+    
     def clone_to_list(self, user, list_name=None, list_description=None):
-        """Create a new list from this template with all its items"""
-        # Create the new list
-        new_list = List.objects.create(
-            user=user,
-            name=list_name or self.name,
-            description=list_description or self.description,
-            list_type='checklist',
-            template=self
-        )
+        """Create a new list from this template with all its items.
         
-        # Clone all template items to the new list
-        for template_item in self.template_items.all():
-            ListItem.objects.create(
-                list=new_list,
-                name=template_item.name,
-                description=template_item.description,
-                quantity=template_item.quantity,
-                unit=template_item.unit,
-                priority=template_item.priority,
-                category=template_item.category,
-                brand=template_item.brand,
-                price=template_item.price,
-                estimated_price=template_item.estimated_price,
-                notes=template_item.notes,
-                url=template_item.url,
-                image_url=template_item.image_url
+        Items are inserted with one bulk_create and the list counters are
+        shifted once, so the query count does not grow with the template.
+        """
+        with transaction.atomic():
+            new_list = List.objects.create(
+                user=user,
+                name=list_name or self.name,
+                description=list_description or self.description,
+                list_type=(self.metadata or {}).get('list_type', 'checklist'),
+                template=self
             )
             
+            new_list.bulk_add_items([
+                ListItem(
+                    name=template_item.name,
+                    description=template_item.description,
+                    quantity=template_item.quantity,
+                    unit=template_item.unit,
+                    priority=template_item.priority,
+                    category=template_item.category,
+                    brand=template_item.brand,
+                    price=template_item.price,
+                    estimated_price=template_item.estimated_price,
+                    notes=template_item.notes,
+                    url=template_item.url,
+                    image_url=template_item.image_url
+                )
+                for template_item in self.template_items.all()
+            ])
+            ListTemplate.objects.filter(pk=self.pk).update(use_count=F('use_count') + 1)
+            
         return new_list
 
 class ListCategory(models.Model):
@@ -124,6 +147,16 @@ class List(models.Model):
     is_archived = models.BooleanField(default=False)
     completion_percentage = models.FloatField(default=0.0)
     
+    # Denormalized item counters, maintained incrementally by ListItem
+    items_total = models.PositiveIntegerField(default=0)
+    items_completed = models.PositiveIntegerField(default=0)
+    
+    # Bumped on every write to the list or its items; used for sync ETags
+    version = models.PositiveIntegerField(default=0)
+    
+    # Set once the list's purchases have been recorded as expenses
+    expense_converted_at = models.DateTimeField(null=True, blank=True)
+    
     # AI and analytics
     ai_suggestions = models.JSONField(default=dict, blank=True)
     estimated_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -136,17 +169,233 @@ class List(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def apply_item_deltas(cls, list_id, total_delta=0, completed_delta=0):
+        """Shift the item counters of a list and derive its completion percentage.
+        
+        Runs as a single UPDATE; the right-hand side of every assignment sees
+        the pre-update column values, so the percentage is computed from the
+        shifted counters explicitly. Counters that have drifted are clamped
+        at zero rather than failing the unsigned column check.
+        """
+        if not total_delta and not completed_delta:
+            return
+        
+        new_total = Greatest(F('items_total') + total_delta, Value(0))
+        new_completed = Greatest(F('items_completed') + completed_delta, Value(0))
+        with transaction.atomic(savepoint=False):
+            # The locked pre-update counters tell whether the list became (or
+            # stopped being) complete, which the completed_lists rollup counts
+            row = cls.objects.select_for_update().filter(pk=list_id).values_list(
+                'user_id', 'created_at', 'items_total', 'items_completed'
+            ).first()
+            if row is None:
+                return
+            user_id, created_at, items_total, items_completed = row
+            cls.objects.filter(pk=list_id).update(
+                updated_at=timezone.now(),
+                version=F('version') + 1,
+                items_total=new_total,
+                items_completed=new_completed,
+                completion_percentage=Case(
+                    When(Q(items_total__lte=-total_delta), then=Value(0.0)),
+                    default=Cast(new_completed, FloatField()) * 100.0 / Cast(new_total, FloatField()),
+                    output_field=FloatField()
+                )
+            )
+            became_complete = cls.is_complete(
+                max(0, items_total + total_delta), max(0, items_completed + completed_delta)
+            ) - cls.is_complete(items_total, items_completed)
+            ListAnalytics.record(user_id, created_at, completed_lists=became_complete)
+    
+    @staticmethod
+    def is_complete(items_total, items_completed):
+        """1 if a list with these counters has all of its (at least one) items completed, else 0"""
+        return 1 if items_total and items_completed >= items_total else 0
+
+    @classmethod
+    def next_positions(cls, list_id, count):
+        """Order keys for count items appended after the list's last item"""
+        if not count:
+            return []
+        last = ListItem.objects.filter(list_id=list_id).exclude(position='').order_by(
+            '-position'
+        ).values_list('position', flat=True).first()
+        return keys_between(last, None, count)
+
+    @classmethod
+    def rebalance_positions(cls, list_id, batch_size=500):
+        """Rewrite a list's order keys as short, evenly spaced keys in current order"""
+        items = list(ListItem.objects.filter(list_id=list_id).order_by('position', 'created_at').only('id'))
+        now = timezone.now()
+        for item, position in zip(items, spread_keys(len(items))):
+            item.position = position
+            # bulk_update skips auto_now; delta sync needs the new keys
+            item.updated_at = now
+        ListItem.objects.bulk_update(items, ['position', 'updated_at'], batch_size=batch_size)
+        cls.touch([list_id])
+        return len(items)
+
+    def move_items(self, moves):
+        """Apply drag-and-drop moves in order, writing one row per move.
+        
+        Each move is (item_id, after_id) where after_id is the item it should
+        follow, or None to move it to the top. Returns {item_id: position}.
+        """
+        items = ListItem.objects.filter(list=self)
+        needed = {item_id for move in moves for item_id in move if item_id}
+        positions = dict(items.filter(pk__in=needed).values_list('pk', 'position'))
+        missing = needed - set(positions)
+        if missing:
+            raise ListItem.DoesNotExist(f"Items not in this list: {', '.join(sorted(missing))}")
+        
+        moved = {}
+        for item_id, after_id in moves:
+            if item_id == after_id:
+                continue
+            position = self._position_after(items, item_id, positions[after_id] if after_id else None)
+            if len(position) > ListItem.MAX_POSITION_LENGTH:
+                # Keys ran out of room at this spot; respace the list first
+                List.rebalance_positions(self.pk)
+                positions = dict(items.filter(pk__in=needed).values_list('pk', 'position'))
+                moved.update({pk: positions[pk] for pk in moved})
+                position = self._position_after(items, item_id, positions[after_id] if after_id else None)
+            items.filter(pk=item_id).update(position=position, updated_at=timezone.now())
+            positions[item_id] = moved[item_id] = position
+        
+        if moved:
+            List.touch([self.pk])
+            bump_list_data_version(self.user_id)
+        return moved
+
+    @staticmethod
+    def _position_after(items, item_id, before):
+        following = items.exclude(pk=item_id)
+        if before is not None:
+            following = following.filter(position__gt=before)
+        after = following.order_by('position').values_list('position', flat=True).first()
+        return key_between(before, after)
+
+    @classmethod
+    def touch(cls, list_ids):
+        """Mark lists as changed for sync after item edits that keep the counters"""
+        return cls.objects.filter(pk__in=list_ids).update(
+            updated_at=timezone.now(), version=F('version') + 1
+        )
+
+    @classmethod
+    def recount_items(cls, list_ids):
+        """Recompute item counters from ListItem rows for the given lists.
+        
+        Used after bulk item writes that bypass ListItem.save() and by the
+        repair_list_counters command. Returns the number of lists changed.
+        """
+        counts = {
+            row['list_id']: row
+            for row in ListItem.objects.filter(list_id__in=list_ids).values('list_id').annotate(
+                total=Count('id'),
+                completed=Count('id', filter=Q(is_completed=True))
+            )
+        }
+        
+        changed = 0
+        for list_id, user_id, created_at, items_total, items_completed in cls.objects.filter(
+            pk__in=list_ids
+        ).values_list('pk', 'user_id', 'created_at', 'items_total', 'items_completed'):
+            row = counts.get(list_id, {'total': 0, 'completed': 0})
+            if (items_total, items_completed) == (row['total'], row['completed']):
+                continue
+            ListAnalytics.record(user_id, created_at, completed_lists=(
+                cls.is_complete(row['total'], row['completed']) - cls.is_complete(items_total, items_completed)
+            ))
+            percentage = (row['completed'] / row['total']) * 100 if row['total'] else 0.0
+            cls.objects.filter(pk=list_id).update(
+                updated_at=timezone.now(),
+                version=F('version') + 1,
+                items_total=row['total'],
+                items_completed=row['completed'],
+                completion_percentage=percentage
+            )
+            changed += 1
+        return changed
+
+    def bulk_add_items(self, items, batch_size=500):
+        """Insert unsaved ListItems for this list with bulk_create.
+        
+        bulk_create bypasses ListItem.save(), so counters, rollups and the
+        cache version are updated here once for the whole batch.
+        """
+        unplaced = [item for item in items if not item.position]
+        for item, position in zip(unplaced, List.next_positions(self.pk, len(unplaced))):
+            item.position = position
+        for item in items:
+            item.list = self
+        created = ListItem.objects.bulk_create(items, batch_size=batch_size)
+        if not created:
+            return created
+        
+        now = timezone.now()
+        completed = [item for item in created if item.is_completed]
+        ParsingContextSnapshot.invalidate(self.user_id, [self.list_type])
+        List.apply_item_deltas(self.pk, total_delta=len(created), completed_delta=len(completed))
+        ListAnalytics.record(
+            self.user_id, now, total_items=len(created),
+            estimated_cost=sum(as_amount(item.estimated_price) for item in created)
+        )
+        if completed:
+            ListAnalytics.record_completion(self.user_id, now, 0.0, count=len(completed))
+        bump_list_data_version(self.user_id)
+        return created
+
     def update_completion_percentage(self):
-        """Update completion percentage based on completed items."""
-        total_items = self.items.count()
-        if total_items == 0:
-            percentage = 0.0
+        """Recompute counters and completion percentage from the list's items."""
+        List.recount_items([self.pk])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_context_fields()
+        return instance
+    
+    def _remember_context_fields(self):
+        """Snapshot the fields the parsing context is built from; deferred ones read as None"""
+        self._loaded_context = (self.__dict__.get('name'), self.__dict__.get('list_type'))
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not adding:
+            # Incremented in SQL so concurrent item writes are not lost
+            self.version = F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        if not adding:
+            # Drop the expression; the new value is loaded on next access
+            del self.version
+        if adding:
+            ListAnalytics.record(self.user_id, self.created_at, total_lists=1)
+            ParsingContextSnapshot.invalidate(self.user_id, [self.list_type])
         else:
-            completed_items = self.items.filter(is_completed=True).count()
-            percentage = (completed_items / total_items) * 100
-        
-        # Update the field directly in the database to avoid recursion
-        List.objects.filter(pk=self.pk).update(completion_percentage=percentage)
+            loaded = getattr(self, '_loaded_context', (None, None))
+            if loaded != (self.__dict__.get('name'), self.__dict__.get('list_type')):
+                # Renamed or retyped: both the old and the new type's recent lists change
+                ParsingContextSnapshot.invalidate(self.user_id, {self.list_type, loaded[1]} - {None})
+        self._remember_context_fields()
+        bump_list_data_version(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        user_id = self.user_id
+        list_id = self.pk
+        items = list(self.items.values(
+            'list__user_id', 'is_completed', 'created_at', 'completed_at', 'estimated_price'
+        ))
+        completed = List.is_complete(len(items), sum(1 for item in items if item['is_completed']))
+        result = super().delete(*args, **kwargs)
+        SyncTombstone.record(user_id, 'list', [(list_id, list_id)])
+        ListAnalytics.record_deleted(items, [(user_id, self.created_at, completed)])
+        ParsingContextSnapshot.invalidate(user_id, [self.list_type])
+        bump_list_data_version(user_id)
+        return result
 
     def calculate_total_cost(self):
         """Calculate total cost of all items"""
@@ -170,6 +419,7 @@ class List(models.Model):
         indexes = [
             models.Index(fields=['user', 'list_type']),
             models.Index(fields=['user', 'is_archived']),
+            models.Index(fields=['user', 'updated_at']),
         ]
 
 # Sharing functionality removed
@@ -197,6 +447,8 @@ class ListItem(models.Model):
     # Enhanced fields
     priority = models.CharField(max_length=10, choices=PRIORITY_LEVELS, default='medium')
     category = models.CharField(max_length=50, blank=True, null=True)
+    # Set when the user re-categorizes the item; only these are learned as overrides
+    category_edited = models.BooleanField(default=False)
     brand = models.CharField(max_length=100, blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     estimated_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -219,8 +471,10 @@ class ListItem(models.Model):
     ai_suggestions = models.JSONField(default=dict, blank=True)
     auto_added = models.BooleanField(default=False)  # Added by AI suggestions
     
-    # Ordering
+    # Ordering; position is a fractional key (see lists.ordering) so a move
+    # rewrites one row; order is kept for clients that still send it
     order = models.IntegerField(default=0)
+    position = models.CharField(max_length=64, default='', blank=True)
     
     # Metadata
     notes = models.TextField(blank=True, null=True)
@@ -230,20 +484,158 @@ class ListItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._remember_counter_state()
+    
+    # Server-side orderings for List.sort_by, each backed by a (list, ...) index
+    PRIORITY_RANK = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
+    SORT_ORDERINGS = {
+        'name': ['name', 'position'],
+        'created': ['created_at'],
+        'price': [F('price').asc(nulls_last=True), 'position'],
+        'quantity': ['quantity', 'position'],
+    }
+    
+    @classmethod
+    def ordering_for(cls, sort_by=None):
+        """order_by() arguments for a List.sort_by value; manual order otherwise"""
+        if sort_by == 'priority':
+            rank = Case(
+                *[When(priority=priority, then=Value(rank)) for priority, rank in cls.PRIORITY_RANK.items()],
+                default=Value(len(cls.PRIORITY_RANK))
+            )
+            return [rank, 'position']
+        return cls.SORT_ORDERINGS.get(sort_by, ['position', 'created_at'])
+    
+    @classmethod
+    def sort_key(cls, sort_by=None):
+        """Python sort key matching ordering_for(), for items already loaded"""
+        if sort_by == 'priority':
+            return lambda item: (cls.PRIORITY_RANK.get(item.priority, len(cls.PRIORITY_RANK)), item.position)
+        if sort_by == 'name':
+            return lambda item: (item.name, item.position)
+        if sort_by == 'created':
+            return lambda item: item.created_at
+        if sort_by == 'price':
+            return lambda item: (item.price is None, item.price or 0, item.position)
+        if sort_by == 'quantity':
+            return lambda item: (item.quantity or '', item.position)
+        return lambda item: (item.position, item.created_at)
+    
+    def _remember_counter_state(self):
+        """Snapshot the fields that drive the parent list's counters and derived caches"""
+        # Read through __dict__ so deferred fields are not loaded here
+        self._original_list_id = self.__dict__.get('list_id')
+        self._original_is_completed = self.__dict__.get('is_completed')
+        self._original_completed_at = self.__dict__.get('completed_at')
+        self._original_price = self.__dict__.get('price')
+        self._original_estimated_price = self.__dict__.get('estimated_price', DEFERRED)
+        self._original_category = self.__dict__.get('category')
+        self._original_quantity = self.__dict__.get('quantity')
+    
+    def original_estimated_price(self):
+        """estimated_price as last loaded or saved, loading it if it was deferred"""
+        if self._original_estimated_price is DEFERRED:
+            return self.estimated_price
+        return self._original_estimated_price
+    
+    def completion_seconds(self, completed_at=None):
+        """Seconds between creation and completion, never negative"""
+        completed_at = completed_at or self.completed_at
+        if not completed_at or not self.created_at:
+            return 0.0
+        return max(0.0, (completed_at - self.created_at).total_seconds())
+    
     def save(self, *args, **kwargs):
         if self.is_completed and not self.completed_at:
             self.completed_at = timezone.now()
         elif not self.is_completed:
             self.completed_at = None
+        adding = self._state.adding
+        if adding and not self.position:
+            self.position = List.next_positions(self.list_id, 1)[0]
         super().save(*args, **kwargs)
-        # Update parent list completion percentage
-        self.list.update_completion_percentage()
+        
+        # Update parent list counters and monthly rollups incrementally
+        user_id = self.list.user_id
+        completed = 1 if self.is_completed else 0
+        if adding:
+            List.apply_item_deltas(self.list_id, total_delta=1, completed_delta=completed)
+            ListAnalytics.record(
+                user_id, self.created_at, total_items=1, estimated_cost=as_amount(self.estimated_price)
+            )
+            ParsingContextSnapshot.invalidate(user_id, [self.list.list_type])
+            if self.is_completed:
+                ListAnalytics.record_completion(user_id, self.completed_at, self.completion_seconds())
+        elif self.list_id != self._original_list_id:
+            was_completed = 1 if self._original_is_completed else 0
+            List.apply_item_deltas(self._original_list_id, total_delta=-1, completed_delta=-was_completed)
+            List.apply_item_deltas(self.list_id, total_delta=1, completed_delta=completed)
+        elif self._original_is_completed is not None and self.is_completed != self._original_is_completed:
+            List.apply_item_deltas(self.list_id, completed_delta=1 if self.is_completed else -1)
+            if self.is_completed:
+                ListAnalytics.record_completion(user_id, self.completed_at, self.completion_seconds())
+            elif self._original_completed_at:
+                ListAnalytics.record_completion(
+                    user_id, self._original_completed_at,
+                    -self.completion_seconds(self._original_completed_at), count=-1
+                )
+        else:
+            List.touch([self.list_id])
+        if not adding and self._original_estimated_price is not DEFERRED and 'estimated_price' in self.__dict__:
+            ListAnalytics.record(user_id, self.created_at, estimated_cost=(
+                as_amount(self.estimated_price) - as_amount(self._original_estimated_price)
+            ))
+        # Feed the price index when a completed item gains a (new) price
+        if self.is_completed and self.price is not None and (
+            adding or not self._original_is_completed or self.price != self._original_price
+        ):
+            ItemPrice.record(user_id, [(self.name, self.unit, self.price)])
+        if not adding:
+            if self.list_id != self._original_list_id:
+                ParsingContextSnapshot.invalidate(user_id)
+            elif (self.category, self.quantity) != (self._original_category, self._original_quantity):
+                ParsingContextSnapshot.invalidate(user_id, [self.list.list_type])
+        
+        bump_list_data_version(user_id)
+        self._remember_counter_state()
+    
+    def delete(self, *args, **kwargs):
+        list_id = self._original_list_id or self.list_id
+        user_id = self.list.user_id
+        was_completed = 1 if self._original_is_completed else 0
+        item_id = self.pk
+        result = super().delete(*args, **kwargs)
+        List.apply_item_deltas(list_id, total_delta=-1, completed_delta=-was_completed)
+        SyncTombstone.record(user_id, 'item', [(item_id, list_id)])
+        ListAnalytics.record(
+            user_id, self.created_at, total_items=-1, estimated_cost=-as_amount(self.original_estimated_price())
+        )
+        if was_completed and self._original_completed_at:
+            ListAnalytics.record_completion(
+                user_id, self._original_completed_at,
+                -self.completion_seconds(self._original_completed_at), count=-1
+            )
+        ParsingContextSnapshot.invalidate(user_id, [self.list.list_type])
+        bump_list_data_version(user_id)
+        return result
+
+    # Keys longer than this are respaced by rebalance_item_positions
+    REBALANCE_POSITION_LENGTH = 24
+    MAX_POSITION_LENGTH = 64
 
     class Meta:
-        ordering = ['order', 'created_at']
+        ordering = ['position', 'created_at']
         indexes = [
             models.Index(fields=['list', 'is_completed']),
             models.Index(fields=['list', 'priority']),
+            models.Index(fields=['list', 'position']),
+            models.Index(fields=['list', 'name']),
+            models.Index(fields=['list', 'price']),
+            models.Index(fields=['list', 'created_at']),
+            models.Index(fields=['is_completed', 'due_date']),
+            models.Index(fields=['is_recurring', 'completed_at']),
         ]
 
 class ListActivity(models.Model):
@@ -257,15 +649,66 @@ class ListActivity(models.Model):
         ('archived', 'Archived')
     ]
     
+    # Per-item actions that compact() folds into daily summaries
+    COMPACTABLE_ACTIONS = {
+        'item_added': 'Added {count} items',
+        'item_completed': 'Completed {count} items',
+        'item_removed': 'Removed {count} items',
+    }
+    RETENTION_DAYS = 30
+    
     list = models.ForeignKey(List, on_delete=models.CASCADE, related_name='activities')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     action = models.CharField(max_length=20, choices=ACTION_TYPES)
     description = models.CharField(max_length=255)
     metadata = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['list', 'created_at'])]
+    
+    @classmethod
+    def compact(cls, before, list_ids=None):
+        """Fold per-item activities older than before into one row per list, user, action and day.
+        
+        Summary rows keep the total in metadata['count'] and are folded again
+        on later runs, so compaction is idempotent. Returns (rows removed,
+        summaries written).
+        """
+        rows = cls.objects.filter(created_at__lt=before, action__in=cls.COMPACTABLE_ACTIONS)
+        if list_ids is not None:
+            rows = rows.filter(list_id__in=list_ids)
+        
+        groups = {}
+        for row in rows.values('id', 'list_id', 'user_id', 'action', 'created_at', 'metadata').iterator():
+            key = (row['list_id'], row['user_id'], row['action'], timezone.localdate(row['created_at']))
+            group = groups.setdefault(key, {'ids': [], 'count': 0, 'last': row['created_at']})
+            group['ids'].append(row['id'])
+            metadata = row['metadata'] or {}
+            group['count'] += metadata.get('count') or metadata.get('items_count') or 1
+            group['last'] = max(group['last'], row['created_at'])
+        
+        groups = {key: group for key, group in groups.items() if len(group['ids']) > 1}
+        if not groups:
+            return 0, 0
+        
+        with transaction.atomic():
+            cls.objects.bulk_create([
+                cls(
+                    list_id=list_id,
+                    user_id=user_id,
+                    action=action,
+                    description=cls.COMPACTABLE_ACTIONS[action].format(count=group['count']),
+                    metadata={'summary': True, 'date': day.isoformat(), 'count': group['count']},
+                    created_at=group['last']
+                )
+                for (list_id, user_id, action, day), group in groups.items()
+            ])
+            removed = cls.objects.filter(
+                pk__in=[pk for group in groups.values() for pk in group['ids']]
+            ).delete()[0]
+        return removed, len(groups)
 
 class TemplateItem(models.Model):
     """Items that belong to a list template"""
@@ -292,13 +735,22 @@ class TemplateItem(models.Model):
         ordering = ['created_at']
 
 class ListAnalytics(models.Model):
-    """Analytics data for lists"""
+    """Analytics data for lists
+    
+    Monthly per-user rollups. total_lists, completed_lists (lists with all
+    items completed), total_items and estimated_cost are bucketed by
+    creation month, completed_items and total_completion_seconds by
+    completion month. Rows are updated incrementally on writes and can be
+    rebuilt from source rows with the rebuild_list_analytics command.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     month = models.DateField()
     total_lists = models.IntegerField(default=0)
     completed_lists = models.IntegerField(default=0)
     total_items = models.IntegerField(default=0)
     completed_items = models.IntegerField(default=0)
+    total_completion_seconds = models.FloatField(default=0.0)
+    estimated_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     average_completion_time = models.DurationField(null=True, blank=True)
     most_used_category = models.CharField(max_length=50, blank=True, null=True)
     productivity_score = models.FloatField(default=0.0)
@@ -306,4 +758,331 @@ class ListAnalytics(models.Model):
     
     class Meta:
         unique_together = ['user', 'month']
-        ordering = ['-month']
\ No newline at end of file
+        ordering = ['-month']
+    
+    @staticmethod
+    def month_for(when):
+        """First day of the (local) month containing a datetime or date"""
+        if hasattr(when, 'hour'):
+            when = timezone.localtime(when) if timezone.is_aware(when) else when
+            when = when.date()
+        return when.replace(day=1)
+    
+    @classmethod
+    def record(cls, user_id, when, **deltas):
+        """Add counter deltas to the user's rollup row for the month of `when`"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas or when is None:
+            return
+        
+        month = cls.month_for(when)
+        rows = cls.objects.filter(user_id=user_id, month=month)
+        expressions = {field: F(field) + delta for field, delta in deltas.items()}
+        if rows.update(**expressions):
+            return
+        
+        try:
+            with transaction.atomic():
+                cls.objects.create(user_id=user_id, month=month, **deltas)
+        except IntegrityError:
+            # Created concurrently; apply the deltas to the winning row
+            rows.update(**expressions)
+    
+    @classmethod
+    def record_completion(cls, user_id, completed_at, seconds, count=1):
+        cls.record(user_id, completed_at, completed_items=count, total_completion_seconds=seconds)
+    
+    @classmethod
+    def record_deleted(cls, items, lists=()):
+        """Take deleted items and lists out of their months' rollups.
+        
+        items are rows with list__user_id, is_completed, created_at,
+        completed_at and estimated_price; lists are (user_id, created_at,
+        completed) tuples. Deltas are grouped so each affected month is
+        updated once.
+        """
+        rollups = defaultdict(lambda: defaultdict(int))
+        for user_id, created_at, completed in lists:
+            rollup = rollups[(user_id, cls.month_for(created_at))]
+            rollup['total_lists'] -= 1
+            rollup['completed_lists'] -= completed
+        for row in items:
+            user_id = row['list__user_id']
+            rollup = rollups[(user_id, cls.month_for(row['created_at']))]
+            rollup['total_items'] -= 1
+            rollup['estimated_cost'] -= as_amount(row['estimated_price'])
+            if row['is_completed'] and row['completed_at']:
+                rollup = rollups[(user_id, cls.month_for(row['completed_at']))]
+                rollup['completed_items'] -= 1
+                rollup['total_completion_seconds'] -= max(
+                    0.0, (row['completed_at'] - row['created_at']).total_seconds()
+                )
+        for (user_id, month), deltas in rollups.items():
+            cls.record(user_id, month, **deltas)
+    
+    @property
+    def average_completion_hours(self):
+        if not self.completed_items:
+            return 0
+        return self.total_completion_seconds / self.completed_items / 3600
+
+class PurchaseProfile(models.Model):
+    """Per-user basket history and co-purchase statistics for suggestions
+    
+    baskets maps list id -> {'list_type', 'date', 'items'}; stats holds, per
+    list type, item frequencies, pair co-occurrence counts and the dates
+    each item appeared. Maintained by lists.suggestions.CoPurchaseService.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='purchase_profile')
+    baskets = models.JSONField(default=dict, blank=True)
+    stats = models.JSONField(default=dict, blank=True)
+    built_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Purchase profile - {self.user.username}"
+
+
+class ItemPrice(models.Model):
+    """Rolling price history for an item name and unit
+    
+    One row per user plus a global row (user is null) aggregated across all
+    users. User rows are fed incrementally from completed, priced list
+    items; global rows are rebuilt by the rebuild_price_index command, so
+    item saves never contend on rows shared by every user.
+    """
+    PRICE_WINDOW = 15
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    name_key = models.CharField(max_length=200)
+    unit = models.CharField(max_length=20, blank=True, default='')
+    recent_prices = models.JSONField(default=list, blank=True)
+    median_price = models.DecimalField(max_digits=10, decimal_places=2)
+    last_price = models.DecimalField(max_digits=10, decimal_places=2)
+    sample_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name_key', 'unit'], name='unique_user_item_price'),
+            models.UniqueConstraint(
+                fields=['name_key', 'unit'], condition=Q(user__isnull=True), name='unique_global_item_price'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['name_key', 'unit']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name_key} ({self.unit or 'each'}) - {self.median_price}"
+    
+    @staticmethod
+    def key_for(name, unit=None):
+        return normalize_item_name(name), normalize_item_name(unit)[:20]
+    
+    def add_price(self, price):
+        """Push a price into the rolling window and refresh the median"""
+        prices = (self.recent_prices + [str(price)])[-self.PRICE_WINDOW:]
+        ordered = sorted(Decimal(value) for value in prices)
+        middle = len(ordered) // 2
+        median = ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+        
+        self.recent_prices = prices
+        self.median_price = median.quantize(Decimal('0.01'))
+        self.last_price = price
+        self.sample_count += 1
+        self.updated_at = timezone.now()
+    
+    @classmethod
+    def record(cls, user_id, observations):
+        """Fold (name, unit, price) observations into the user's rows
+        
+        Existing rows for the batch are read in one query and written back
+        with bulk_update/bulk_create.
+        """
+        by_key = {}
+        for name, unit, price in observations:
+            if price is None or not name:
+                continue
+            by_key.setdefault(cls.key_for(name, unit), []).append(Decimal(str(price)))
+        if not by_key:
+            return
+        
+        with transaction.atomic():
+            rows = cls.objects.select_for_update().filter(user_id=user_id)
+            existing = {
+                (row.name_key, row.unit): row
+                for row in rows.filter(name_key__in={name_key for name_key, _ in by_key})
+            }
+            to_create, to_update = [], []
+            for (name_key, unit), prices in by_key.items():
+                row = existing.get((name_key, unit))
+                if row is None:
+                    row = cls(user_id=user_id, name_key=name_key, unit=unit, recent_prices=[])
+                    to_create.append(row)
+                else:
+                    to_update.append(row)
+                for price in prices:
+                    row.add_price(price)
+            
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create(to_create)
+            except IntegrityError:
+                # Created concurrently; fold the prices into the winning rows
+                winners = {
+                    (row.name_key, row.unit): row
+                    for row in rows.filter(name_key__in={row.name_key for row in to_create})
+                }
+                missing = []
+                for row in to_create:
+                    winner = winners.get((row.name_key, row.unit))
+                    if winner is None:
+                        missing.append(row)
+                        continue
+                    for price in by_key[(row.name_key, row.unit)]:
+                        winner.add_price(price)
+                    to_update.append(winner)
+                cls.objects.bulk_create(missing)
+            cls.objects.bulk_update(
+                to_update, ['recent_prices', 'median_price', 'last_price', 'sample_count', 'updated_at']
+            )
+    
+    @classmethod
+    def rebuild_global(cls, observations):
+        """Replace the global rows from (name, unit, price) observations, oldest first; returns rows written"""
+        rows = {}
+        for name, unit, price in observations:
+            if price is None or not name:
+                continue
+            key = cls.key_for(name, unit)
+            if key not in rows:
+                rows[key] = cls(user=None, name_key=key[0], unit=key[1], recent_prices=[])
+            rows[key].add_price(Decimal(str(price)))
+        
+        with transaction.atomic():
+            cls.objects.filter(user__isnull=True).delete()
+            cls.objects.bulk_create(rows.values(), batch_size=500)
+        return len(rows)
+    
+    @classmethod
+    def lookup_many(cls, user_id, items):
+        """Price stats for (name, unit) pairs, preferring the user's own history
+        
+        Falls back from the user's exact unit to any of their units, then to
+        the global rows. Returns a list aligned with items; entries are None
+        when no history exists.
+        """
+        keys = [cls.key_for(name, unit) for name, unit in items]
+        rows = cls.objects.filter(name_key__in={name_key for name_key, _ in keys})
+        rows = rows.filter(Q(user_id=user_id) | Q(user__isnull=True)) if user_id else rows.filter(user__isnull=True)
+        
+        exact, any_unit = {}, {}
+        for row in rows.order_by('-sample_count'):
+            owner = 'user' if row.user_id else 'global'
+            exact[(owner, row.name_key, row.unit)] = row
+            any_unit.setdefault((owner, row.name_key), row)
+        
+        results = []
+        for name_key, unit in keys:
+            row = (
+                exact.get(('user', name_key, unit)) or any_unit.get(('user', name_key))
+                or exact.get(('global', name_key, unit)) or any_unit.get(('global', name_key))
+            )
+            results.append(None if row is None else {
+                'median_price': row.median_price,
+                'last_price': row.last_price,
+                'sample_count': row.sample_count,
+                'source': 'user' if row.user_id else 'global',
+            })
+        return results
+    
+    @classmethod
+    def estimate_many(cls, user_id, items):
+        """Median price estimates for (name, unit) pairs, None when unknown"""
+        return [stats and stats['median_price'] for stats in cls.lookup_many(user_id, items)]
+
+
+class SyncTombstone(models.Model):
+    """Record of a deleted list or item, so delta sync can report deletions
+    
+    Rows older than RETENTION_DAYS are pruned; clients with an older cursor
+    must do a full sync.
+    """
+    RETENTION_DAYS = 30
+    OBJECT_TYPES = [
+        ('list', 'List'),
+        ('item', 'Item')
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_tombstones')
+    object_type = models.CharField(max_length=10, choices=OBJECT_TYPES)
+    object_id = models.CharField(max_length=25)
+    list_id = models.CharField(max_length=25)
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at']),
+            models.Index(fields=['list_id', 'deleted_at']),
+        ]
+    
+    @classmethod
+    def record(cls, user_id, object_type, deleted):
+        """Store tombstones for (object_id, list_id) pairs"""
+        now = timezone.now()
+        return cls.objects.bulk_create([
+            cls(user_id=user_id, object_type=object_type, object_id=object_id, list_id=list_id, deleted_at=now)
+            for object_id, list_id in deleted
+        ])
+    
+    @classmethod
+    def prune(cls):
+        """Delete tombstones past the retention window"""
+        cutoff = timezone.now() - timedelta(days=cls.RETENTION_DAYS)
+        return cls.objects.filter(deleted_at__lt=cutoff).delete()[0]
+
+
+class ListImportJob(models.Model):
+    """A list import and its progress
+    
+    Small imports run inline; large ones are stored here as pending and
+    processed by the run_list_imports command, which updates
+    processed_items, list_ids and heartbeat_at after every chunk so clients
+    can poll for progress and stalled jobs can be reclaimed. Uploaded files
+    are kept in file and parsed from there; content holds pasted text.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed')
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='list_imports')
+    format = models.CharField(max_length=10)
+    list_name = models.CharField(max_length=100, blank=True, default='')
+    list_type = models.CharField(max_length=20, choices=List.LIST_TYPES, default='checklist')
+    content = models.TextField(blank=True, default='')
+    file = models.FileField(upload_to='list_imports/', blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    total_items = models.PositiveIntegerField(null=True, blank=True)
+    processed_items = models.PositiveIntegerField(default=0)
+    list_ids = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+    
+    def __str__(self):
+        return f"Import {self.pk} ({self.status}) - {self.user.username}"
+    
+    @property
+    def progress(self):
+        if not self.total_items:
+            return 100.0 if self.status == 'completed' else 0.0
+        return round(min(100.0, self.processed_items * 100 / self.total_items), 1)
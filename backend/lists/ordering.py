@@ -0,0 +1,70 @@
+# lists/ordering.py
+
+"""Fractional order keys for list items.
+
+Keys are base-36 strings compared lexicographically. They use digits
+and lowercase letters only, so locale collations order them the same way
+Python does. A key can always be generated between any two others, so
+moving an item only rewrites that item's key. Keys never end in the
+lowest digit, which keeps room below every key. Repeated inserts at the
+same spot make keys longer; lists are rebalanced to short, evenly spaced
+keys when that happens.
+"""
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+_VALUE = {digit: index for index, digit in enumerate(DIGITS)}
+
+
+def key_between(before=None, after=None):
+    """A key sorting strictly between before and after; None means open-ended"""
+    before = before or ''
+    if after is not None and before >= after:
+        raise ValueError(f'Order key {before!r} must sort before {after!r}')
+    return _midpoint(before, after)
+
+
+def _midpoint(low, high):
+    if high is not None:
+        # Copy the shared prefix, treating missing digits of low as zero
+        common = 0
+        while common < len(high) and (low[common] if common < len(low) else DIGITS[0]) == high[common]:
+            common += 1
+        if common:
+            return high[:common] + _midpoint(low[common:], high[common:])
+
+    low_digit = _VALUE[low[0]] if low else 0
+    high_digit = _VALUE[high[0]] if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit + 1) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def keys_between(before, after, count):
+    """count ascending keys between before and after, kept as short as possible"""
+    if count <= 0:
+        return []
+    if count == 1:
+        return [key_between(before, after)]
+    middle = key_between(before, after)
+    half = count // 2
+    return keys_between(before, middle, half) + [middle] + keys_between(middle, after, count - half - 1)
+
+
+def spread_keys(count):
+    """count evenly spaced keys of equal length, used when rebalancing a list"""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+    keys = []
+    for index in range(1, count + 1):
+        value = index * step
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip(DIGITS[0]) or DIGITS[1])
+    return keys
@@ -0,0 +1,101 @@
+# lists/recurring.py
+
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import bump_list_data_version
+from .models import List, ListItem, ListActivity
+
+
+def advance(value, frequency, periods=1):
+    """value moved forward by whole recurrence periods; months keep the day, clamped to month end"""
+    if frequency == 'daily':
+        return value + timedelta(days=periods)
+    if frequency == 'weekly':
+        return value + timedelta(weeks=periods)
+    month_index = value.month - 1 + periods
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+class RecurringItemScheduler:
+    """Reopens completed recurring items once their next occurrence is due.
+
+    An item is due one period after it was completed. Due items are reset
+    to pending in place and their due_date, if any, is rolled forward past
+    now. Lists are processed LIST_CHUNK_SIZE at a time across all users;
+    each list gets one counter update and one activity however many of its
+    items were reopened.
+    """
+
+    LIST_CHUNK_SIZE = 500
+    FREQUENCIES = ('daily', 'weekly', 'monthly')
+
+    def due_items(self, now=None):
+        """Completed recurring items whose next occurrence is at or before now"""
+        now = now or timezone.now()
+        due = Q()
+        for frequency in self.FREQUENCIES:
+            due |= Q(recurring_frequency=frequency, completed_at__lte=advance(now, frequency, -1))
+        return ListItem.objects.filter(due, is_recurring=True, is_completed=True)
+
+    def regenerate(self, now=None, chunk_size=None):
+        """Reset every due item; returns (items reset, lists changed)"""
+        now = now or timezone.now()
+        chunk_size = chunk_size or self.LIST_CHUNK_SIZE
+        list_ids = list(
+            self.due_items(now).order_by('list_id').values_list('list_id', flat=True).distinct()
+        )
+
+        items_reset = lists_changed = 0
+        for start in range(0, len(list_ids), chunk_size):
+            chunk_items, chunk_lists = self._reset_lists(list_ids[start:start + chunk_size], now)
+            items_reset += chunk_items
+            lists_changed += chunk_lists
+        return items_reset, lists_changed
+
+    def _reset_lists(self, list_ids, now):
+        with transaction.atomic():
+            items = list(
+                self.due_items(now).filter(list_id__in=list_ids).select_for_update().only(
+                    'id', 'list_id', 'recurring_frequency', 'due_date'
+                )
+            )
+            if not items:
+                return 0, 0
+
+            per_list = defaultdict(int)
+            for item in items:
+                item.is_completed = False
+                item.completed_at = None
+                item.completed_by = None
+                item.updated_at = now
+                if item.due_date:
+                    while item.due_date <= now:
+                        item.due_date = advance(item.due_date, item.recurring_frequency)
+                per_list[item.list_id] += 1
+            ListItem.objects.bulk_update(
+                items, ['is_completed', 'completed_at', 'completed_by', 'due_date', 'updated_at'], batch_size=500
+            )
+
+            owners = dict(List.objects.filter(pk__in=per_list).values_list('id', 'user_id'))
+            for list_id, count in per_list.items():
+                List.apply_item_deltas(list_id, completed_delta=-count)
+            ListActivity.objects.bulk_create([
+                ListActivity(
+                    list_id=list_id,
+                    user_id=owners[list_id],
+                    action='updated',
+                    description=f'Reopened {count} recurring items',
+                    metadata={'source': 'recurring', 'items_count': count}
+                )
+                for list_id, count in per_list.items()
+            ])
+
+        for user_id in set(owners.values()):
+            bump_list_data_version(user_id)
+        return len(items), len(per_list)
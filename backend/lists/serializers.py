@@ -2,11 +2,15 @@
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import Sum
 from .models import (
     List, ListItem, ListTemplate, ListCategory, 
     ListActivity
 )
 
+# Number of activities embedded in a list response
+RECENT_ACTIVITY_LIMIT = 10
+
 class ListCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = ListCategory
@@ -22,10 +26,19 @@ class ListItemSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'quantity', 'unit', 'priority',
             'category', 'brand', 'price', 'estimated_price', 'is_completed',
             'completed_at', 'completed_by', 'completed_by_name', 'is_recurring',
-            'recurring_frequency', 'order', 'notes', 'url', 'image_url',
+            'recurring_frequency', 'order', 'position', 'notes', 'url', 'image_url',
             'auto_added', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'completed_at', 'completed_by', 'completed_by_name', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'completed_at', 'completed_by', 'completed_by_name', 'position', 'created_at', 'updated_at'
+        ]
+
+class SyncItemSerializer(ListItemSerializer):
+    """List item with its list id, for delta sync payloads"""
+    
+    class Meta(ListItemSerializer.Meta):
+        fields = ListItemSerializer.Meta.fields + ['list']
+        read_only_fields = fields
 
 class ListTemplateSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
@@ -51,11 +64,51 @@ class ListActivitySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'user_name', 'created_at']
 
-class ListSerializer(serializers.ModelSerializer):
-    items = ListItemSerializer(many=True, read_only=True)
+class ListAggregatesMixin:
+    """Counts and totals shared by the list serializers.
+
+    Prefers the aggregates annotated by ListViewSet and falls back to
+    per-list queries for instances loaded elsewhere.
+    """
+
+    def get_items_count(self, obj):
+        if hasattr(obj, 'items_count'):
+            return obj.items_count
+        return obj.items.count()
+    
+    def get_completed_items_count(self, obj):
+        if hasattr(obj, 'completed_items_count'):
+            return obj.completed_items_count
+        return obj.items.filter(is_completed=True).count()
+    
+    def get_pending_items_count(self, obj):
+        if hasattr(obj, 'pending_items_count'):
+            return obj.pending_items_count
+        return obj.items.filter(is_completed=False).count()
+    
+    def get_total_estimated_cost(self, obj):
+        if hasattr(obj, 'total_estimated_cost'):
+            total = obj.total_estimated_cost
+        else:
+            total = obj.items.filter(estimated_price__isnull=False).aggregate(
+                total=Sum('estimated_price')
+            )['total']
+        return float(total) if total else 0.0
+    
+    def get_total_actual_cost(self, obj):
+        if hasattr(obj, 'total_actual_cost'):
+            total = obj.total_actual_cost
+        else:
+            total = obj.items.filter(price__isnull=False).aggregate(
+                total=Sum('price')
+            )['total']
+        return float(total) if total else 0.0
+
+class ListSerializer(ListAggregatesMixin, serializers.ModelSerializer):
+    items = serializers.SerializerMethodField()
     category_details = ListCategorySerializer(source='category', read_only=True)
     template_details = ListTemplateSerializer(source='template', read_only=True)
-    recent_activities = ListActivitySerializer(source='activities', many=True, read_only=True)
+    recent_activities = serializers.SerializerMethodField()
     
     # Allow category to be sent as string and convert to foreign key
     category = serializers.CharField(required=False, allow_blank=True, allow_null=True)
@@ -75,40 +128,29 @@ class ListSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'list_type', 'category', 'category_details',
             'priority', 'template', 'template_details', 'auto_sort',
             'sort_by', 'due_date', 'is_archived', 'completion_percentage',
-            'ai_suggestions', 'estimated_cost', 'actual_cost', 'budget', 'created_at',
-            'updated_at', 'items', 'recent_activities',
+            'ai_suggestions', 'estimated_cost', 'actual_cost', 'budget', 'expense_converted_at',
+            'created_at', 'updated_at', 'items', 'recent_activities',
             'items_count', 'completed_items_count', 'pending_items_count',
             'total_estimated_cost', 'total_actual_cost', 'category_name', 'is_favorite'
         ]
         read_only_fields = [
-            'id', 'completion_percentage', 'created_at', 'updated_at',
+            'id', 'completion_percentage', 'expense_converted_at', 'created_at', 'updated_at',
             'items', 'recent_activities', 'items_count',
             'completed_items_count', 'pending_items_count', 'total_estimated_cost',
             'total_actual_cost', 'category_name', 'is_favorite'
         ]
     
-    def get_items_count(self, obj):
-        return obj.items.count()
-    
-    def get_completed_items_count(self, obj):
-        return obj.items.filter(is_completed=True).count()
-    
-    def get_pending_items_count(self, obj):
-        return obj.items.filter(is_completed=False).count()
-    
-    def get_total_estimated_cost(self, obj):
-        from django.db.models import Sum
-        total = obj.items.filter(estimated_price__isnull=False).aggregate(
-            total=Sum('estimated_price')
-        )['total']
-        return float(total) if total else 0.0
+    def get_items(self, obj):
+        items = obj.items.all()
+        if obj.auto_sort:
+            items = sorted(items, key=ListItem.sort_key(obj.sort_by))
+        return ListItemSerializer(items, many=True).data
     
-    def get_total_actual_cost(self, obj):
-        from django.db.models import Sum
-        total = obj.items.filter(price__isnull=False).aggregate(
-            total=Sum('price')
-        )['total']
-        return float(total) if total else 0.0
+    def get_recent_activities(self, obj):
+        activities = getattr(obj, 'recent_activity_list', None)
+        if activities is None:
+            activities = obj.activities.select_related('user')[:RECENT_ACTIVITY_LIMIT]
+        return ListActivitySerializer(activities, many=True).data
     
     def get_category_name(self, obj):
         return obj.category.name if obj.category else None
@@ -159,26 +201,30 @@ class ListSerializer(serializers.ModelSerializer):
         return instance
 
 # Simplified serializers for list views
-class ListSummarySerializer(serializers.ModelSerializer):
+class ListSummarySerializer(ListAggregatesMixin, serializers.ModelSerializer):
     """Lightweight serializer for list summaries"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_color = serializers.CharField(source='category.color', read_only=True)
     items_count = serializers.SerializerMethodField()
     completed_items_count = serializers.SerializerMethodField()
+    pending_items_count = serializers.SerializerMethodField()
+    total_estimated_cost = serializers.SerializerMethodField()
+    total_actual_cost = serializers.SerializerMethodField()
     
     class Meta:
         model = List
         fields = [
-            'id', 'name', 'list_type', 'priority', 'completion_percentage',
-            'is_archived', 'due_date', 'created_at', 'updated_at',
-            'category_name', 'category_color', 'items_count', 'completed_items_count'
+            'id', 'name', 'description', 'list_type', 'priority', 'completion_percentage',
+            'is_archived', 'due_date', 'budget', 'created_at', 'updated_at',
+            'category_name', 'category_color', 'items_count', 'completed_items_count',
+            'pending_items_count', 'total_estimated_cost', 'total_actual_cost'
         ]
+
+class SyncListSerializer(ListSummarySerializer):
+    """List summary with the version used for sync ETags"""
     
-    def get_items_count(self, obj):
-        return obj.items.count()
-    
-    def get_completed_items_count(self, obj):
-        return obj.items.filter(is_completed=True).count()
+    class Meta(ListSummarySerializer.Meta):
+        fields = ListSummarySerializer.Meta.fields + ['version']
 
 class BulkOperationSerializer(serializers.Serializer):
     """Serializer for bulk operations"""
@@ -231,7 +277,7 @@ class ListExportSerializer(serializers.Serializer):
         child=serializers.CharField()
     )
     format = serializers.ChoiceField(
-        choices=['csv', 'json', 'pdf'],
+        choices=['csv', 'json', 'ndjson', 'pdf'],
         default='csv'
     )
     include_completed = serializers.BooleanField(default=True)
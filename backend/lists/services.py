@@ -1,12 +1,18 @@
 # lists/services.py
 
 import os
+import copy
+import heapq
 import json
+import hashlib
 import logging
+from collections import defaultdict
+from itertools import islice
 from datetime import datetime, timedelta
 from decimal import Decimal
 from django.db import transaction
 from django.db.models import Q, Count, Sum, Avg, F
+from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.cache import cache
@@ -14,11 +20,199 @@ import google.generativeai as genai
 
 from .models import (
     List, ListItem, ListTemplate, ListCategory, 
-    ListActivity, ListAnalytics
+    ListActivity, ListAnalytics, ItemPrice, SyncTombstone
 )
+from .cache import get_list_data_version, bump_list_data_version, get_agenda_version, ParsingContextSnapshot
+from .categorizer import ItemCategorizer
 
 logger = logging.getLogger(__name__)
 
+
+def set_items_completed(items, completed, user=None):
+    """Toggle completion for a queryset of items with one UPDATE per list.
+    
+    Items already in the requested state are left untouched. Returns the
+    number of items whose state changed.
+    """
+    changed = items.exclude(is_completed=completed)
+    rows = list(changed.values(
+        'list_id', 'list__user_id', 'created_at', 'completed_at', 'name', 'unit', 'price'
+    ))
+    if not rows:
+        return 0
+    
+    now = timezone.now()
+    if completed:
+        changed.update(is_completed=True, completed_at=now, completed_by=user, updated_at=now)
+    else:
+        changed.update(is_completed=False, completed_at=None, completed_by=None, updated_at=now)
+    
+    per_list = defaultdict(int)
+    for row in rows:
+        per_list[row['list_id']] += 1
+    delta_sign = 1 if completed else -1
+    for list_id, count in per_list.items():
+        List.apply_item_deltas(list_id, completed_delta=delta_sign * count)
+    
+    # Completions are rolled up into the month they happened in
+    rollups = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        completed_at = now if completed else row['completed_at']
+        if not completed_at:
+            continue
+        seconds = max(0.0, (completed_at - row['created_at']).total_seconds())
+        rollup = rollups[(row['list__user_id'], ListAnalytics.month_for(completed_at))]
+        rollup[0] += delta_sign
+        rollup[1] += delta_sign * seconds
+    for (user_id, month), (count, seconds) in rollups.items():
+        ListAnalytics.record_completion(user_id, month, seconds, count=count)
+    
+    if completed:
+        observations = defaultdict(list)
+        for row in rows:
+            if row['price'] is not None:
+                observations[row['list__user_id']].append((row['name'], row['unit'], row['price']))
+        for user_id, user_observations in observations.items():
+            ItemPrice.record(user_id, user_observations)
+    
+    for user_id in {row['list__user_id'] for row in rows}:
+        bump_list_data_version(user_id)
+    return len(rows)
+
+
+def delete_items(items):
+    """Delete a queryset of items and shift list counters with one UPDATE per list"""
+    rows = list(items.values(
+        'id', 'list_id', 'list__user_id', 'list__list_type', 'is_completed', 'created_at', 'completed_at',
+        'estimated_price'
+    ))
+    items.delete()
+    
+    tombstones = defaultdict(list)
+    for row in rows:
+        tombstones[row['list__user_id']].append((row['id'], row['list_id']))
+    for user_id, deleted in tombstones.items():
+        SyncTombstone.record(user_id, 'item', deleted)
+    
+    per_list = defaultdict(lambda: [0, 0])
+    for row in rows:
+        counts = per_list[row['list_id']]
+        counts[0] += 1
+        counts[1] += 1 if row['is_completed'] else 0
+    for list_id, (total, completed) in per_list.items():
+        List.apply_item_deltas(list_id, total_delta=-total, completed_delta=-completed)
+    ListAnalytics.record_deleted(rows)
+    
+    list_types = defaultdict(set)
+    for row in rows:
+        list_types[row['list__user_id']].add(row['list__list_type'])
+    for user_id, types in list_types.items():
+        ParsingContextSnapshot.invalidate(user_id, types)
+        bump_list_data_version(user_id)
+    return len(rows)
+
+
+def delete_lists(lists):
+    """Delete a queryset of lists with their items, taking both out of the analytics rollups"""
+    list_rows = list(lists.values_list('id', 'user_id', 'created_at', 'list_type'))
+    item_rows = list(ListItem.objects.filter(list__in=lists).values(
+        'list_id', 'list__user_id', 'is_completed', 'created_at', 'completed_at', 'estimated_price'
+    ))
+    lists.delete()
+    
+    counts = defaultdict(lambda: [0, 0])
+    for row in item_rows:
+        counts[row['list_id']][0] += 1
+        counts[row['list_id']][1] += 1 if row['is_completed'] else 0
+    
+    tombstones = defaultdict(list)
+    list_types = defaultdict(set)
+    for list_id, user_id, _, list_type in list_rows:
+        tombstones[user_id].append((list_id, list_id))
+        list_types[user_id].add(list_type)
+    for user_id, deleted in tombstones.items():
+        SyncTombstone.record(user_id, 'list', deleted)
+    ListAnalytics.record_deleted(item_rows, [
+        (user_id, created_at, List.is_complete(*counts[list_id])) for list_id, user_id, created_at, _ in list_rows
+    ])
+    
+    for user_id, types in list_types.items():
+        ParsingContextSnapshot.invalidate(user_id, types)
+        bump_list_data_version(user_id)
+    return len(list_rows)
+
+
+BUCKET_TRUNCATORS = {
+    'day': TruncDate,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _bucket_start(value, granularity):
+    """Align a date to the start of its day, ISO week or month"""
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def _next_bucket(value, granularity):
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    if granularity == 'month':
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+
+def completion_time_buckets(user, start_date, end_date, granularity='day'):
+    """Completed item counts and average completion durations per time bucket.
+    
+    Runs a single grouped query over the user's completed items and fills
+    empty buckets with zeros, so callers get one row per day, week or month
+    between start_date and end_date.
+    """
+    if granularity not in BUCKET_TRUNCATORS:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    
+    rows = ListItem.objects.filter(
+        list__user=user,
+        is_completed=True,
+        completed_at__gte=start_date,
+        completed_at__lte=end_date
+    ).annotate(
+        bucket=BUCKET_TRUNCATORS[granularity]('completed_at')
+    ).values('bucket').annotate(
+        completed=Count('id'),
+        average_duration=Avg(F('completed_at') - F('created_at'))
+    ).order_by('bucket')
+    
+    by_bucket = {}
+    for row in rows:
+        bucket = row['bucket']
+        if isinstance(bucket, datetime):
+            bucket = timezone.localtime(bucket).date() if timezone.is_aware(bucket) else bucket.date()
+        by_bucket[bucket] = row
+    
+    buckets = []
+    current = _bucket_start(timezone.localtime(start_date).date(), granularity)
+    last = timezone.localtime(end_date).date()
+    while current <= last:
+        row = by_bucket.get(current)
+        average_duration = row['average_duration'] if row else None
+        buckets.append({
+            'date': current,
+            'completed_items': row['completed'] if row else 0,
+            'average_completion_hours': average_duration.total_seconds() / 3600 if average_duration else 0
+        })
+        current = _next_bucket(current, granularity)
+    
+    return buckets
+
+INSIGHT_SECTIONS = ('insights', 'predictions', 'motivational_message')
+
+
 class GeminiAI:
     """Enhanced Gemini AI service for natural language processing"""
     
@@ -39,18 +233,35 @@ class GeminiAI:
             self.ai_available = False
             self.model = None
 
-    def get_productivity_insights(self, user_data):
-        """Generate AI insights using Gemini"""
-        if not self.ai_available:
-            return [{
-                "type": "info",
-                "title": "Keep Building Momentum",
-                "description": "Consistency is key to productivity success. Small daily progress adds up!",
-                "priority": "medium"
-            }]
-        
-        try:
-            prompt = f"""
+    FALLBACK_INSIGHTS = [{
+        "type": "info",
+        "title": "Keep Building Momentum",
+        "description": "Consistency is key to productivity success. Small daily progress adds up!",
+        "priority": "medium"
+    }]
+    FALLBACK_PREDICTIONS = {
+        "next_week_completion": "75%",
+        "optimal_task_time": "Morning hours work best",
+        "productivity_boost": "+10%",
+        "recommendation": "Stay consistent with your routine"
+    }
+    
+    @staticmethod
+    def fallback_motivation(completion_rate):
+        if completion_rate >= 80:
+            return "🎉 Amazing progress! You're crushing your goals!"
+        elif completion_rate >= 60:
+            return "💪 Great work! Keep the momentum going!"
+        return "🌟 Every step forward counts! You've got this!"
+    
+    @staticmethod
+    def _parse_json(text):
+        return json.loads(text.strip().replace('```json', '').replace('```', ''))
+    
+    # Task descriptions shared by the single calls and get_insights_bundle
+    
+    def _insights_task(self, user_data):
+        return f"""
             Analyze this user's productivity data and provide 3-4 actionable insights:
             
             User Data:
@@ -60,16 +271,12 @@ class GeminiAI:
             - Total Items: {user_data.get('total_items', 0)}
             - Completed Items: {user_data.get('completed_items', 0)}
             
-            Provide insights in this JSON format:
+            Each insight looks like:
             {{
-                "insights": [
-                    {{
-                        "type": "success|warning|info|tip",
-                        "title": "Short title",
-                        "description": "Actionable insight description",
-                        "priority": "high|medium|low"
-                    }}
-                ]
+                "type": "success|warning|info|tip",
+                "title": "Short title",
+                "description": "Actionable insight description",
+                "priority": "high|medium|low"
             }}
             
             Focus on:
@@ -80,19 +287,52 @@ class GeminiAI:
             
             Keep descriptions under 100 characters and make them encouraging.
             """
+    
+    def _predictions_task(self, user_data):
+        return f"""
+            Based on this productivity data, predict next week's performance:
+            
+            Current Data:
+            - Completion Rate: {user_data.get('completion_rate', 0)}%
+            - Recent Trend: {user_data.get('trend', 'stable')}
+            - Activity Level: {user_data.get('activity', 'medium')}
+            
+            The prediction looks like:
+            {{
+                "next_week_completion": "85%",
+                "optimal_task_time": "Morning hours (9-11 AM)",
+                "productivity_boost": "+12%",
+                "recommendation": "Focus on morning productivity"
+            }}
+            """
+    
+    def _motivation_task(self, completion_rate, recent_activity):
+        return f"""
+            Generate a short, encouraging message for a user with:
+            - Completion Rate: {completion_rate}%
+            - Recent Activity: {recent_activity}
+            
+            Keep it under 80 characters.
+            Make it personal, positive, and motivating. Use emojis appropriately.
+            """
+    
+    def get_productivity_insights(self, user_data):
+        """Generate AI insights using Gemini"""
+        if not self.ai_available:
+            return copy.deepcopy(self.FALLBACK_INSIGHTS)
+        
+        try:
+            prompt = self._insights_task(user_data) + """
+            Respond with JSON: {"insights": [<insight>, ...]}
+            """
             
             response = self.model.generate_content(prompt)
-            result = json.loads(response.text)
+            result = self._parse_json(response.text)
             return result.get('insights', [])
             
         except Exception as e:
             logger.error(f"Gemini insights failed: {e}")
-            return [{
-                "type": "info",
-                "title": "Keep Building Momentum",
-                "description": "Consistency is key to productivity success. Small daily progress adds up!",
-                "priority": "medium"
-            }]
+            return copy.deepcopy(self.FALLBACK_INSIGHTS)
 
     def suggest_list_items(self, list_name, list_type, context=""):
         """Generate smart item suggestions using Gemini"""
@@ -198,21 +438,11 @@ class GeminiAI:
     def generate_motivational_message(self, completion_rate, recent_activity):
         """Generate personalized motivational messages"""
         if not self.ai_available:
-            if completion_rate >= 80:
-                return "🎉 Amazing progress! You're crushing your goals!"
-            elif completion_rate >= 60:
-                return "💪 Great work! Keep the momentum going!"
-            else:
-                return "🌟 Every step forward counts! You've got this!"
+            return self.fallback_motivation(completion_rate)
         
         try:
-            prompt = f"""
-            Generate a short, encouraging message for a user with:
-            - Completion Rate: {completion_rate}%
-            - Recent Activity: {recent_activity}
-            
-            Return just the message text (no JSON), keep it under 80 characters.
-            Make it personal, positive, and motivating. Use emojis appropriately.
+            prompt = self._motivation_task(completion_rate, recent_activity) + """
+            Return just the message text (no JSON).
             """
             
             response = self.model.generate_content(prompt)
@@ -220,53 +450,112 @@ class GeminiAI:
             
         except Exception as e:
             logger.error(f"Gemini motivation failed: {e}")
-            if completion_rate >= 80:
-                return "🎉 Amazing progress! You're crushing your goals!"
-            elif completion_rate >= 60:
-                return "💪 Great work! Keep the momentum going!"
-            else:
-                return "🌟 Every step forward counts! You've got this!"
+            return self.fallback_motivation(completion_rate)
     
     def get_productivity_predictions(self, user_data):
         """Generate AI predictions for productivity trends"""
         if not self.ai_available:
-            return {
-                "next_week_completion": "75%",
-                "optimal_task_time": "Morning hours work best",
-                "productivity_boost": "+10%",
-                "recommendation": "Stay consistent with your routine"
-            }
+            return dict(self.FALLBACK_PREDICTIONS)
         
         try:
-            prompt = f"""
-            Based on this productivity data, predict next week's performance:
-            
-            Current Data:
-            - Completion Rate: {user_data.get('completion_rate', 0)}%
-            - Recent Trend: {user_data.get('trend', 'stable')}
-            - Activity Level: {user_data.get('activity', 'medium')}
-            
-            Provide predictions in JSON format:
-            {{
-                "next_week_completion": "85%",
-                "optimal_task_time": "Morning hours (9-11 AM)",
-                "productivity_boost": "+12%",
-                "recommendation": "Focus on morning productivity"
-            }}
+            prompt = self._predictions_task(user_data) + """
+            Respond with the prediction as JSON.
             """
             
             response = self.model.generate_content(prompt)
-            result = json.loads(response.text)
+            result = self._parse_json(response.text)
             return result
             
         except Exception as e:
             logger.error(f"Gemini predictions failed: {e}")
-            return {
-                "next_week_completion": "75%",
-                "optimal_task_time": "Morning hours work best",
-                "productivity_boost": "+10%",
-                "recommendation": "Stay consistent with your routine"
-            }
+            return dict(self.FALLBACK_PREDICTIONS)
+    
+    def get_insights_bundle(self, user_data, prediction_data, recent_activity, sections=INSIGHT_SECTIONS):
+        """Insights, predictions and a motivational message from one generate_content call.
+        
+        Returns (bundle, complete). Sections missing or malformed in the
+        reply fall back individually, so one bad section does not cost the
+        others; complete is False when any section fell back.
+        """
+        completion_rate = user_data.get('avg_completion', 0)
+        fallbacks = {
+            'insights': copy.deepcopy(self.FALLBACK_INSIGHTS),
+            'predictions': dict(self.FALLBACK_PREDICTIONS),
+            'motivational_message': self.fallback_motivation(completion_rate),
+        }
+        if not self.ai_available:
+            return {section: fallbacks[section] for section in sections}, False
+        
+        tasks = {
+            'insights': (self._insights_task(user_data), 'a list of insights', list),
+            'predictions': (self._predictions_task(prediction_data), 'the prediction object', dict),
+            'motivational_message': (self._motivation_task(completion_rate, recent_activity), 'the message string', str),
+        }
+        prompt = "Complete each task below. Respond with one JSON object that has exactly these keys:\n"
+        prompt += '\n'.join(f'- "{section}": {tasks[section][1]}' for section in sections)
+        prompt += ''.join(f'\n\nTask "{section}":\n{tasks[section][0]}' for section in sections)
+        
+        try:
+            response = self.model.generate_content(prompt)
+            result = self._parse_json(response.text)
+        except Exception as e:
+            logger.error(f"Gemini insights bundle failed: {e}")
+            result = {}
+        if not isinstance(result, dict):
+            result = {}
+        
+        bundle = {}
+        complete = True
+        for section in sections:
+            value = result.get(section)
+            if isinstance(value, tasks[section][2]) and value:
+                bundle[section] = value
+            else:
+                bundle[section] = fallbacks[section]
+                complete = False
+        return bundle, complete
+
+
+class AIInsightsService:
+    """Productivity figures and Gemini insights for the AI panels.
+    
+    Figures come from the denormalized list counters in one query. The AI
+    sections a view needs are requested in a single bundled call and cached
+    until the user's list data changes; fallback answers are only kept
+    briefly so a failed call is retried soon.
+    """
+    
+    CACHE_TIMEOUT = 60 * 60 * 6
+    FALLBACK_CACHE_TIMEOUT = 60 * 5
+    
+    def get_user_data(self, user):
+        totals = List.objects.filter(user=user).aggregate(
+            total_lists=Count('id'),
+            completed_lists=Count('id', filter=Q(completion_percentage=100)),
+            avg_completion=Avg('completion_percentage'),
+            total_items=Sum('items_total'),
+            completed_items=Sum('items_completed'),
+        )
+        return {key: value or 0 for key, value in totals.items()}
+    
+    def get_sections(self, user, user_data, sections=INSIGHT_SECTIONS):
+        """The requested AI sections for user_data, one LLM round trip per data version"""
+        cache_key = f"lists_ai_insights_{user.id}_{get_list_data_version(user.id)}_{'-'.join(sections)}"
+        bundle = cache.get(cache_key)
+        if bundle is not None:
+            return bundle
+        
+        completion_rate = user_data['avg_completion']
+        prediction_data = {
+            'completion_rate': completion_rate,
+            'trend': 'improving' if completion_rate > 70 else 'stable',
+            'activity': 'high' if user_data['total_lists'] > 5 else 'medium'
+        }
+        bundle, complete = GeminiAI().get_insights_bundle(
+            user_data, prediction_data, 'active' if user_data['total_lists'] else 'new', sections
+        )
+        cache.set(cache_key, bundle, self.CACHE_TIMEOUT if complete else self.FALLBACK_CACHE_TIMEOUT)
+        return bundle
 
 
 class ListAIService:
@@ -275,9 +564,27 @@ class ListAIService:
     def __init__(self):
         self.gemini = GeminiAI()
     
-    def parse_list_items(self, text, list_type='checklist', context=None):
+    PARSE_CACHE_TIMEOUT = 60 * 60 * 24
+    
+    def parse_list_items(self, text, list_type='checklist', context=None, user=None):
         """Parse natural language text into structured list items with context awareness"""
-        return {'items': self.gemini.parse_natural_language(text)}
+        cache_key = self._parse_cache_key(text, list_type, context)
+        items = cache.get(cache_key)
+        if items is None:
+            items = self.gemini.parse_natural_language(text)
+            # Fallback parses are cheap; only keep real model output
+            if self.gemini.ai_available:
+                cache.set(cache_key, items, self.PARSE_CACHE_TIMEOUT)
+        
+        parsed_data = {'items': copy.deepcopy(items)}
+        return self._enhance_parsed_items(parsed_data, list_type, context, user)
+    
+    def _parse_cache_key(self, text, list_type, context=None):
+        """Cache key from normalized text plus the user-level parsing context"""
+        normalized_text = ' '.join(text.lower().split())
+        context = {key: value for key, value in (context or {}).items() if key != 'existing_items'}
+        payload = json.dumps([normalized_text, list_type, context], sort_keys=True, default=str)
+        return f"list_parse_{hashlib.sha1(payload.encode()).hexdigest()}"
     
     def _ensure_model(self):
         """Ensure the AI model is available"""
@@ -369,108 +676,64 @@ class ListAIService:
         
         return f"{base_prompt}\n\nUser's Text: \"{text}\"\nYour JSON Response:"
 
-    def _enhance_parsed_items(self, parsed_data, list_type, context=None):
+    def _enhance_parsed_items(self, parsed_data, list_type, context=None, user=None):
         """Post-process parsed items with smart enhancements"""
         try:
-            enhanced_items = []
-            for item in parsed_data.get('items', []):
-                # Smart categorization
-                if not item.get('category'):
-                    item['category'] = self._auto_categorize_item(item['name'], list_type)
-                
-                # Auto-tagging (store in notes since tags field doesn't exist)
-                if not item.get('tags'):
-                    smart_tags = self._generate_smart_tags(item['name'], item.get('category'), list_type)
-                    if smart_tags:
-                        # Store tags in notes field as a fallback
-                        existing_notes = item.get('notes', '') or ''
-                        tag_text = f"Tags: {', '.join(smart_tags)}"
-                        item['notes'] = f"{existing_notes}\n{tag_text}".strip() if existing_notes else tag_text
-                    # Remove tags from item data to avoid model error
-                    item.pop('tags', None)
-                
-                # Price estimation enhancement
-                if not item.get('estimated_price') and list_type == 'shopping':
-                    item['estimated_price'] = self._estimate_price(item['name'], item.get('quantity'))
-                
-                enhanced_items.append(item)
+            items = [item for item in parsed_data.get('items', []) if item.get('name')]
+            categorizer = ItemCategorizer.for_user(user)
+            
+            # Smart categorization for the whole batch at once
+            uncategorized = [item for item in items if not item.get('category')]
+            categories = categorizer.categorize_many([item['name'] for item in uncategorized], list_type)
+            for item, category in zip(uncategorized, categories):
+                item['category'] = category
+            
+            # Auto-tagging (store in notes since tags field doesn't exist)
+            untagged = [item for item in items if not item.get('tags')]
+            all_tags = categorizer.tags_many(
+                [item['name'] for item in untagged],
+                [item.get('category') for item in untagged],
+                list_type
+            )
+            for item, smart_tags in zip(untagged, all_tags):
+                if smart_tags:
+                    # Store tags in notes field as a fallback
+                    existing_notes = item.get('notes', '') or ''
+                    tag_text = f"Tags: {', '.join(smart_tags)}"
+                    item['notes'] = f"{existing_notes}\n{tag_text}".strip() if existing_notes else tag_text
+            
+            for item in items:
+                # Remove tags from item data to avoid model error
+                item.pop('tags', None)
+            
+            # Price estimation from the user's price history, one lookup for the batch
+            if list_type == 'shopping':
+                unpriced = [item for item in items if not item.get('estimated_price')]
+                estimates = ItemPrice.estimate_many(
+                    user.id if user else None,
+                    [(item['name'], item.get('unit')) for item in unpriced]
+                )
+                for item, estimate in zip(unpriced, estimates):
+                    item['estimated_price'] = float(estimate) if estimate is not None else None
             
-            parsed_data['items'] = enhanced_items
+            parsed_data['items'] = items
             return parsed_data
         except Exception as e:
             logger.error(f"Item enhancement failed: {e}")
             return parsed_data
     
-    def _auto_categorize_item(self, item_name, list_type):
+    def _auto_categorize_item(self, item_name, list_type, user=None):
         """Automatically categorize items based on name and type"""
-        category_mappings = {
-            'shopping': {
-                'fruits': ['apple', 'banana', 'orange', 'grape', 'berry', 'mango', 'pineapple'],
-                'vegetables': ['carrot', 'broccoli', 'spinach', 'tomato', 'potato', 'onion', 'pepper'],
-                'dairy': ['milk', 'cheese', 'yogurt', 'butter', 'cream', 'eggs'],
-                'meat': ['chicken', 'beef', 'pork', 'fish', 'turkey', 'lamb'],
-                'pantry': ['rice', 'pasta', 'bread', 'flour', 'sugar', 'salt', 'oil'],
-                'beverages': ['water', 'juice', 'soda', 'coffee', 'tea', 'beer', 'wine'],
-                'household': ['detergent', 'soap', 'shampoo', 'toothpaste', 'paper', 'cleaner']
-            },
-            'todo': {
-                'work': ['meeting', 'report', 'email', 'presentation', 'project', 'call'],
-                'personal': ['exercise', 'doctor', 'family', 'hobby', 'social', 'self-care'],
-                'home': ['clean', 'repair', 'organize', 'maintenance', 'garden', 'cook'],
-                'finance': ['pay', 'budget', 'invest', 'tax', 'bank', 'insurance']
-            }
-        }
-        
-        item_lower = item_name.lower()
-        for category, keywords in category_mappings.get(list_type, {}).items():
-            if any(keyword in item_lower for keyword in keywords):
-                return category
-        
-        return 'other'
+        return ItemCategorizer.for_user(user).categorize(item_name, list_type)
     
     def _generate_smart_tags(self, item_name, category, list_type):
         """Generate smart tags for items"""
-        tags = []
-        item_lower = item_name.lower()
-        
-        # Universal tags
-        if any(word in item_lower for word in ['urgent', 'asap', 'important', 'priority']):
-            tags.append('urgent')
-        if any(word in item_lower for word in ['organic', 'natural', 'bio']):
-            tags.append('organic')
-        if any(word in item_lower for word in ['large', 'big', 'bulk', 'family']):
-            tags.append('bulk')
-        
-        # Type-specific tags
-        if list_type == 'shopping':
-            if 'frozen' in item_lower:
-                tags.append('frozen')
-            if any(word in item_lower for word in ['fresh', 'ripe']):
-                tags.append('fresh')
-            if category == 'dairy' and any(word in item_lower for word in ['low-fat', 'skim', 'whole']):
-                tags.append('dairy-type')
-        
-        return tags[:3]  # Limit to 3 tags
-    
-    def _estimate_price(self, item_name, quantity):
-        """Estimate price for shopping items"""
-        # Basic price estimation (can be enhanced with real price data)
-        price_estimates = {
-            'milk': 3.50, 'bread': 2.50, 'eggs': 4.00, 'cheese': 6.00,
-            'chicken': 8.00, 'beef': 12.00, 'fish': 10.00,
-            'apple': 3.00, 'banana': 2.00, 'orange': 4.00,
-            'rice': 5.00, 'pasta': 2.50, 'flour': 3.00
-        }
-        
-        item_lower = item_name.lower()
-        for key, price in price_estimates.items():
-            if key in item_lower:
-                # Adjust for quantity if specified
-                if quantity and any(word in str(quantity).lower() for word in ['kg', 'liter', 'dozen']):
-                    return price * 1.5  # Rough adjustment
-                return price
-        
-        return None
+        return ItemCategorizer().tags(item_name, category, list_type)
+    
+    def _estimate_price(self, item_name, quantity=None, unit=None, user=None):
+        """Estimate price for shopping items from recorded price history"""
+        estimate = ItemPrice.estimate_many(user.id if user else None, [(item_name, unit)])[0]
+        return float(estimate) if estimate is not None else None
     
     def generate_advanced_suggestions(self, list_obj, context='completion'):
         """Generate advanced AI suggestions with context awareness"""
@@ -532,30 +795,10 @@ class ListAIService:
     
     def _get_user_context(self, user, list_type):
         """Get user context for better suggestions"""
-        from .models import List, ListItem
+        from .suggestions import CoPurchaseService
         
         try:
-            # Get user's recent lists of same type
-            recent_lists = List.objects.filter(
-                user=user,
-                list_type=list_type,
-                created_at__gte=timezone.now() - timedelta(days=30)
-            ).exclude(items__isnull=True)[:5]
-            
-            # Analyze patterns
-            common_items = {}
-            for list_obj in recent_lists:
-                for item in list_obj.items.all():
-                    common_items[item.name] = common_items.get(item.name, 0) + 1
-            
-            # Get top common items
-            frequent_items = sorted(common_items.items(), key=lambda x: x[1], reverse=True)[:10]
-            
-            return {
-                'frequent_items': [item[0] for item in frequent_items],
-                'list_count': recent_lists.count(),
-                'avg_items_per_list': sum(list_obj.items.count() for list_obj in recent_lists) / max(1, recent_lists.count())
-            }
+            return CoPurchaseService().get_user_context(user, list_type)
         except Exception as e:
             logger.error(f"User context retrieval failed: {e}")
             return {}
@@ -601,7 +844,7 @@ class ListService:
             context = self._build_parsing_context(list_obj, user)
             
             # Use enhanced AI parsing
-            parsed_data = self.ai_service.parse_list_items(text, list_obj.list_type, context)
+            parsed_data = self.ai_service.parse_list_items(text, list_obj.list_type, context, user)
             items_created = []
             
             for item_data in parsed_data.get('items', []):
@@ -629,10 +872,7 @@ class ListService:
                     'last_parsing_insights': parsed_data['insights'],
                     'suggested_items': parsed_data.get('suggestions', [])
                 }
-                list_obj.save()
-            
-            # Update list completion percentage
-            list_obj.update_completion_percentage()
+                list_obj.save(update_fields=['ai_suggestions', 'updated_at'])
             
             # Log enhanced activity
             ListActivity.objects.create(
@@ -667,27 +907,12 @@ class ListService:
         """Build context for enhanced AI parsing"""
         try:
             # Get existing items in the list
-            existing_items = [item.name for item in list_obj.items.all()[:10]]
-            
-            # Get user's recent similar lists
-            recent_lists = List.objects.filter(
-                user=user,
-                list_type=list_obj.list_type,
-                created_at__gte=timezone.now() - timedelta(days=30)
-            ).exclude(id=list_obj.id)[:3]
-            
-            recent_list_names = [lst.name for lst in recent_lists]
-            
-            # Get user preferences (can be expanded)
-            user_preferences = {
-                'preferred_categories': self._get_user_preferred_categories(user, list_obj.list_type),
-                'typical_quantities': self._get_typical_quantities(user, list_obj.list_type)
-            }
+            existing_items = list(list_obj.items.values_list('name', flat=True)[:10])
             
+            # Recent lists and preferences come from the cached per-user snapshot
             return {
                 'existing_items': existing_items,
-                'recent_lists': recent_list_names,
-                'user_preferences': user_preferences
+                **ParsingContextSnapshot.context_for(list_obj, user.id)
             }
         except Exception as e:
             logger.error(f"Context building failed: {e}")
@@ -695,18 +920,9 @@ class ListService:
     
     def _get_user_preferred_categories(self, user, list_type):
         """Get user's most used categories"""
-        from django.db.models import Count
-        
         try:
-            categories = ListItem.objects.filter(
-                list__user=user,
-                list__list_type=list_type,
-                category__isnull=False
-            ).values('category').annotate(
-                count=Count('category')
-            ).order_by('-count')[:5]
-            
-            return [cat['category'] for cat in categories]
+            counts = ParsingContextSnapshot.get(user.id, list_type)['category_counts']
+            return [category for category, _ in sorted(counts.items(), key=lambda entry: entry[1], reverse=True)[:5]]
         except Exception as e:
             logger.error(f"Failed to get user preferred categories: {e}")
             return []
@@ -714,13 +930,7 @@ class ListService:
     def _get_typical_quantities(self, user, list_type):
         """Get typical quantities user uses"""
         try:
-            quantities = ListItem.objects.filter(
-                list__user=user,
-                list__list_type=list_type,
-                quantity__isnull=False
-            ).values_list('quantity', flat=True)[:20]
-            
-            return list(set(quantities))
+            return ParsingContextSnapshot.get(user.id, list_type)['typical_quantities']
         except Exception as e:
             logger.error(f"Failed to get typical quantities: {e}")
             return []
@@ -763,23 +973,7 @@ class ListService:
                 list__user=user
             )
             
-            updated_count = 0
-            for item in items:
-                item.is_completed = completed
-                if completed:
-                    item.completed_at = timezone.now()
-                    item.completed_by = user
-                else:
-                    item.completed_at = None
-                    item.completed_by = None
-                item.save()
-                updated_count += 1
-            
-            # Update completion percentages for affected lists
-            affected_lists = set(item.list for item in items)
-            for list_obj in affected_lists:
-                list_obj.update_completion_percentage()
-            
+            updated_count = set_items_completed(items, completed, user)
             return {'success': updated_count, 'failed': 0}
         except Exception as e:
             logger.error(f"Bulk complete items failed: {e}")
@@ -795,14 +989,7 @@ class ListService:
                 list__user=user
             )
             
-            affected_lists = set(item.list for item in items)
-            deleted_count = items.count()
-            items.delete()
-            
-            # Update completion percentages
-            for list_obj in affected_lists:
-                list_obj.update_completion_percentage()
-            
+            deleted_count = delete_items(items)
             return {'success': deleted_count, 'failed': 0}
         except Exception as e:
             logger.error(f"Bulk delete items failed: {e}")
@@ -841,8 +1028,7 @@ class ListService:
                     order=item.order
                 ))
             
-            ListItem.objects.bulk_create(items_to_create)
-            duplicate_list.update_completion_percentage()
+            duplicate_list.bulk_add_items(items_to_create)
             
             return {'success': 1, 'failed': 0, 'list_id': duplicate_list.id}
         except Exception as e:
@@ -895,7 +1081,7 @@ class ListService:
             ))
         
         if items_to_create:
-            ListItem.objects.bulk_create(items_to_create)
+            new_list.bulk_add_items(items_to_create)
         
         # Log activity for the new list
         ListActivity.objects.create(
@@ -928,9 +1114,13 @@ class ListService:
 class ListAnalyticsService:
     """Service for list analytics and insights"""
     
+    # Periods served from monthly ListAnalytics rollups, with their length in months
+    ROLLUP_PERIODS = {'quarter': 3, 'year': 12}
+    
     def get_user_analytics(self, user, period='month'):
         """Get comprehensive analytics for user's lists"""
-        cache_key = f"list_analytics_{user.id}_{period}"
+        # The data version changes on every list write, retiring stale entries
+        cache_key = f"list_analytics_{user.id}_{period}_v{get_list_data_version(user.id)}"
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -939,14 +1129,14 @@ class ListAnalyticsService:
         try:
             # Date range calculation
             end_date = timezone.now()
+            rollups = None
             if period == 'week':
                 start_date = end_date - timedelta(days=7)
             elif period == 'month':
                 start_date = end_date - timedelta(days=30)
-            elif period == 'quarter':
-                start_date = end_date - timedelta(days=90)
             else:
-                start_date = end_date - timedelta(days=365)
+                months = self.ROLLUP_PERIODS.get(period, 12)
+                start_date, rollups = self._get_monthly_rollups(user, end_date, months)
             
             # Basic stats
             lists_qs = List.objects.filter(
@@ -954,18 +1144,25 @@ class ListAnalyticsService:
                 created_at__gte=start_date
             )
             
-            items_qs = ListItem.objects.filter(
-                list__user=user,
-                created_at__gte=start_date
-            )
+            # Completion buckets feed productivity metrics, trends and insights;
+            # rollup periods read item figures from the rollups, not ListItem
+            if rollups is not None:
+                items_qs = None
+                buckets = self._rollup_buckets(rollups)
+            else:
+                items_qs = ListItem.objects.filter(
+                    list__user=user,
+                    created_at__gte=start_date
+                )
+                buckets = completion_time_buckets(user, start_date, end_date)
             
             analytics = {
-                'summary': self._get_summary_stats(lists_qs, items_qs),
-                'productivity': self._get_productivity_metrics(user, start_date, end_date),
+                'summary': self._get_summary_stats(lists_qs, items_qs, rollups),
+                'productivity': self._get_productivity_metrics(user, start_date, end_date, buckets),
                 'categories': self._get_category_breakdown(lists_qs),
                 'list_types': self._get_list_type_breakdown(lists_qs),
-                'completion_trends': self._get_completion_trends(user, start_date, end_date),
-                'insights': self._generate_insights(user, lists_qs, items_qs)
+                'completion_trends': self._get_completion_trends(user, start_date, end_date, buckets),
+                'insights': self._generate_insights(user, lists_qs, items_qs, buckets)
             }
             
             # Cache for 1 hour
@@ -976,44 +1173,85 @@ class ListAnalyticsService:
             logger.error(f"Analytics generation failed: {e}")
             return {}
 
-    def _get_summary_stats(self, lists_qs, items_qs):
+    def _get_monthly_rollups(self, user, end_date, months):
+        """Load gap-filled ListAnalytics rows for the last `months` calendar months"""
+        month = ListAnalytics.month_for(end_date)
+        month_starts = [month]
+        for _ in range(months - 1):
+            month = (month - timedelta(days=1)).replace(day=1)
+            month_starts.insert(0, month)
+        
+        rows = {
+            row.month: row
+            for row in ListAnalytics.objects.filter(user=user, month__gte=month_starts[0])
+        }
+        rollups = [rows.get(month) or ListAnalytics(user=user, month=month) for month in month_starts]
+        
+        start_date = timezone.make_aware(datetime.combine(month_starts[0], datetime.min.time()))
+        return start_date, rollups
+    
+    def _rollup_buckets(self, rollups):
+        """Shape monthly rollups like completion_time_buckets(..., 'month')"""
+        return [
+            {
+                'date': rollup.month,
+                'completed_items': rollup.completed_items,
+                'average_completion_hours': rollup.average_completion_hours
+            }
+            for rollup in rollups
+        ]
+    
+    def _get_summary_stats(self, lists_qs, items_qs, rollups=None):
         """Calculate summary statistics"""
+        list_stats = lists_qs.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_archived=False)),
+            completed=Count('id', filter=Q(completion_percentage=100)),
+            average_completion=Avg('completion_percentage')
+        )
+        
+        if rollups is not None:
+            total_lists = sum(rollup.total_lists for rollup in rollups)
+            completed_lists = sum(rollup.completed_lists for rollup in rollups)
+            total_items = sum(rollup.total_items for rollup in rollups)
+            completed_items = sum(rollup.completed_items for rollup in rollups)
+            estimated_cost = sum(rollup.estimated_cost for rollup in rollups)
+        else:
+            item_stats = items_qs.aggregate(
+                total=Count('id'),
+                completed=Count('id', filter=Q(is_completed=True)),
+                estimated_cost=Sum('estimated_price')
+            )
+            total_lists = list_stats['total']
+            completed_lists = list_stats['completed']
+            total_items = item_stats['total']
+            completed_items = item_stats['completed']
+            estimated_cost = item_stats['estimated_cost']
+        
         return {
-            'total_lists': lists_qs.count(),
-            'active_lists': lists_qs.filter(is_archived=False).count(),
-            'completed_lists': lists_qs.filter(completion_percentage=100).count(),
-            'total_items': items_qs.count(),
-            'completed_items': items_qs.filter(is_completed=True).count(),
-            'average_completion': lists_qs.aggregate(
-                avg=Avg('completion_percentage')
-            )['avg'] or 0,
-            'total_estimated_cost': items_qs.aggregate(
-                total=Sum('estimated_price')
-            )['total'] or 0
+            'total_lists': total_lists,
+            'active_lists': list_stats['active'],
+            'completed_lists': completed_lists,
+            'total_items': total_items,
+            'completed_items': completed_items,
+            'average_completion': list_stats['average_completion'] or 0,
+            'total_estimated_cost': estimated_cost or 0
         }
 
-    def _get_productivity_metrics(self, user, start_date, end_date):
+    def _get_productivity_metrics(self, user, start_date, end_date, buckets=None):
         """Calculate productivity metrics"""
-        completed_items = ListItem.objects.filter(
-            list__user=user,
-            is_completed=True,
-            completed_at__gte=start_date,
-            completed_at__lte=end_date
-        )
-        
-        # Calculate average completion time
-        completion_times = []
-        for item in completed_items:
-            if item.completed_at and item.created_at:
-                delta = item.completed_at - item.created_at
-                completion_times.append(delta.total_seconds())
+        if buckets is None:
+            buckets = completion_time_buckets(user, start_date, end_date)
         
-        avg_completion_time = sum(completion_times) / len(completion_times) if completion_times else 0
+        # Weighted mean of the per-bucket averages equals the overall average
+        items_completed = sum(bucket['completed_items'] for bucket in buckets)
+        total_hours = sum(bucket['average_completion_hours'] * bucket['completed_items'] for bucket in buckets)
+        avg_completion_hours = total_hours / items_completed if items_completed else 0
         
         return {
-            'items_completed': completed_items.count(),
-            'average_completion_time_hours': avg_completion_time / 3600,
-            'productivity_score': min(100, (completed_items.count() / max(1, (end_date - start_date).days)) * 10)
+            'items_completed': items_completed,
+            'average_completion_time_hours': avg_completion_hours,
+            'productivity_score': min(100, (items_completed / max(1, (end_date - start_date).days)) * 10)
         }
 
     def _get_category_breakdown(self, lists_qs):
@@ -1028,29 +1266,22 @@ class ListAnalyticsService:
                    .annotate(count=Count('id'))
                    .order_by('-count'))
 
-    def _get_completion_trends(self, user, start_date, end_date):
+    def _get_completion_trends(self, user, start_date, end_date, buckets=None):
         """Get completion trends over time"""
         # Daily completion data for the period
-        trends = []
-        current_date = start_date.date()
-        end_date_only = end_date.date()
+        if buckets is None:
+            buckets = completion_time_buckets(user, start_date, end_date)
         
-        while current_date <= end_date_only:
-            completed_count = ListItem.objects.filter(
-                list__user=user,
-                is_completed=True,
-                completed_at__date=current_date
-            ).count()
-            
-            trends.append({
-                'date': current_date.isoformat(),
-                'completed_items': completed_count
-            })
-            current_date += timedelta(days=1)
-        
-        return trends
+        return [
+            {
+                'date': bucket['date'].isoformat(),
+                'completed_items': bucket['completed_items'],
+                'average_completion_hours': round(bucket['average_completion_hours'], 2)
+            }
+            for bucket in buckets
+        ]
 
-    def _generate_insights(self, user, lists_qs, items_qs):
+    def _generate_insights(self, user, lists_qs, items_qs, buckets=None):
         """Generate AI-powered insights"""
         insights = []
         
@@ -1067,19 +1298,22 @@ class ListAnalyticsService:
             })
         
         # Completion pattern
-        completed_items = items_qs.filter(is_completed=True)
-        if completed_items.exists():
-            avg_completion_time = completed_items.aggregate(
+        if buckets is not None:
+            completed_count = sum(bucket['completed_items'] for bucket in buckets)
+            total_hours = sum(bucket['average_completion_hours'] * bucket['completed_items'] for bucket in buckets)
+            avg_completion_time = timedelta(hours=total_hours / completed_count) if completed_count else None
+        else:
+            avg_completion_time = items_qs.filter(is_completed=True).aggregate(
                 avg_time=Avg(F('completed_at') - F('created_at'))
             )['avg_time']
-            
-            if avg_completion_time:
-                days = avg_completion_time.days
-                insights.append({
-                    'type': 'timing',
-                    'title': 'Average Task Completion',
-                    'description': f"You typically complete tasks within {days} days"
-                })
+        
+        if avg_completion_time:
+            days = avg_completion_time.days
+            insights.append({
+                'type': 'timing',
+                'title': 'Average Task Completion',
+                'description': f"You typically complete tasks within {days} days"
+            })
         
         return insights
 
@@ -1135,8 +1369,14 @@ class ListTemplateService:
             logger.error(f"Enhanced template creation failed: {e}")
             raise
     
+    TEMPLATE_INSIGHTS_TIMEOUT = 60 * 60 * 24
+    
     def _generate_template_insights(self, list_obj):
-        """Generate AI insights for template optimization"""
+        """Generate AI insights for template optimization, cached per list version"""
+        cache_key = f"lists_template_insights_{list_obj.pk}_{list_obj.version}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
         try:
             if not self.ai_service._ensure_model():
                 return {}
@@ -1161,7 +1401,9 @@ class ListTemplateService:
             
             response = self.ai_service.model.generate_content(prompt)
             cleaned_json = response.text.strip().replace('```json', '').replace('```', '')
-            return json.loads(cleaned_json)
+            insights = json.loads(cleaned_json)
+            cache.set(cache_key, insights, self.TEMPLATE_INSIGHTS_TIMEOUT)
+            return insights
         except Exception as e:
             logger.error(f"Template insights generation failed: {e}")
             return {}
@@ -1264,11 +1506,10 @@ class ListTemplateService:
                     estimated_price=item_data.get('estimated_price')
                 ))
             
-            ListItem.objects.bulk_create(items_to_create)
+            new_list.bulk_add_items(items_to_create)
             
             # Update template usage count
-            template.use_count = F('use_count') + 1
-            template.save()
+            ListTemplate.objects.filter(pk=template.pk).update(use_count=F('use_count') + 1)
             
             return new_list
             
@@ -1294,7 +1535,7 @@ class ListItemService:
             }
             
             # Parse items using AI
-            parsed_data = self.ai_service.parse_list_items(text, list_obj.list_type, context)
+            parsed_data = self.ai_service.parse_list_items(text, list_obj.list_type, context, list_obj.user)
             items_created = []
             
             for item_data in parsed_data.get('items', []):
@@ -1312,9 +1553,6 @@ class ListItemService:
                 )
                 items_created.append(item)
             
-            # Update list completion percentage
-            list_obj.update_completion_percentage()
-            
             return items_created
             
         except Exception as e:
@@ -1333,24 +1571,11 @@ class ListItemService:
             )
             
             if operation == 'bulk_complete':
-                items.update(
-                    is_completed=True,
-                    completed_at=timezone.now()
-                )
+                set_items_completed(items, True, user)
             elif operation == 'bulk_incomplete':
-                items.update(
-                    is_completed=False,
-                    completed_at=None
-                )
+                set_items_completed(items, False, user)
             elif operation == 'bulk_delete_items':
-                count = items.count()
-                items.delete()
-                return {'deleted_count': count}
-            
-            # Update completion percentages for affected lists
-            affected_lists = set(item.list for item in items)
-            for list_obj in affected_lists:
-                list_obj.update_completion_percentage()
+                return {'deleted_count': delete_items(items)}
             
             return {'updated_count': items.count()}
             
@@ -1358,23 +1583,27 @@ class ListItemService:
             logger.error(f"Bulk item operations failed: {e}")
             raise
     
-    def get_smart_suggestions(self, list_obj):
+    def get_smart_suggestions(self, list_obj, profile=None):
         """Get AI-powered suggestions for list items"""
+        from .suggestions import CoPurchaseService
+        
         try:
-            suggestions = []
+            # Precomputed co-purchase and repeat-purchase suggestions come first
+            suggestions = CoPurchaseService().suggest(list_obj, profile=profile)
             
-            if list_obj.list_type == 'shopping':
+            if list_obj.list_type == 'shopping' and not suggestions:
                 common_items = ['milk', 'bread', 'eggs', 'butter', 'rice', 'pasta', 'chicken']
                 existing_items = set(item.name.lower() for item in list_obj.items.all())
                 
-                for item in common_items:
-                    if item not in existing_items:
-                        suggestions.append({
-                            'type': 'add_item',
-                            'suggestion': f"Consider adding '{item}' to your shopping list",
-                            'item_name': item,
-                            'category': self._get_item_category(item)
-                        })
+                missing_items = [item for item in common_items if item not in existing_items]
+                categories = ItemCategorizer.for_user(list_obj.user).categorize_many(missing_items, 'shopping')
+                for item, category in zip(missing_items, categories):
+                    suggestions.append({
+                        'type': 'add_item',
+                        'suggestion': f"Consider adding '{item}' to your shopping list",
+                        'item_name': item,
+                        'category': category
+                    })
             
             elif list_obj.list_type == 'todo':
                 if list_obj.items.filter(priority='high').count() == 0:
@@ -1397,31 +1626,42 @@ class ListItemService:
             logger.error(f"Smart suggestions failed: {e}")
             return []
     
-    def _get_item_category(self, item_name):
+    def _get_item_category(self, item_name, user=None):
         """Get category for an item"""
-        category_map = {
-            'milk': 'dairy', 'bread': 'bakery', 'eggs': 'dairy',
-            'butter': 'dairy', 'rice': 'grains', 'pasta': 'grains',
-            'chicken': 'meat'
-        }
-        return category_map.get(item_name.lower(), 'other')
+        return ItemCategorizer.for_user(user).categorize(item_name, 'shopping')
 
 
 class ExportService:
-    """Service for exporting lists in various formats"""
-    
+    """Streaming exporters for lists.
+
+    Each exporter is a generator of text chunks meant for
+    StreamingHttpResponse. Lists are read from the database in chunks with
+    their items prefetched per chunk, so memory stays flat regardless of
+    how many lists are exported.
+    """
+
+    CHUNK_SIZE = 200
+    CSV_HEADER = ['List Name', 'Item Name', 'Quantity', 'Category', 'Priority', 'Completed', 'Created Date']
+
+    def iter_lists(self, lists):
+        """Lists with their items, loaded CHUNK_SIZE lists at a time"""
+        return lists.prefetch_related('items').iterator(chunk_size=self.CHUNK_SIZE)
+
     def export_lists_csv(self, lists):
-        """Export lists as CSV format"""
+        """Export lists as CSV rows, one item per row"""
         import csv
-        import io
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['List Name', 'Item Name', 'Quantity', 'Category', 'Priority', 'Completed', 'Created Date'])
-        
-        for list_obj in lists:
+
+        class Echo:
+            def write(self, value):
+                return value
+
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.CSV_HEADER)
+
+        for list_obj in self.iter_lists(lists):
+            rows = []
             for item in list_obj.items.all():
-                writer.writerow([
+                rows.append(writer.writerow([
                     list_obj.name,
                     item.name,
                     item.quantity or '',
@@ -1429,27 +1669,35 @@ class ExportService:
                     item.priority or '',
                     'Yes' if item.is_completed else 'No',
                     item.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
-        
-        return output.getvalue()
-    
+                ]))
+            if rows:
+                yield ''.join(rows)
+
+    def export_lists_ndjson(self, lists):
+        """Export lists as newline-delimited JSON, one list per line"""
+        for list_obj in self.iter_lists(lists):
+            yield json.dumps(self._list_data(list_obj)) + '\n'
+
     def export_lists_json(self, lists):
-        """Export lists as JSON format"""
-        data = []
-        for list_obj in lists:
-            list_data = {
-                'id': list_obj.id,
-                'name': list_obj.name,
-                'description': list_obj.description,
-                'list_type': list_obj.list_type,
-                'priority': list_obj.priority,
-                'completion_percentage': list_obj.completion_percentage,
-                'created_at': list_obj.created_at.isoformat(),
-                'items': []
-            }
-            
-            for item in list_obj.items.all():
-                list_data['items'].append({
+        """Export lists as a JSON array streamed one list at a time"""
+        yield '['
+        separator = ''
+        for list_obj in self.iter_lists(lists):
+            yield separator + json.dumps(self._list_data(list_obj), indent=2)
+            separator = ',\n'
+        yield ']'
+
+    def _list_data(self, list_obj):
+        return {
+            'id': list_obj.id,
+            'name': list_obj.name,
+            'description': list_obj.description,
+            'list_type': list_obj.list_type,
+            'priority': list_obj.priority,
+            'completion_percentage': list_obj.completion_percentage,
+            'created_at': list_obj.created_at.isoformat(),
+            'items': [
+                {
                     'id': item.id,
                     'name': item.name,
                     'description': item.description,
@@ -1459,16 +1707,21 @@ class ExportService:
                     'is_completed': item.is_completed,
                     'estimated_price': float(item.estimated_price) if item.estimated_price else None,
                     'created_at': item.created_at.isoformat()
-                })
-            
-            data.append(list_data)
-        
-        return json.dumps(data, indent=2)
+                }
+                for item in list_obj.items.all()
+            ]
+        }
 
 
 class AgendaService:
     """Service for agenda and daily planning"""
     
+    AGENDA_CACHE_TIMEOUT = 60 * 15
+    AGENDA_LIMIT = 50
+    OVERDUE_DAYS = 14
+    OPEN_TASK_STATUSES = ['pending', 'in_progress']
+    OPEN_LENDING_STATUSES = ['active', 'partial', 'overdue']
+    
     def get_daily_agenda(self, user, date=None):
         """Get daily agenda for user"""
         try:
@@ -1476,25 +1729,34 @@ class AgendaService:
                 date = timezone.now().date()
             
             # Get recent lists
-            recent_lists = List.objects.filter(
+            recent_lists = list(List.objects.filter(
                 user=user,
                 created_at__date=date,
                 is_archived=False
-            ).order_by('-created_at')[:5]
+            ).order_by('-created_at')[:5])
             
-            # Get pending high-priority items
-            pending_items = ListItem.objects.filter(
+            pending = ListItem.objects.filter(
                 list__user=user,
                 is_completed=False,
                 priority__in=['high', 'urgent']
-            ).select_related('list').order_by('created_at')[:10]
-            
-            # Get overdue items
-            overdue_items = ListItem.objects.filter(
+            )
+            overdue = ListItem.objects.filter(
                 list__user=user,
                 is_completed=False,
                 due_date__lt=date
-            ).select_related('list').order_by('due_date')[:5]
+            )
+            
+            # Get pending high-priority items
+            pending_items = list(pending.select_related('list').order_by('created_at')[:10])
+            
+            # Get overdue items
+            overdue_items = list(overdue.select_related('list').order_by('due_date')[:5])
+            
+            # Totals count every matching item, not just the slices shown
+            totals = ListItem.objects.filter(list__user=user, is_completed=False).aggregate(
+                total_pending=Count('id', filter=Q(priority__in=['high', 'urgent'])),
+                total_overdue=Count('id', filter=Q(due_date__lt=date))
+            )
             
             return {
                 'date': date.isoformat(),
@@ -1502,9 +1764,9 @@ class AgendaService:
                 'pending_items': pending_items,
                 'overdue_items': overdue_items,
                 'summary': {
-                    'total_pending': pending_items.count(),
-                    'total_overdue': overdue_items.count(),
-                    'lists_created_today': recent_lists.count()
+                    'total_pending': totals['total_pending'],
+                    'total_overdue': totals['total_overdue'],
+                    'lists_created_today': len(recent_lists)
                 }
             }
             
@@ -1512,6 +1774,142 @@ class AgendaService:
             logger.error(f"Daily agenda generation failed: {e}")
             return {}
     
+    def get_unified_agenda(self, user, date=None):
+        """Everything due on a day across lists, tasks, lending and subscriptions.
+        
+        Each source is read as a stream already sorted by due time from its
+        (user, status, due) index, and the streams are k-way merged. Results
+        are cached per user and day; list writes and task, loan or
+        subscription saves change the cache key.
+        """
+        date = date or timezone.localdate()
+        cache_key = (
+            f"agenda_{user.id}_{date.isoformat()}"
+            f"_l{get_list_data_version(user.id)}_a{get_agenda_version(user.id)}"
+        )
+        agenda = cache.get(cache_key)
+        if agenda is not None:
+            return agenda
+        
+        day_start = timezone.make_aware(datetime.combine(date, datetime.min.time()))
+        window = (day_start - timedelta(days=self.OVERDUE_DAYS), day_start + timedelta(days=1))
+        
+        streams, summary = [], {'total': 0, 'overdue': 0, 'by_type': {}}
+        for entry_type, source in self._agenda_sources():
+            entries, total, overdue = source(user, window, day_start)
+            streams.append(entries)
+            summary['by_type'][entry_type] = total
+            summary['total'] += total
+            summary['overdue'] += overdue
+        
+        merged = heapq.merge(*streams, key=lambda entry: (entry['due'], entry['type']))
+        entries = []
+        for entry in islice(merged, self.AGENDA_LIMIT):
+            entry['overdue'] = entry['due'] < day_start
+            entry['due'] = entry['due'].isoformat()
+            entries.append(entry)
+        
+        agenda = {'date': date.isoformat(), 'entries': entries, 'summary': summary}
+        cache.set(cache_key, agenda, self.AGENDA_CACHE_TIMEOUT)
+        return agenda
+    
+    def _agenda_sources(self):
+        from django.apps import apps
+        sources = [('list_item', self._agenda_list_item)]
+        if apps.is_installed('todos'):
+            sources.append(('task', self._agenda_task))
+        if apps.is_installed('lending'):
+            sources.append(('lending_due', self._agenda_lending_due))
+        if apps.is_installed('subscriptions'):
+            sources.append(('subscription_renewal', self._agenda_subscription_renewal))
+        return sources
+    
+    def _agenda_stream(self, rows, make_entry, queryset, overdue_filter, day_start):
+        """Sorted entries plus (total, overdue) counts for one source.
+        
+        Reads one row past the limit; only when a source has more than
+        AGENDA_LIMIT entries does it need a separate count query.
+        """
+        rows = list(rows[:self.AGENDA_LIMIT + 1])
+        entries = [make_entry(row) for row in rows[:self.AGENDA_LIMIT]]
+        if len(rows) <= self.AGENDA_LIMIT:
+            overdue = sum(1 for entry in entries if entry['due'] < day_start)
+            return entries, len(entries), overdue
+        counts = queryset.aggregate(total=Count('pk'), overdue=Count('pk', filter=overdue_filter))
+        return entries, counts['total'], counts['overdue']
+    
+    @staticmethod
+    def _start_of(day):
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    
+    def _agenda_list_item(self, user, window, day_start):
+        items = ListItem.objects.filter(
+            list__user=user, is_completed=False, due_date__gte=window[0], due_date__lt=window[1]
+        )
+        rows = items.order_by('due_date', 'id').values('id', 'name', 'priority', 'due_date', 'list_id', 'list__name')
+        return self._agenda_stream(rows, lambda row: {
+            'type': 'list_item',
+            'id': row['id'],
+            'title': row['name'],
+            'priority': row['priority'],
+            'list_id': row['list_id'],
+            'list_name': row['list__name'],
+            'due': row['due_date'],
+        }, items, Q(due_date__lt=day_start), day_start)
+    
+    def _agenda_task(self, user, window, day_start):
+        from todos.models import Task
+        tasks = Task.objects.filter(
+            user=user, status__in=self.OPEN_TASK_STATUSES, due_date__gte=window[0], due_date__lt=window[1]
+        )
+        rows = tasks.order_by('due_date', 'id').values('id', 'title', 'priority', 'status', 'due_date')
+        return self._agenda_stream(rows, lambda row: {
+            'type': 'task',
+            'id': row['id'],
+            'title': row['title'],
+            'priority': row['priority'],
+            'status': row['status'],
+            'due': row['due_date'],
+        }, tasks, Q(due_date__lt=day_start), day_start)
+    
+    def _agenda_lending_due(self, user, window, day_start):
+        from lending.models import LendingTransaction
+        loans = LendingTransaction.objects.filter(
+            user=user, status__in=self.OPEN_LENDING_STATUSES,
+            due_date__gte=window[0].date(), due_date__lt=window[1].date()
+        )
+        rows = loans.order_by('due_date', 'pk').values(
+            'pk', 'person_name', 'transaction_type', 'amount', 'status', 'due_date'
+        )
+        return self._agenda_stream(rows, lambda row: {
+            'type': 'lending_due',
+            'id': row['pk'],
+            'title': row['person_name'],
+            'transaction_type': row['transaction_type'],
+            'amount': float(row['amount']),
+            'status': row['status'],
+            'due': self._start_of(row['due_date']),
+        }, loans, Q(due_date__lt=day_start.date()), day_start)
+    
+    def _agenda_subscription_renewal(self, user, window, day_start):
+        from subscriptions.models import Subscription
+        subscriptions = Subscription.objects.filter(
+            user=user, status='active',
+            next_billing_date__gte=window[0].date(), next_billing_date__lt=window[1].date()
+        )
+        rows = subscriptions.order_by('next_billing_date', 'pk').values(
+            'pk', 'name', 'provider', 'amount', 'currency', 'next_billing_date'
+        )
+        return self._agenda_stream(rows, lambda row: {
+            'type': 'subscription_renewal',
+            'id': row['pk'],
+            'title': row['name'],
+            'provider': row['provider'],
+            'amount': float(row['amount']),
+            'currency': row['currency'],
+            'due': self._start_of(row['next_billing_date']),
+        }, subscriptions, Q(next_billing_date__lt=day_start.date()), day_start)
+    
     def get_weekly_summary(self, user):
         """Get weekly productivity summary"""
         try:
@@ -1524,23 +1922,14 @@ class AgendaService:
                 created_at__gte=start_date
             ).count()
             
-            # Items completed this week
-            items_completed = ListItem.objects.filter(
-                list__user=user,
-                is_completed=True,
-                completed_at__gte=start_date
-            ).count()
-            
             # Most productive day
+            buckets = completion_time_buckets(user, start_date, end_date)
             daily_completions = {}
-            for i in range(7):
-                day = (start_date + timedelta(days=i)).date()
-                count = ListItem.objects.filter(
-                    list__user=user,
-                    is_completed=True,
-                    completed_at__date=day
-                ).count()
-                daily_completions[day.strftime('%A')] = count
+            for bucket in buckets[-7:]:
+                daily_completions[bucket['date'].strftime('%A')] = bucket['completed_items']
+            
+            # Items completed this week
+            items_completed = sum(bucket['completed_items'] for bucket in buckets)
             
             most_productive_day = max(daily_completions, key=daily_completions.get)
             
@@ -0,0 +1,20 @@
+# lists/signals.py
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .cache import bump_agenda_version
+
+# Models from other modules whose due dates feed AgendaService.get_unified_agenda
+AGENDA_SOURCES = ['todos.Task', 'subscriptions.Subscription', 'lending.LendingTransaction']
+
+
+def invalidate_agenda(sender, instance, **kwargs):
+    bump_agenda_version(instance.user_id)
+
+
+def connect_agenda_sources():
+    for label in AGENDA_SOURCES:
+        if apps.is_installed(label.split('.')[0]):
+            post_save.connect(invalidate_agenda, sender=label, dispatch_uid=f'agenda_save_{label}')
+            post_delete.connect(invalidate_agenda, sender=label, dispatch_uid=f'agenda_delete_{label}')
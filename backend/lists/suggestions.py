@@ -0,0 +1,177 @@
+# lists/suggestions.py
+
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from itertools import combinations
+from django.db import transaction
+from django.utils import timezone
+
+from .categorizer import normalize_item_name
+from .models import List, ListItem, PurchaseProfile
+
+logger = logging.getLogger(__name__)
+
+
+class CoPurchaseService:
+    """Per-user co-purchase and repeat-purchase suggestions.
+
+    Each of the user's recent lists is kept as a basket of normalized item
+    names on their PurchaseProfile. Refreshing only reloads lists whose
+    updated_at moved since the last build, then recounts frequencies and
+    pair co-occurrences from the stored baskets.
+    """
+
+    HISTORY_DAYS = 365
+    MAX_BASKETS = 100
+    COLD_START_BASKETS = 3
+    MIN_PAIR_COUNT = 2
+
+    def get_profile(self, user):
+        """The user's purchase profile, refreshed if any list changed since it was built"""
+        profile, _ = PurchaseProfile.objects.get_or_create(user=user)
+        cutoff = timezone.now() - timedelta(days=self.HISTORY_DAYS)
+        recent = List.objects.filter(user=user, created_at__gte=cutoff).order_by('-created_at')
+
+        current = dict(recent.values_list('id', 'updated_at')[:self.MAX_BASKETS])
+        stale = set(profile.baskets) - set(current)
+        changed = [
+            list_id for list_id, updated_at in current.items()
+            if list_id not in profile.baskets or profile.built_at is None or updated_at > profile.built_at
+        ]
+        if not stale and not changed:
+            return profile
+
+        self._refresh(profile, stale, changed)
+        return profile
+
+    @transaction.atomic
+    def _refresh(self, profile, stale, changed):
+        baskets = {list_id: basket for list_id, basket in profile.baskets.items() if list_id not in stale}
+
+        items_by_list = defaultdict(list)
+        for list_id, name in ListItem.objects.filter(list_id__in=changed).values_list('list_id', 'name'):
+            items_by_list[list_id].append(name)
+
+        for list_id, list_type, created_at in List.objects.filter(pk__in=changed).values_list(
+            'id', 'list_type', 'created_at'
+        ):
+            names = items_by_list.get(list_id, [])
+            if not names:
+                baskets.pop(list_id, None)
+                continue
+            baskets[list_id] = {
+                'list_type': list_type,
+                'date': created_at.date().isoformat(),
+                'items': sorted({normalize_item_name(name) for name in names}),
+                'names': {normalize_item_name(name): name for name in names},
+            }
+
+        profile.baskets = baskets
+        profile.stats = self._build_stats(baskets)
+        profile.built_at = timezone.now()
+        profile.save()
+
+    def _build_stats(self, baskets):
+        stats = {}
+        for basket in baskets.values():
+            type_stats = stats.setdefault(basket['list_type'], {
+                'baskets': 0, 'frequency': Counter(), 'pairs': defaultdict(Counter),
+                'dates': defaultdict(list), 'names': {}
+            })
+            type_stats['baskets'] += 1
+            type_stats['names'].update(basket.get('names', {}))
+            for key in basket['items']:
+                type_stats['frequency'][key] += 1
+                type_stats['dates'][key].append(basket['date'])
+            for first, second in combinations(basket['items'], 2):
+                type_stats['pairs'][first][second] += 1
+                type_stats['pairs'][second][first] += 1
+
+        # Keep only pairs seen often enough to be meaningful
+        for type_stats in stats.values():
+            type_stats['pairs'] = {
+                key: {other: count for other, count in partners.items() if count >= self.MIN_PAIR_COUNT}
+                for key, partners in type_stats['pairs'].items()
+            }
+            type_stats['pairs'] = {key: partners for key, partners in type_stats['pairs'].items() if partners}
+            type_stats['frequency'] = dict(type_stats['frequency'])
+            type_stats['dates'] = {key: sorted(dates) for key, dates in type_stats['dates'].items()}
+        return stats
+
+    def is_cold_start(self, profile, list_type):
+        return profile.stats.get(list_type, {}).get('baskets', 0) < self.COLD_START_BASKETS
+
+    def suggest(self, list_obj, limit=5, profile=None):
+        """"Usually bought together" and "due again" suggestions for a list"""
+        profile = profile or self.get_profile(list_obj.user)
+        type_stats = profile.stats.get(list_obj.list_type)
+        if not type_stats:
+            return []
+
+        present = {normalize_item_name(name) for name in list_obj.items.values_list('name', flat=True)}
+        names = type_stats.get('names', {})
+        frequency = type_stats['frequency']
+        suggestions = []
+
+        # Usually bought together: confidence of candidate given items in the list
+        scores = Counter()
+        reasons = {}
+        for key in present:
+            for other, count in type_stats['pairs'].get(key, {}).items():
+                if other in present:
+                    continue
+                confidence = count / max(1, frequency.get(key, 1))
+                if confidence > scores[other]:
+                    reasons[other] = key
+                scores[other] = max(scores[other], confidence)
+        for other, confidence in scores.most_common(limit):
+            suggestions.append({
+                'type': 'bought_together',
+                'item_name': names.get(other, other),
+                'suggestion': f"Usually bought together with {names.get(reasons[other], reasons[other])}",
+                'confidence': round(confidence, 2),
+                'source': 'history'
+            })
+
+        # Repeat purchases that are due based on their usual interval
+        today = timezone.now().date()
+        for key, dates in type_stats['dates'].items():
+            if key in present or len(dates) < 2:
+                continue
+            parsed = [datetime.strptime(value, '%Y-%m-%d').date() for value in dates]
+            interval = (parsed[-1] - parsed[0]).days / (len(parsed) - 1)
+            if interval < 1:
+                continue
+            if (today - parsed[-1]).days >= interval * 0.8:
+                suggestions.append({
+                    'type': 'repeat_purchase',
+                    'item_name': names.get(key, key),
+                    'suggestion': f"You usually buy this every {self._describe_interval(interval)}",
+                    'interval_days': round(interval, 1),
+                    'source': 'history'
+                })
+
+        return suggestions[:limit * 2]
+
+    @staticmethod
+    def _describe_interval(days):
+        if days >= 13 and round(days / 7) >= 2:
+            return f"{round(days / 7)} weeks"
+        if days >= 6:
+            return 'week'
+        return f"{round(days)} days"
+
+    def get_user_context(self, user, list_type):
+        """Frequent items and basket sizes for AI prompts"""
+        profile = self.get_profile(user)
+        type_stats = profile.stats.get(list_type, {})
+        names = type_stats.get('names', {})
+        frequency = type_stats.get('frequency', {})
+        baskets = [basket for basket in profile.baskets.values() if basket['list_type'] == list_type]
+        frequent = sorted(frequency.items(), key=lambda entry: entry[1], reverse=True)[:10]
+        return {
+            'frequent_items': [names.get(key, key) for key, _ in frequent],
+            'list_count': len(baskets),
+            'avg_items_per_list': sum(len(basket['items']) for basket in baskets) / max(1, len(baskets))
+        }
@@ -1,3 +1,7 @@
+import json
+from io import StringIO
+from datetime import timedelta
+from decimal import Decimal
 from django.test import TestCase
 
 # Create your tests here.
@@ -6,7 +10,10 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
-from .models import List, ListItem, ListTemplate, ListCategory
+from django.utils import timezone
+from django.core.management import call_command
+from .models import List, ListItem, ListTemplate, ListCategory, ListAnalytics, ListActivity
+from .services import ListAnalyticsService
 
 
 class ListEndpointTests(APITestCase):
@@ -41,3 +48,1004 @@ class ListEndpointTests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+
+    def test_list_endpoint_query_count_is_constant(self):
+        url = reverse('list-list')
+        for i in range(5):
+            extra = List.objects.create(user=self.user, name=f'Extra {i}')
+            ListItem.objects.create(list=extra, name='Item', is_completed=True, price=2)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'view': 'summary'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('items', response.data[0])
+
+        extra_data = next(row for row in response.data if row['name'] == 'Extra 0')
+        self.assertEqual(extra_data['items_count'], 1)
+        self.assertEqual(extra_data['completed_items_count'], 1)
+        self.assertEqual(extra_data['total_actual_cost'], 2.0)
+
+
+class ListCounterTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='counter', password='testpassword')
+        self.list = List.objects.create(user=self.user, name='Groceries')
+
+    def assertCounters(self, total, completed, percentage):
+        self.list.refresh_from_db()
+        self.assertEqual(self.list.items_total, total)
+        self.assertEqual(self.list.items_completed, completed)
+        self.assertAlmostEqual(self.list.completion_percentage, percentage)
+
+    def test_counters_follow_item_writes(self):
+        milk = ListItem.objects.create(list=self.list, name='Milk')
+        ListItem.objects.create(list=self.list, name='Eggs', is_completed=True)
+        self.assertCounters(2, 1, 50.0)
+
+        milk.is_completed = True
+        milk.save()
+        self.assertCounters(2, 2, 100.0)
+
+        milk.delete()
+        self.assertCounters(1, 1, 100.0)
+
+    def test_bulk_complete_and_repair(self):
+        from .services import set_items_completed
+
+        for i in range(4):
+            ListItem.objects.create(list=self.list, name=f'Item {i}')
+        items = ListItem.objects.filter(list=self.list)
+
+        # rows, UPDATE, locked counters, counter UPDATE, completed_lists and completions rollups
+        with self.assertNumQueries(6):
+            self.assertEqual(set_items_completed(items, True, self.user), 4)
+        self.assertCounters(4, 4, 100.0)
+
+        List.objects.filter(pk=self.list.pk).update(items_total=0, items_completed=0)
+        self.assertEqual(List.recount_items([self.list.pk]), 1)
+        self.assertCounters(4, 4, 100.0)
+
+    def test_drifted_counters_are_clamped_at_zero(self):
+        item = ListItem.objects.create(list=self.list, name='Bread', is_completed=True)
+        List.objects.filter(pk=self.list.pk).update(items_total=0, items_completed=0)
+
+        item.delete()
+        self.assertCounters(0, 0, 0.0)
+
+
+class CompletionBucketTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='buckets', password='testpassword')
+        self.list = List.objects.create(user=self.user, name='Chores')
+
+    def test_buckets_are_gap_filled_from_one_query(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .services import completion_time_buckets
+
+        now = timezone.now()
+        item = ListItem.objects.create(list=self.list, name='Sweep', is_completed=True)
+        ListItem.objects.filter(pk=item.pk).update(
+            created_at=now - timedelta(days=2, hours=3),
+            completed_at=now - timedelta(days=2)
+        )
+
+        with self.assertNumQueries(1):
+            buckets = completion_time_buckets(self.user, now - timedelta(days=6), now)
+        self.assertEqual(len(buckets), 7)
+        self.assertEqual(sum(bucket['completed_items'] for bucket in buckets), 1)
+        completed = next(bucket for bucket in buckets if bucket['completed_items'])
+        self.assertAlmostEqual(completed['average_completion_hours'], 3.0)
+
+        monthly = completion_time_buckets(self.user, now - timedelta(days=90), now, 'month')
+        self.assertTrue(all(bucket['date'].day == 1 for bucket in monthly))
+        self.assertEqual(sum(bucket['completed_items'] for bucket in monthly), 1)
+
+
+class ListAnalyticsRollupTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollups', password='testpassword')
+        self.list = List.objects.create(user=self.user, name='Errands')
+
+    def test_writes_invalidate_cached_analytics(self):
+        item = ListItem.objects.create(list=self.list, name='Post office')
+        service = ListAnalyticsService()
+        self.assertEqual(service.get_user_analytics(self.user)['summary']['completed_items'], 0)
+
+        item.is_completed = True
+        item.save()
+        self.assertEqual(service.get_user_analytics(self.user)['summary']['completed_items'], 1)
+
+    def figures(self, rollup):
+        return (rollup.total_lists, rollup.completed_lists, rollup.total_items, rollup.completed_items,
+                rollup.estimated_cost)
+
+    def test_rollups_match_rebuild(self):
+        ListItem.objects.create(list=self.list, name='Bank', is_completed=True, estimated_price='4.00')
+        milk = ListItem.objects.create(list=self.list, name='Milk', estimated_price='1.50')
+        ListItem.objects.create(list=self.list, name='Stamps', estimated_price='9.00').delete()
+        milk.is_completed = True
+        milk.estimated_price = '2.25'
+        milk.save()
+        List.objects.create(user=self.user, name='Empty')
+
+        incremental = ListAnalytics.objects.get(user=self.user)
+        self.assertEqual(self.figures(incremental), (2, 1, 2, 2, Decimal('6.25')))
+
+        call_command('rebuild_list_analytics', stdout=StringIO())
+        rebuilt = ListAnalytics.objects.get(user=self.user)
+        self.assertEqual(self.figures(rebuilt), self.figures(incremental))
+
+        # Reopening an item makes the list incomplete again
+        milk.is_completed = False
+        milk.save()
+        self.assertEqual(ListAnalytics.objects.get(user=self.user).completed_lists, 0)
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            year = ListAnalyticsService().get_user_analytics(self.user, 'year')
+        self.assertFalse([query for query in queries if 'lists_listitem' in query['sql']])
+        self.assertEqual(len(year['completion_trends']), 12)
+        self.assertEqual(year['productivity']['items_completed'], 1)
+        self.assertEqual(year['summary']['completed_lists'], 0)
+        self.assertEqual(year['summary']['total_estimated_cost'], Decimal('6.25'))
+
+    def test_deleting_lists_takes_their_items_out_of_rollups(self):
+        from .services import delete_lists
+
+        ListItem.objects.create(list=self.list, name='Bank', is_completed=True)
+        ListItem.objects.create(list=self.list, name='Milk', estimated_price='3.00')
+        other = List.objects.create(user=self.user, name='Chores')
+        ListItem.objects.create(list=other, name='Sweep', is_completed=True, estimated_price='5.00')
+        kept = List.objects.create(user=self.user, name='Kept')
+        ListItem.objects.create(list=kept, name='Stamps')
+
+        self.list.delete()
+        self.assertEqual(delete_lists(List.objects.filter(pk=other.pk)), 1)
+
+        incremental = ListAnalytics.objects.get(user=self.user)
+        self.assertEqual(self.figures(incremental), (1, 0, 1, 0, Decimal('0')))
+        self.assertEqual(incremental.total_completion_seconds, 0.0)
+
+
+class ItemCategorizerTests(APITestCase):
+
+    def test_batch_matches_single_and_learns_overrides(self):
+        from .categorizer import ItemCategorizer
+
+        user = User.objects.create_user(username='categorizer', password='testpassword')
+        categorizer = ItemCategorizer()
+        names = ['Pineapple chunks', 'Whole milk', 'Dish soap', 'Mystery box']
+        self.assertEqual(
+            categorizer.categorize_many(names, 'shopping'),
+            [categorizer.categorize(name, 'shopping') for name in names]
+        )
+        self.assertEqual(categorizer.categorize_many(names, 'shopping'), ['fruits', 'dairy', 'household', 'other'])
+        self.assertEqual(categorizer.tags('Fresh organic whole milk', 'dairy', 'shopping'), ['organic', 'fresh', 'dairy-type'])
+
+        shopping = List.objects.create(user=user, name='Weekly shop', list_type='shopping')
+        oat_milk = ListItem.objects.create(list=shopping, name='Oat  Milk', category='dairy')
+        ListItem.objects.create(list=shopping, name='Dish soap', category='snacks')
+        self.client.force_authenticate(user=user)
+        response = self.client.patch(
+            reverse('list-item-detail', args=[oat_milk.pk]), {'category': 'plant-based'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        learned = ItemCategorizer.for_user(user)
+        self.assertEqual(learned.categorize('oat milk', 'shopping'), 'plant-based')
+        # Categories stored by AI or imports are not mistaken for user choices
+        self.assertEqual(learned.categorize('dish soap', 'shopping'), 'household')
+
+
+class ItemPriceIndexTests(APITestCase):
+
+    def test_completed_prices_feed_user_and_global_estimates(self):
+        from .models import ItemPrice
+
+        alice = User.objects.create_user(username='alice', password='testpassword')
+        bob = User.objects.create_user(username='bob', password='testpassword')
+        shop = List.objects.create(user=alice, name='Shop', list_type='shopping')
+        for price in ['3.00', '4.00', '5.00']:
+            ListItem.objects.create(list=shop, name='Milk', unit='l', price=price, is_completed=True)
+        item = ListItem.objects.create(list=shop, name='Bread')
+        item.is_completed = True
+        item.save()
+        item.price = '2.50'
+        item.save()
+
+        with self.assertNumQueries(1):
+            estimates = ItemPrice.estimate_many(alice.id, [('milk', 'L'), ('bread', None), ('caviar', None)])
+        self.assertEqual(estimates[0], Decimal('4.00'))
+        self.assertEqual(estimates[1], Decimal('2.50'))
+        self.assertIsNone(estimates[2])
+
+        # Item saves only touch the user's rows; global rows come from the rebuild
+        self.assertFalse(ItemPrice.objects.filter(user__isnull=True).exists())
+        call_command('rebuild_price_index', '--global-only', stdout=StringIO())
+
+        stats = ItemPrice.lookup_many(bob.id, [('Milk', 'l')])[0]
+        self.assertEqual(stats['source'], 'global')
+        self.assertEqual(stats['last_price'], Decimal('5.00'))
+
+        # A full rebuild in small batches reproduces the incremental user rows
+        def user_rows():
+            return list(ItemPrice.objects.filter(user=alice).order_by('name_key').values_list(
+                'name_key', 'unit', 'recent_prices', 'sample_count'
+            ))
+        incremental = user_rows()
+        output = StringIO()
+        call_command('rebuild_price_index', '--chunk-size', '2', stdout=output)
+        self.assertEqual(user_rows(), incremental)
+        self.assertIn('Indexed 4 prices for 1 users', output.getvalue())
+
+    def test_concurrently_created_row_absorbs_the_prices(self):
+        from unittest import mock
+        from .models import ItemPrice
+
+        user = User.objects.create_user(username='racer', password='testpassword')
+        add_price = ItemPrice.add_price
+
+        def racing_add_price(row, price):
+            # Another request inserts the row between our read and our insert
+            if row.pk is None and not ItemPrice.objects.filter(user=user, name_key='eggs').exists():
+                ItemPrice.objects.create(
+                    user=user, name_key='eggs', recent_prices=['2.00'],
+                    median_price=Decimal('2.00'), last_price=Decimal('2.00'), sample_count=1
+                )
+            add_price(row, price)
+
+        with mock.patch.object(ItemPrice, 'add_price', racing_add_price):
+            ItemPrice.record(user.id, [('Eggs', None, '3.00')])
+        row = ItemPrice.objects.get(user=user, name_key='eggs')
+        self.assertEqual((row.recent_prices, row.sample_count), (['2.00', '3.00'], 2))
+
+
+class CoPurchaseTests(APITestCase):
+
+    def test_bought_together_and_incremental_refresh(self):
+        from .suggestions import CoPurchaseService
+
+        user = User.objects.create_user(username='shopper', password='testpassword')
+        for week in range(3):
+            basket = List.objects.create(user=user, name=f'Week {week}', list_type='shopping')
+            for name in ['Pasta', 'Tomato sauce', 'Parmesan']:
+                ListItem.objects.create(list=basket, name=name)
+
+        current = List.objects.create(user=user, name='This week', list_type='shopping')
+        ListItem.objects.create(list=current, name='pasta')
+
+        service = CoPurchaseService()
+        profile = service.get_profile(user)
+        self.assertFalse(service.is_cold_start(profile, 'shopping'))
+
+        suggested = {s['item_name'] for s in service.suggest(current, profile=profile) if s['type'] == 'bought_together'}
+        self.assertEqual(suggested, {'Tomato sauce', 'Parmesan'})
+
+        # Unchanged lists are served from the stored profile
+        with self.assertNumQueries(2):
+            service.get_profile(user)
+
+        ListItem.objects.create(list=current, name='Parmesan')
+        suggested = {s['item_name'] for s in service.suggest(current) if s['type'] == 'bought_together'}
+        self.assertEqual(suggested, {'Tomato sauce'})
+
+
+class ParsingCacheTests(APITestCase):
+
+    def test_repeated_add_skips_llm_and_context_queries(self):
+        from unittest import mock
+        from .services import ListService
+
+        user = User.objects.create_user(username='parser', password='testpassword')
+        groceries = List.objects.create(user=user, name='Groceries', list_type='shopping')
+        last_week = List.objects.create(user=user, name='Last week', list_type='shopping')
+        for name, category in [('Milk', 'dairy'), ('Cheese', 'dairy'), ('Rice', 'pantry')]:
+            ListItem.objects.create(list=last_week, name=name, category=category)
+        service = ListService()
+        gemini = service.ai_service.gemini
+        gemini.ai_available = True
+        parsed = [{'name': 'Milk'}, {'name': 'Eggs'}, {'name': 'Bread'}]
+
+        with mock.patch.object(gemini, 'parse_natural_language', return_value=parsed) as parse:
+            service.add_items_from_text(groceries, 'milk, eggs, bread', user)
+            service.add_items_from_text(groceries, '  Milk,  eggs, BREAD ', user)
+            self.assertEqual(parse.call_count, 1)
+
+        context = service._build_parsing_context(groceries, user)
+        self.assertEqual(context['user_preferences']['preferred_categories'][:2], ['dairy', 'pantry'])
+        with self.assertNumQueries(1):
+            service._build_parsing_context(groceries, user)
+        self.assertEqual(groceries.items.count(), 6)
+
+    def test_item_edits_and_deletes_refresh_the_snapshot(self):
+        from .cache import ParsingContextSnapshot
+        from .services import delete_items
+
+        user = User.objects.create_user(username='snapshot', password='testpassword')
+        self.addCleanup(ParsingContextSnapshot.invalidate, user.id)
+        pantry = List.objects.create(user=user, name='Pantry', list_type='shopping')
+        milk = ListItem.objects.create(list=pantry, name='Milk', category='dairy')
+        cheese = ListItem.objects.create(list=pantry, name='Cheese', category='dairy')
+        rice = ListItem.objects.create(list=pantry, name='Rice', category='pantry')
+        self.assertEqual(ParsingContextSnapshot.get(user.id, 'shopping')['category_counts'], {'dairy': 2, 'pantry': 1})
+
+        cheese.category = 'deli'
+        cheese.save()
+        rice.quantity = '2 kg'
+        rice.save()
+        snapshot = ParsingContextSnapshot.get(user.id, 'shopping')
+        self.assertEqual(snapshot['category_counts'], {'dairy': 1, 'deli': 1, 'pantry': 1})
+        self.assertEqual(snapshot['typical_quantities'], ['2 kg'])
+
+        milk.delete()
+        delete_items(ListItem.objects.filter(pk=rice.pk))
+        snapshot = ParsingContextSnapshot.get(user.id, 'shopping')
+        self.assertEqual((snapshot['category_counts'], snapshot['typical_quantities']), ({'deli': 1}, []))
+
+    def test_list_renames_and_type_changes_refresh_the_snapshot(self):
+        from .cache import ParsingContextSnapshot
+
+        user = User.objects.create_user(username='renamer', password='testpassword')
+        self.addCleanup(ParsingContextSnapshot.invalidate, user.id)
+        weekly = List.objects.create(user=user, name='Weekly', list_type='shopping')
+
+        def recent(list_type):
+            return [entry['name'] for entry in ParsingContextSnapshot.get(user.id, list_type)['recent_lists']]
+        self.assertEqual((recent('shopping'), recent('todo')), (['Weekly'], []))
+
+        weekly = List.objects.get(pk=weekly.pk)
+        weekly.name = 'Weekend'
+        weekly.save()
+        self.assertEqual(recent('shopping'), ['Weekend'])
+
+        weekly.list_type = 'todo'
+        weekly.save(update_fields=['list_type'])
+        self.assertEqual((recent('shopping'), recent('todo')), ([], ['Weekend']))
+
+        # Unrelated saves keep the snapshot
+        weekly.is_archived = True
+        with self.assertNumQueries(1):
+            weekly.save(update_fields=['is_archived'])
+            recent('todo')
+
+
+class ListExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.lists = []
+        for index in range(3):
+            list_obj = List.objects.create(user=self.user, name=f'List {index}')
+            ListItem.objects.create(list=list_obj, name=f'Item {index}a')
+            ListItem.objects.create(list=list_obj, name=f'Item {index}b', is_completed=True)
+            self.lists.append(list_obj)
+
+    def export(self, format_type):
+        response = self.client.post(
+            reverse('list-export'),
+            {'list_ids': [list_obj.id for list_obj in self.lists], 'format': format_type},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_one_row_per_item(self):
+        rows = self.export('csv').strip().splitlines()
+        self.assertEqual(rows[0].split(',')[:2], ['List Name', 'Item Name'])
+        self.assertEqual(len(rows), 7)
+
+    def test_json_and_ndjson_exports_match(self):
+        import json
+
+        as_array = json.loads(self.export('json'))
+        as_lines = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(as_array, as_lines)
+        self.assertEqual(sorted(len(entry['items']) for entry in as_array), [2, 2, 2])
+
+    def test_export_queries_do_not_grow_with_lists(self):
+        from .services import ExportService
+
+        lists = List.objects.filter(user=self.user)
+        with self.assertNumQueries(2):
+            list(ExportService().export_lists_ndjson(lists))
+
+
+class ListImportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_csv_import_groups_lists_and_logs_one_activity_each(self):
+        content = (
+            'List Name,Item Name,Quantity,Category,Priority,Completed\n'
+            'Groceries,Milk,2,,high,No\n'
+            'Groceries,Apples,6,,,Yes\n'
+            'Hardware,Screws,,tools,,No\n'
+        )
+        response = self.client.post(
+            reverse('list-import'), {'format': 'csv', 'content': content}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['items_imported'], 3)
+
+        groceries = List.objects.get(user=self.user, name='Groceries')
+        self.assertEqual((groceries.items_total, groceries.items_completed), (2, 1))
+        self.assertEqual(groceries.items.get(name='Milk').priority, 'high')
+        self.assertEqual(ListActivity.objects.filter(list__user=self.user).count(), 2)
+
+    def test_large_import_runs_as_job_with_progress(self):
+        from unittest import mock
+        from .importer import ListImportService
+
+        content = 'Groceries:\n' + '\n'.join(f'- [ ] item {index}' for index in range(30))
+        with mock.patch.object(ListImportService, 'SYNC_LIMIT', 10), \
+                mock.patch.object(ListImportService, 'CHUNK_SIZE', 8):
+            response = self.client.post(
+                reverse('list-import'), {'format': 'txt', 'content': content}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            job_id = response.data['job_id']
+            # The request only enqueues the job; the command runs it
+            self.assertEqual(self.client.get(reverse('list-import-job', args=[job_id])).data['status'], 'pending')
+            call_command('run_list_imports', stdout=StringIO())
+
+        job = self.client.get(reverse('list-import-job', args=[job_id])).data
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual((job['processed_items'], job['progress']), (30, 100.0))
+        groceries = List.objects.get(id=job['list_ids'][0])
+        self.assertEqual(groceries.items.count(), 30)
+        self.assertEqual(groceries.activities.count(), 1)
+
+    def test_uploaded_file_is_stored_and_parsed_as_a_stream(self):
+        import tempfile
+        from unittest import mock
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import override_settings
+        from .importer import ListImportService
+        from .models import ListImportJob
+
+        content = 'List Name,Item Name\n' + ''.join(f'Bulk,item {index}\n' for index in range(25))
+        upload = SimpleUploadedFile('items.csv', content.encode('utf-8-sig'), content_type='text/csv')
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                mock.patch.object(ListImportService, 'SYNC_LIMIT', 10):
+            response = self.client.post(reverse('list-import'), {'format': 'csv', 'file': upload})
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            job = ListImportJob.objects.get(pk=response.data['job_id'])
+            self.assertEqual((job.content, job.total_items), ('', 27))
+            self.assertTrue(job.file)
+
+            call_command('run_list_imports', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_items, job.file.name), ('completed', 25, ''))
+        self.assertEqual(List.objects.get(user=self.user, name='Bulk').items_total, 25)
+
+    def test_json_arrays_are_decoded_element_by_element(self):
+        from unittest import mock
+        from .importer import ListImportService
+
+        document = json.dumps([{'name': f'item {index}', 'notes': 'x' * 40} for index in range(50)] + ['Last'])
+        stream = StringIO(document)
+        with mock.patch.object(ListImportService, 'JSON_READ_SIZE', 64):
+            rows = ListImportService().parse('json', stream)
+            self.assertEqual(next(rows)['name'], 'item 0')
+            self.assertLess(stream.tell(), 200)
+            self.assertEqual([row['name'] for row in rows][-2:], ['item 49', 'Last'])
+
+    def test_stalled_job_is_reclaimed_without_duplicating_lists(self):
+        from .models import ListImportJob
+
+        content = 'Groceries:\n' + '\n'.join(f'- item {index}' for index in range(5))
+        partial = List.objects.create(user=self.user, name='Groceries')
+        ListItem.objects.create(list=partial, name='item 0')
+        stalled = timezone.now() - timedelta(hours=1)
+        job = ListImportJob.objects.create(
+            user=self.user, format='txt', content=content, status='running',
+            started_at=stalled, heartbeat_at=stalled, processed_items=1, list_ids=[partial.pk]
+        )
+        ListImportJob.objects.create(
+            user=self.user, format='txt', content=content, status='running',
+            started_at=timezone.now(), heartbeat_at=timezone.now()
+        )
+
+        call_command('run_list_imports', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_items), ('completed', 5))
+        self.assertFalse(List.objects.filter(pk=partial.pk).exists())
+        self.assertEqual(List.objects.get(user=self.user, name='Groceries').items_total, 5)
+        self.assertEqual(ListImportJob.objects.filter(status='running').count(), 1)
+
+
+class ListSyncTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='syncer', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.list = List.objects.create(user=self.user, name='Groceries', list_type='shopping')
+        self.milk = ListItem.objects.create(list=self.list, name='Milk')
+        self.eggs = ListItem.objects.create(list=self.list, name='Eggs')
+
+    def test_delta_returns_only_changes_since_cursor(self):
+        from datetime import timedelta
+        from .sync import ListSyncService
+
+        full = self.client.get(reverse('list-sync')).data
+        self.assertTrue(full['full'])
+        self.assertEqual(len(full['items']), 2)
+
+        # Move existing rows out of the overlap window
+        past = timezone.now() - timedelta(minutes=5)
+        List.objects.filter(pk=self.list.pk).update(updated_at=past)
+        ListItem.objects.filter(list=self.list).update(updated_at=past)
+        cursor = (past + timedelta(minutes=1)).isoformat()
+
+        self.milk.name = 'Whole milk'
+        self.milk.save()
+        eggs_id = self.eggs.pk
+        self.eggs.delete()
+
+        delta = self.client.get(reverse('list-sync'), {'since': cursor}).data
+        self.assertFalse(delta['full'])
+        self.assertEqual([item['name'] for item in delta['items']], ['Whole milk'])
+        self.assertEqual([(entry['type'], entry['id']) for entry in delta['tombstones']], [('item', eggs_id)])
+        self.assertEqual(delta['lists'][0]['items_count'], 1)
+
+    def test_list_etag_answers_304_until_the_list_changes(self):
+        url = reverse('list-sync-list', args=[self.list.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.milk.is_completed = True
+        self.milk.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['lists'][0]['completed_items_count'], 1)
+
+    def test_if_none_match_compares_whole_entity_tags(self):
+        from .sync import ListSyncService
+
+        matches = ListSyncService.etag_matches
+        self.assertFalse(matches('"15:12"', '"5:1"'))
+        self.assertFalse(matches('"a5:1", "5:10"', '"5:1"'))
+        self.assertTrue(matches('"a5:1", W/"5:1"', '"5:1"'))
+        self.assertTrue(matches('*', '"5:1"'))
+        self.assertFalse(matches(None, '"5:1"'))
+
+
+class ItemOrderingTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='packer', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.list = List.objects.create(user=self.user, name='Packing', list_type='packing')
+        self.items = [ListItem.objects.create(list=self.list, name=name) for name in ['Tent', 'Boots', 'Map', 'Stove']]
+
+    def names(self):
+        return list(self.list.items.values_list('name', flat=True))
+
+    def test_move_writes_one_row_per_move(self):
+        tent, boots, map_item, stove = self.items
+        with self.assertNumQueries(4):
+            # item lookup, next neighbour, one item UPDATE, list version bump
+            self.list.move_items([(stove.pk, None)])
+        self.assertEqual(self.names(), ['Stove', 'Tent', 'Boots', 'Map'])
+
+        response = self.client.post(
+            reverse('list-move-items', args=[self.list.pk]),
+            {'moves': [{'item_id': tent.pk, 'after_id': map_item.pk}, {'item_id': boots.pk, 'after_id': None}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(), ['Boots', 'Stove', 'Map', 'Tent'])
+
+    def test_keys_sort_the_same_under_case_insensitive_collations(self):
+        from unittest import mock
+        from .ordering import keys_between, spread_keys
+
+        keys = keys_between(None, None, 500) + spread_keys(500)
+        self.assertEqual(sorted(keys), sorted(keys, key=str.casefold))
+
+        tent, boots = self.items[:2]
+        with mock.patch('lists.models.key_between', side_effect=ValueError('out of order')):
+            response = self.client.post(
+                reverse('list-move-items', args=[self.list.pk]),
+                {'item_id': tent.pk, 'after_id': boots.pk}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_repeated_moves_to_top_are_rebalanced(self):
+        for _ in range(60):
+            last = self.list.items.order_by('-position').first()
+            self.list.move_items([(last.pk, None)])
+        self.assertLessEqual(max(len(position) for position in self.list.items.values_list('position', flat=True)),
+                             ListItem.MAX_POSITION_LENGTH)
+        before = self.names()
+
+        call_command('rebalance_item_positions', min_length=1, stdout=StringIO())
+        self.assertEqual(self.names(), before)
+        self.assertEqual({len(position) for position in self.list.items.values_list('position', flat=True)}, {1})
+
+    def test_rebalanced_keys_reach_delta_sync(self):
+        from datetime import timedelta
+
+        past = timezone.now() - timedelta(minutes=5)
+        ListItem.objects.filter(list=self.list).update(updated_at=past)
+        cursor = (past + timedelta(minutes=1)).isoformat()
+
+        self.assertEqual(List.rebalance_positions(self.list.pk), 4)
+        delta = self.client.get(reverse('list-sync'), {'since': cursor}).data
+        self.assertEqual(
+            {item['id']: item['position'] for item in delta['items']},
+            dict(self.list.items.values_list('id', 'position'))
+        )
+
+    def test_server_side_sort(self):
+        self.items[2].priority = 'urgent'
+        self.items[2].save()
+        response = self.client.get(reverse('list-sorted-items', args=[self.list.pk]), {'sort_by': 'name'})
+        self.assertEqual([item['name'] for item in response.data], ['Boots', 'Map', 'Stove', 'Tent'])
+
+        List.objects.filter(pk=self.list.pk).update(auto_sort=True, sort_by='priority')
+        detail = self.client.get(reverse('list-detail', args=[self.list.pk])).data
+        self.assertEqual(detail['items'][0]['name'], 'Map')
+
+
+class ActivityFeedTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='historian', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.list = List.objects.create(user=self.user, name='Chores')
+
+    def log(self, action, when, **metadata):
+        return ListActivity.objects.create(
+            list=self.list, user=self.user, action=action, description=action,
+            metadata=metadata, created_at=when
+        )
+
+    def test_feed_pages_with_cursor(self):
+        from datetime import timedelta
+
+        now = timezone.now()
+        for minutes in range(25):
+            self.log('updated', now - timedelta(minutes=minutes))
+
+        url = reverse('list-activities', args=[self.list.pk])
+        first = self.client.get(url, {'page_size': 10}).data
+        self.assertEqual(len(first['results']), 10)
+        seen = [entry['id'] for entry in first['results']]
+
+        next_url = first['next']
+        while next_url:
+            page = self.client.get(next_url).data
+            seen.extend(entry['id'] for entry in page['results'])
+            next_url = page['next']
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 25)
+
+        detail = self.client.get(reverse('list-detail', args=[self.list.pk])).data
+        self.assertEqual(len(detail['recent_activities']), 10)
+
+    def test_compaction_folds_old_item_events_per_day(self):
+        from datetime import timedelta
+
+        old = timezone.now() - timedelta(days=60)
+        for _ in range(5):
+            self.log('item_added', old)
+        self.log('item_added', old, items_count=3)
+        self.log('item_completed', old)
+        self.log('updated', old)
+        recent = self.log('item_added', timezone.now())
+
+        call_command('compact_list_activity', stdout=StringIO())
+        call_command('compact_list_activity', stdout=StringIO())
+
+        summary = self.list.activities.get(action='item_added', metadata__summary=True)
+        self.assertEqual(summary.metadata['count'], 8)
+        self.assertEqual(summary.description, 'Added 8 items')
+        self.assertEqual(self.list.activities.count(), 4)
+        self.assertTrue(self.list.activities.filter(pk=recent.pk).exists())
+
+
+class UnifiedAgendaTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='planner', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_sources_are_merged_in_due_order_and_cached(self):
+        from datetime import datetime, time, timedelta
+        from todos.models import Task
+        from subscriptions.models import Subscription
+        from .services import AgendaService
+
+        today = timezone.localdate()
+        at = lambda hour, days=0: timezone.make_aware(datetime.combine(today + timedelta(days=days), time(hour)))
+
+        groceries = List.objects.create(user=self.user, name='Groceries')
+        ListItem.objects.create(list=groceries, name='Milk', due_date=at(18))
+        ListItem.objects.create(list=groceries, name='Stamps', due_date=at(9, days=-2))
+        ListItem.objects.create(list=groceries, name='Later', due_date=at(9, days=3))
+        Task.objects.create(user=self.user, title='Report', due_date=at(12))
+        Task.objects.create(user=self.user, title='Done', due_date=at(8), status='completed')
+        Subscription.objects.create(
+            user=self.user, name='Music', provider='Tunes', amount=Decimal('9.99'),
+            billing_cycle='monthly', start_date=today, next_billing_date=today
+        )
+
+        agenda = self.client.get(reverse('agenda-due')).data
+        self.assertEqual(
+            [(entry['type'], entry['title']) for entry in agenda['entries']],
+            [('list_item', 'Stamps'), ('subscription_renewal', 'Music'), ('task', 'Report'), ('list_item', 'Milk')]
+        )
+        self.assertEqual((agenda['summary']['total'], agenda['summary']['overdue']), (4, 1))
+
+        with self.assertNumQueries(0):
+            AgendaService().get_unified_agenda(self.user)
+
+        Task.objects.create(user=self.user, title='Call bank', due_date=at(10))
+        agenda = AgendaService().get_unified_agenda(self.user)
+        self.assertEqual(agenda['summary']['by_type']['task'], 2)
+
+    def test_daily_agenda_totals_are_not_capped_by_slices(self):
+        from .services import AgendaService
+
+        groceries = List.objects.create(user=self.user, name='Groceries')
+        for index in range(12):
+            ListItem.objects.create(list=groceries, name=f'Item {index}', priority='high')
+        agenda = AgendaService().get_daily_agenda(self.user)
+        self.assertEqual(len(agenda['pending_items']), 10)
+        self.assertEqual(agenda['summary']['total_pending'], 12)
+
+
+class ExpenseConversionTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='spender', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def shopping_list(self, name, items):
+        list_obj = List.objects.create(user=self.user, name=name, list_type='shopping')
+        for item_name, quantity, price, category in items:
+            ListItem.objects.create(
+                list=list_obj, name=item_name, quantity=quantity, price=Decimal(price),
+                category=category, is_completed=True
+            )
+        return list_obj
+
+    def test_quantities_with_units(self):
+        from .conversion import parse_quantity
+
+        self.assertEqual(parse_quantity('2 kg'), (Decimal('2.000'), 'kg'))
+        self.assertEqual(parse_quantity('1 1/2', 'lb'), (Decimal('1.500'), 'lb'))
+        self.assertEqual(parse_quantity('3x'), (Decimal('3.000'), 'x'))
+        self.assertEqual(parse_quantity('a few'), (None, None))
+
+    def test_batch_conversion_is_itemized_and_idempotent(self):
+        from expenses.models import Expense
+
+        first = self.shopping_list('Monday run', [
+            ('Rice', '2 kg', '120.00', 'pantry'),
+            ('Milk', '2', '30.00', 'dairy'),
+            ('Soap', '3 pcs', '25.00', 'household'),
+        ])
+        second = self.shopping_list('Friday run', [('Eggs', '12', '6.00', 'dairy')])
+        empty = List.objects.create(user=self.user, name='Nothing bought', list_type='shopping')
+        list_ids = [first.pk, second.pk, empty.pk]
+
+        response = self.client.post(reverse('batch-convert-to-expense'), {'list_ids': list_ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['skipped_list_ids'], [empty.pk])
+        self.assertEqual(response.data['total_amount'], 120 + 60 + 75 + 72)
+
+        expenses = Expense.objects.filter(user=self.user).order_by('display_id')
+        self.assertEqual(
+            [(expense.display_id, expense.category, expense.amount) for expense in expenses],
+            [(1, 'Groceries', Decimal('180.00')), (2, 'Shopping', Decimal('75.00')), (3, 'Groceries', Decimal('72.00'))]
+        )
+        first.refresh_from_db()
+        self.assertEqual(first.actual_cost, Decimal('255.00'))
+        self.assertIsNotNone(first.expense_converted_at)
+
+        again = self.client.post(reverse('batch-convert-to-expense'), {'list_ids': list_ids}, format='json')
+        self.assertEqual(again.data['expense_ids'], [])
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+
+    def test_display_ids_are_reserved_under_the_user_lock(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from expenses.models import Expense
+        from .conversion import ShoppingExpenseConverter
+
+        groceries = self.shopping_list('Groceries', [('Rice', '1', '50.00', 'pantry')])
+        with CaptureQueriesContext(connection) as queries:
+            ShoppingExpenseConverter().convert(self.user, [groceries.pk])
+        # The user row is locked before the highest display_id is read
+        statements = [query['sql'] for query in queries]
+        lock = next(index for index, sql in enumerate(statements) if sql.startswith('UPDATE "auth_user"'))
+        read = next(index for index, sql in enumerate(statements) if 'MAX' in sql or '"display_id" DESC' in sql)
+        self.assertLess(lock, read)
+
+        expense = Expense.objects.create(
+            user=self.user, amount=Decimal('5.00'), category='Other', transaction_date=timezone.localdate()
+        )
+        self.assertEqual(expense.display_id, 2)
+
+
+class TemplateCatalogTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='curator', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def template_with_items(self, name, count, **kwargs):
+        from .models import TemplateItem
+
+        template = ListTemplate.objects.create(user=self.user, name=name, **kwargs)
+        TemplateItem.objects.bulk_create([TemplateItem(template=template, name=f'Item {i}') for i in range(count)])
+        return template
+
+    def test_clone_query_count_does_not_depend_on_template_size(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        # The first clone also creates the user's analytics row
+        self.template_with_items('Warm up', 1).clone_to_list(self.user)
+        counts = []
+        for size in (5, 30):
+            template = self.template_with_items(f'Template {size}', size)
+            with CaptureQueriesContext(connection) as queries:
+                new_list = template.clone_to_list(self.user)
+            counts.append(len(queries))
+            new_list.refresh_from_db()
+            self.assertEqual((new_list.items_total, new_list.items.count()), (size, size))
+            template.refresh_from_db()
+            self.assertEqual(template.use_count, 1)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_catalog_ranks_public_templates_by_use(self):
+        self.template_with_items('Camping trip', 1, is_public=True, category='travel', use_count=5)
+        self.template_with_items('Beach trip', 1, is_public=True, category='travel', use_count=9)
+        self.template_with_items('Private trip', 1, category='travel', use_count=50)
+        self.template_with_items('Weekly groceries', 1, is_public=True, category='shopping', use_count=20)
+
+        url = reverse('template-catalog')
+        response = self.client.get(url, {'category': 'travel'})
+        self.assertEqual([entry['name'] for entry in response.data['results']], ['Beach trip', 'Camping trip'])
+
+        response = self.client.get(url, {'q': 'trip camp'})
+        self.assertEqual([entry['name'] for entry in response.data['results']], ['Camping trip'])
+
+
+class RecurringItemTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='routine', password='testpassword')
+        self.list = List.objects.create(user=self.user, name='Weekly shop', list_type='shopping')
+
+    def completed_item(self, name, frequency, days_ago, **kwargs):
+        item = ListItem.objects.create(
+            list=self.list, name=name, is_recurring=bool(frequency), recurring_frequency=frequency,
+            is_completed=True, **kwargs
+        )
+        ListItem.objects.filter(pk=item.pk).update(completed_at=timezone.now() - timedelta(days=days_ago))
+        return item
+
+    def test_due_items_are_reopened_with_one_counter_update_per_list(self):
+        from .recurring import RecurringItemScheduler
+
+        due_date = timezone.now() - timedelta(days=10)
+        milk = self.completed_item('Milk', 'daily', 2)
+        bread = self.completed_item('Bread', 'weekly', 8, due_date=due_date)
+        eggs = self.completed_item('Eggs', 'weekly', 3)
+        rice = self.completed_item('Rice', 'monthly', 20)
+        self.completed_item('Tea', None, 90)
+
+        items, lists = RecurringItemScheduler().regenerate()
+        self.assertEqual((items, lists), (2, 1))
+
+        bread.refresh_from_db()
+        self.assertFalse(bread.is_completed)
+        self.assertIsNone(bread.completed_at)
+        self.assertEqual(bread.due_date, due_date + timedelta(weeks=2))
+        self.assertFalse(ListItem.objects.get(pk=milk.pk).is_completed)
+        self.assertTrue(ListItem.objects.get(pk=eggs.pk).is_completed)
+        self.assertTrue(ListItem.objects.get(pk=rice.pk).is_completed)
+
+        self.list.refresh_from_db()
+        self.assertEqual((self.list.items_total, self.list.items_completed), (5, 3))
+        self.assertEqual(ListActivity.objects.filter(list=self.list, metadata__source='recurring').count(), 1)
+
+        self.assertEqual(RecurringItemScheduler().regenerate(), (0, 0))
+
+    def test_monthly_periods_clamp_to_month_end(self):
+        from datetime import datetime
+        from .recurring import advance
+
+        self.assertEqual(advance(datetime(2025, 1, 31), 'monthly'), datetime(2025, 2, 28))
+        self.assertEqual(advance(datetime(2025, 3, 31), 'monthly', -1), datetime(2025, 2, 28))
+        self.assertEqual(advance(datetime(2025, 12, 15), 'monthly'), datetime(2026, 1, 15))
+
+
+class AIInsightsTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='insightful', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        groceries = List.objects.create(user=self.user, name='Groceries', list_type='shopping')
+        ListItem.objects.create(list=groceries, name='Milk', is_completed=True)
+        ListItem.objects.create(list=groceries, name='Eggs')
+
+    def fake_model(self, text):
+        from unittest import mock
+
+        model = mock.Mock()
+        model.generate_content.return_value = mock.Mock(text=text)
+        return model
+
+    def test_insights_panel_costs_one_call_per_data_version(self):
+        import json
+        from unittest import mock
+        from .services import GeminiAI
+
+        reply = json.dumps({
+            'insights': [{'type': 'tip', 'title': 'Halfway', 'description': 'Finish the list', 'priority': 'low'}],
+            'predictions': {'next_week_completion': '60%'},
+            'motivational_message': 'Keep going!',
+        })
+        model = self.fake_model(f'```json\n{reply}\n```')
+
+        def init(gemini):
+            gemini.ai_available = True
+            gemini.model = model
+
+        url = reverse('ai-insights')
+        with mock.patch.object(GeminiAI, '__init__', init):
+            response = self.client.get(url)
+            self.client.get(url)
+            self.assertEqual(model.generate_content.call_count, 1)
+            self.assertEqual(response.data['motivational_message'], 'Keep going!')
+            self.assertEqual(response.data['predictions'], {'next_week_completion': '60%'})
+            self.assertEqual(response.data['insights'][0]['title'], 'Halfway')
+
+            ListItem.objects.create(list=List.objects.get(user=self.user), name='Bread')
+            self.client.get(url)
+            self.assertEqual(model.generate_content.call_count, 2)
+
+    def test_malformed_sections_fall_back_individually(self):
+        from .services import GeminiAI
+
+        gemini = GeminiAI()
+        gemini.ai_available = True
+        gemini.model = self.fake_model('{"insights": "not a list", "motivational_message": "Nice work"}')
+
+        bundle, complete = gemini.get_insights_bundle({'avg_completion': 90}, {}, 'active')
+        self.assertFalse(complete)
+        self.assertEqual(bundle['insights'], GeminiAI.FALLBACK_INSIGHTS)
+        self.assertEqual(bundle['predictions'], GeminiAI.FALLBACK_PREDICTIONS)
+        self.assertEqual(bundle['motivational_message'], 'Nice work')
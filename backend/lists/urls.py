@@ -11,7 +11,11 @@ router.register(r'', views.ListViewSet, basename='list')
 urlpatterns = [
     # Core views (must come before router)
     path('agenda/', views.AgendaView.as_view(), name='agenda'),
+    path('agenda/due/', views.AgendaDueView.as_view(), name='agenda-due'),
     path('analytics/', views.ListAnalyticsView.as_view(), name='list-analytics'),
+    path('import/', views.ListImportView.as_view(), name='list-import'),
+    path('convert-to-expenses/', views.BatchConvertToExpenseView.as_view(), name='batch-convert-to-expense'),
+    path('import/<int:job_id>/', views.ListImportJobView.as_view(), name='list-import-job'),
     
     # AI endpoints
     path('ai/insights/', views.AIInsightsView.as_view(), name='ai-insights'),
@@ -23,6 +27,7 @@ urlpatterns = [
     path('<str:list_id>/add_items/', views.SmartAddItemView.as_view(), name='list-add-items'),
     path('<str:list_id>/convert-to-expense/', views.ConvertToExpenseView.as_view(), name='convert-to-expense'),
     path('<str:pk>/duplicate/', views.ListViewSet.as_view({'post': 'duplicate'}), name='list-duplicate'),
+    path('<str:list_id>/activities/', views.ListActivityFeedView.as_view(), name='list-activities'),
     path('<str:list_id>/suggestions/', views.ListSuggestionsView.as_view(), name='list-suggestions'),
     path('<str:list_id>/smart_completion/', views.SmartCompletionView.as_view(), name='smart-completion'),
     path('items/<str:item_id>/', views.ListItemDetailView.as_view(), name='list-item-detail'),
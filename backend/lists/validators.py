@@ -354,6 +354,9 @@ class ListTemplateValidator:
 class ListImportValidator:
     """Validator for list import operations"""
     
+    FORMATS = ['csv', 'json', 'ndjson', 'txt']
+    MAX_ITEMS = 100000
+    
     @staticmethod
     def validate_import_data(data, user):
         """Validate imported list data"""
@@ -362,19 +365,19 @@ class ListImportValidator:
         # Validate file format
         if not data.get('format'):
             errors['format'] = 'Import format is required'
-        elif data['format'] not in ['csv', 'json', 'txt']:
-            errors['format'] = 'Invalid format. Supported formats: csv, json, txt'
+        elif data['format'] not in ListImportValidator.FORMATS:
+            errors['format'] = f'Invalid format. Supported formats: {", ".join(ListImportValidator.FORMATS)}'
         
         # Validate data structure
-        if not data.get('items') and not data.get('content'):
+        if not data.get('items') and not data.get('content') and not data.get('file'):
             errors['data'] = 'No data provided for import'
         
         # Validate items if provided
         if data.get('items'):
             if not isinstance(data['items'], list):
                 errors['items'] = 'Items must be provided as a list'
-            elif len(data['items']) > 1000:
-                errors['items'] = 'Cannot import more than 1000 items at once'
+            elif len(data['items']) > ListImportValidator.MAX_ITEMS:
+                errors['items'] = f'Cannot import more than {ListImportValidator.MAX_ITEMS} items at once'
             else:
                 # Validate each item
                 for i, item in enumerate(data['items']):
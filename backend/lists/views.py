@@ -1,29 +1,83 @@
 # lists/views.py
 
+import io
+import json
 import logging
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
+from rest_framework.generics import ListAPIView
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from django.db import models
-from django.db.models import Avg
-from django.http import HttpResponse
-from .models import List, ListItem, ListTemplate
-from .serializers import ListSerializer, ListItemSerializer, ListTemplateSerializer
+from django.db import connection, models, transaction
+from django.db.models import Count, F, Prefetch, Q, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import List, ListItem, ListTemplate, ListActivity, ListImportJob
+from .cache import bump_list_data_version
+from .serializers import (
+    ListSerializer, ListItemSerializer, ListTemplateSerializer, ListSummarySerializer, ListActivitySerializer,
+    RECENT_ACTIVITY_LIMIT
+)
 from datetime import datetime, date
 
 
 logger = logging.getLogger(__name__)
 
 
+class TemplateCatalogPagination(PageNumberPagination):
+    """Pages of the public template catalog"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ActivityFeedPagination(CursorPagination):
+    """Keyset pagination over the (list, created_at) activity index"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
 
 class ListViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = ListSerializer
+    MAX_MOVES = 500
 
     def get_queryset(self):
-        return List.objects.filter(user=self.request.user).prefetch_related('items')
+        queryset = List.objects.filter(user=self.request.user).select_related(
+            'category', 'template'
+        ).annotate(
+            items_count=Count('items'),
+            completed_items_count=Count('items', filter=Q(items__is_completed=True)),
+            pending_items_count=Count('items', filter=Q(items__is_completed=False)),
+            total_estimated_cost=Sum('items__estimated_price'),
+            total_actual_cost=Sum('items__price'),
+        )
+
+        if self.is_summary_view():
+            return queryset
+
+        return queryset.prefetch_related(
+            Prefetch('items', queryset=ListItem.objects.select_related('completed_by')),
+            Prefetch(
+                'activities',
+                queryset=ListActivity.objects.select_related('user')[:RECENT_ACTIVITY_LIMIT],
+                to_attr='recent_activity_list'
+            ),
+        )
+
+    def is_summary_view(self):
+        """Summary mode skips nested items and activities (?view=summary)"""
+        return self.action == 'list' and self.request.query_params.get('view') == 'summary'
+
+    def get_serializer_class(self):
+        if self.is_summary_view():
+            return ListSummarySerializer
+        return ListSerializer
 
     def perform_create(self, serializer):
         try:
@@ -45,6 +99,73 @@ class ListViewSet(viewsets.ModelViewSet):
             logger.error(f"List creation error: {e}")
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """Lists, items and deletions changed since the ?since= cursor"""
+        from .sync import ListSyncService
+        service = ListSyncService()
+        return self._sync_response(request, service, service.user_etag(request.user))
+
+    @action(detail=True, methods=['get'], url_path='sync')
+    def sync_list(self, request, pk=None):
+        """Delta sync for one list, answering If-None-Match from the list version"""
+        from .sync import ListSyncService
+        version = List.objects.filter(pk=pk, user=request.user).values_list('version', flat=True).first()
+        if version is None:
+            return Response({'error': 'List not found'}, status=status.HTTP_404_NOT_FOUND)
+        service = ListSyncService()
+        return self._sync_response(request, service, service.list_etag(pk, version), list_id=pk)
+
+    def _sync_response(self, request, service, etag, list_id=None):
+        if service.etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        try:
+            since = service.parse_cursor(request.query_params.get('since'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(service.changes(request.user, since, list_id=list_id), headers={'ETag': etag})
+
+    @action(detail=True, methods=['get'], url_path='items')
+    def sorted_items(self, request, pk=None):
+        """Items in ?sort_by= order, or the list's own sort when auto_sort is on"""
+        try:
+            list_obj = List.objects.get(pk=pk, user=request.user)
+            sort_by = request.query_params.get('sort_by') or (list_obj.sort_by if list_obj.auto_sort else None)
+            items = list_obj.items.select_related('completed_by').order_by(*ListItem.ordering_for(sort_by))
+            return Response(ListItemSerializer(items, many=True).data)
+        except List.DoesNotExist:
+            return Response({'error': 'List not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    @action(detail=True, methods=['post'], url_path='move-items')
+    def move_items(self, request, pk=None):
+        """Move items after another item (or to the top with after_id null)"""
+        try:
+            list_obj = List.objects.get(pk=pk, user=request.user)
+            moves = request.data.get('moves')
+            if moves is None and request.data.get('item_id'):
+                moves = [request.data]
+            if not moves or not isinstance(moves, list):
+                return Response({'error': 'moves required'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(moves) > self.MAX_MOVES:
+                return Response(
+                    {'error': f'Cannot move more than {self.MAX_MOVES} items at once'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            with transaction.atomic():
+                positions = list_obj.move_items([(move['item_id'], move.get('after_id')) for move in moves])
+            return Response({'positions': positions})
+        except List.DoesNotExist:
+            return Response({'error': 'List not found'}, status=status.HTTP_404_NOT_FOUND)
+        except ListItem.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except (KeyError, TypeError):
+            return Response({'error': 'Each move needs an item_id'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            # Stored order keys that do not sort as expected
+            logger.error(f"Failed to move items in list {pk}: {e}")
+            return Response({'error': 'Item order is out of date; reload the list'}, status=status.HTTP_409_CONFLICT)
+
     @action(detail=True, methods=['post'], url_path='shopping-mode')
     def shopping_mode(self, request, pk=None):
         try:
@@ -55,17 +176,15 @@ class ListViewSet(viewsets.ModelViewSet):
                 list_obj.list_type = 'shopping'
                 list_obj.save()
             
-            # Calculate shopping totals
-            estimated_total = list_obj.items.filter(
-                estimated_price__isnull=False
-            ).aggregate(total=models.Sum('estimated_price'))['total'] or 0
-            
-            actual_total = list_obj.items.filter(
-                price__isnull=False, is_completed=True
-            ).aggregate(total=models.Sum('price'))['total'] or 0
-            
-            pending_items = list_obj.items.filter(is_completed=False).count()
-            completed_items = list_obj.items.filter(is_completed=True).count()
+            # Counts come from the denormalized counters
+            totals = list_obj.items.aggregate(
+                estimated=Sum('estimated_price'),
+                actual=Sum('price', filter=Q(is_completed=True))
+            )
+            estimated_total = totals['estimated'] or 0
+            actual_total = totals['actual'] or 0
+            completed_items = list_obj.items_completed
+            pending_items = list_obj.items_total - completed_items
             
             shopping_data = {
                 'list': ListSerializer(list_obj).data,
@@ -105,8 +224,8 @@ class ListViewSet(viewsets.ModelViewSet):
             )
             
             # Copy all items
-            for item in original_list.items.all():
-                ListItem.objects.create(
+            items_to_create = [
+                ListItem(
                     list=new_list,
                     name=item.name,
                     description=item.description,
@@ -120,6 +239,9 @@ class ListViewSet(viewsets.ModelViewSet):
                     url=item.url,
                     image_url=item.image_url
                 )
+                for item in original_list.items.all()
+            ]
+            new_list.bulk_add_items(items_to_create)
             
             serializer = self.get_serializer(new_list)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -193,11 +315,12 @@ class ListViewSet(viewsets.ModelViewSet):
             lists = List.objects.filter(id__in=list_ids, user=request.user)
             
             if operation == 'archive_lists':
-                lists.update(is_archived=True)
-                return Response({'message': f'Archived {lists.count()} lists'})
+                count = lists.update(is_archived=True, updated_at=timezone.now(), version=F('version') + 1)
+                bump_list_data_version(request.user.id)
+                return Response({'message': f'Archived {count} lists'})
             elif operation == 'delete_lists':
-                count = lists.count()
-                lists.delete()
+                from .services import delete_lists
+                count = delete_lists(lists)
                 return Response({'message': f'Deleted {count} lists'})
             elif operation == 'duplicate_lists':
                 duplicated = []
@@ -211,8 +334,8 @@ class ListViewSet(viewsets.ModelViewSet):
                         category=list_obj.category
                     )
                     # Copy items with all fields
-                    for item in list_obj.items.all():
-                        ListItem.objects.create(
+                    items_to_create = [
+                        ListItem(
                             list=new_list,
                             name=item.name,
                             description=item.description,
@@ -224,6 +347,9 @@ class ListViewSet(viewsets.ModelViewSet):
                             estimated_price=item.estimated_price,
                             notes=item.notes
                         )
+                        for item in list_obj.items.all()
+                    ]
+                    new_list.bulk_add_items(items_to_create)
                     duplicated.append(new_list)
                 return Response({'message': f'Duplicated {len(duplicated)} lists'})
             else:
@@ -241,20 +367,19 @@ class ListViewSet(viewsets.ModelViewSet):
             if not list_ids:
                 return Response({'error': 'list_ids required'}, status=status.HTTP_400_BAD_REQUEST)
             
-            lists = List.objects.filter(id__in=list_ids, user=request.user).prefetch_related('items')
-            
-            from .services import ExportService
-            export_service = ExportService()
-            
-            if format_type == 'csv':
-                content = export_service.export_lists_csv(lists)
-                response = HttpResponse(content, content_type='text/csv')
-                response['Content-Disposition'] = f'attachment; filename="lists_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-                return response
-            elif format_type == 'json':
-                content = export_service.export_lists_json(lists)
-                response = HttpResponse(content, content_type='application/json')
-                response['Content-Disposition'] = f'attachment; filename="lists_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
+            exporters = {
+                'csv': ('export_lists_csv', 'text/csv', 'csv'),
+                'json': ('export_lists_json', 'application/json', 'json'),
+                'ndjson': ('export_lists_ndjson', 'application/x-ndjson', 'ndjson'),
+            }
+            if format_type in exporters:
+                from .services import ExportService
+                method, content_type, extension = exporters[format_type]
+                lists = List.objects.filter(id__in=list_ids, user=request.user)
+                response = StreamingHttpResponse(
+                    getattr(ExportService(), method)(lists), content_type=content_type
+                )
+                response['Content-Disposition'] = f'attachment; filename="lists_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}"'
                 return response
             else:
                 return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
@@ -286,6 +411,10 @@ class ListItemDetailView(APIView):
                     elif not request.data['is_completed'] and item.is_completed:
                         serializer.validated_data['completed_by'] = None
                 
+                # Explicit re-categorizations feed the user's learned overrides
+                if serializer.validated_data.get('category', item.category) != item.category:
+                    serializer.validated_data['category_edited'] = True
+                
                 serializer.save()
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -343,6 +472,30 @@ class ListTemplateViewSet(viewsets.ModelViewSet):
             logger.error(f"Template creation failed: {e}")
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get'])
+    def catalog(self, request):
+        """Public templates, most used first, filtered by ?category= and searched by ?q="""
+        templates = ListTemplate.objects.filter(is_public=True).select_related('user')
+        category = request.query_params.get('category')
+        if category:
+            templates = templates.filter(category=category)
+
+        query = (request.query_params.get('q') or '').strip()
+        if query and connection.vendor == 'postgresql':
+            from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+            vector = SearchVector('name', weight='A') + SearchVector('description', weight='B')
+            search = SearchQuery(query, search_type='websearch')
+            templates = templates.annotate(rank=SearchRank(vector, search)).filter(rank__gt=0)
+            templates = templates.order_by('-rank', '-use_count', '-created_at')
+        else:
+            for term in query.split():
+                templates = templates.filter(name__icontains=term)
+            templates = templates.order_by('-use_count', '-created_at')
+
+        paginator = TemplateCatalogPagination()
+        page = paginator.paginate_queryset(templates, request, view=self)
+        return paginator.get_paginated_response(ListTemplateSerializer(page, many=True).data)
+
     @action(detail=True, methods=['post'], url_path='create')
     def create_list(self, request, pk=None):
         try:
@@ -357,10 +510,6 @@ class ListTemplateViewSet(viewsets.ModelViewSet):
                 list_description=list_description
             )
             
-            # Increment use count
-            template.use_count += 1
-            template.save()
-            
             serializer = ListSerializer(new_list)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -415,8 +564,25 @@ class ListSuggestionsView(APIView):
         try:
             list_obj = List.objects.get(id=list_id, user=request.user)
             
-            from .services import ListItemService
-            suggestions = ListItemService().get_smart_suggestions(list_obj)
+            from .services import GeminiAI, ListItemService
+            from .suggestions import CoPurchaseService
+            
+            co_purchase = CoPurchaseService()
+            profile = co_purchase.get_profile(request.user)
+            suggestions = ListItemService().get_smart_suggestions(list_obj, profile=profile)
+            
+            # Only users without enough history pay for an LLM round trip
+            if co_purchase.is_cold_start(profile, list_obj.list_type):
+                existing = {item.lower() for item in list_obj.items.values_list('name', flat=True)}
+                for item in GeminiAI().suggest_list_items(list_obj.name, list_obj.list_type):
+                    if item.get('name') and item['name'].lower() not in existing:
+                        suggestions.append({
+                            'type': 'add_item',
+                            'suggestion': f"Consider adding '{item['name']}'",
+                            'item_name': item['name'],
+                            'priority': item.get('priority', 'medium'),
+                            'source': 'ai'
+                        })
             
             return Response({
                 'suggestions': suggestions,
@@ -472,35 +638,36 @@ class AgendaView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AgendaDueView(APIView):
+    """Everything due on a day (default today) across lists, tasks, loans and subscriptions"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            from .services import AgendaService
+            day = request.query_params.get('date')
+            day = datetime.strptime(day, '%Y-%m-%d').date() if day else None
+            return Response(AgendaService().get_unified_agenda(request.user, day))
+        except ValueError:
+            return Response({'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 class AIInsightsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         try:
-            from .services import GeminiAI
+            from .services import AIInsightsService
             
-            user_lists = List.objects.filter(user=request.user)
-            gemini = GeminiAI()
-            
-            user_data = {
-                'total_lists': user_lists.count(),
-                'completed_lists': user_lists.filter(completion_percentage=100).count(),
-                'avg_completion': user_lists.aggregate(avg=Avg('completion_percentage'))['avg'] or 0,
-                'total_items': ListItem.objects.filter(list__user=request.user).count(),
-                'completed_items': ListItem.objects.filter(list__user=request.user, is_completed=True).count()
-            }
-            
-            insights = gemini.get_productivity_insights(user_data)
-            predictions = gemini.get_productivity_predictions(user_data)
-            motivational = gemini.generate_motivational_message(
-                user_data['avg_completion'], 
-                'active' if user_lists.count() > 0 else 'new'
-            )
+            service = AIInsightsService()
+            bundle = service.get_sections(request.user, service.get_user_data(request.user))
             
             return Response({
-                'insights': insights,
-                'predictions': predictions,
-                'motivational_message': motivational
+                'insights': bundle['insights'],
+                'predictions': bundle['predictions'],
+                'motivational_message': bundle['motivational_message']
             })
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -604,44 +771,26 @@ class ConvertToExpenseView(APIView):
 
     def post(self, request, list_id):
         try:
-            from datetime import date
             list_obj = List.objects.get(id=list_id, user=request.user)
-            
-            # Get completed items with prices
-            completed_items = list_obj.items.filter(is_completed=True, price__isnull=False)
-            
-            if not completed_items.exists():
+            if list_obj.expense_converted_at:
+                return Response({
+                    'message': 'This list has already been converted to expenses',
+                    'expense_ids': [],
+                    'total_amount': float(list_obj.actual_cost or 0),
+                    'items_count': 0
+                })
+            
+            from .conversion import ShoppingExpenseConverter
+            result = ShoppingExpenseConverter().convert(request.user, [list_id])
+            if not result['expenses']:
                 return Response({'error': 'No completed items with prices found'}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Calculate total with quantities
-            total_amount = 0
-            for item in completed_items:
-                qty = float(item.quantity or 1)
-                price = float(item.price or 0)
-                total_amount += qty * price
-            
-            # Create expense text
-            expense_text = f"Shopping: {list_obj.name} - {', '.join([f'{item.name} (₹{item.price})' for item in completed_items])}"
-            
-            # Create expense using the expenses app
-            from expenses.models import Expense
-            expense = Expense.objects.create(
-                user=request.user,
-                amount=total_amount,
-                description=expense_text,
-                category='Groceries',
-                transaction_date=date.today()
-            )
-            
-            # Update list with actual cost
-            list_obj.actual_cost = total_amount
-            list_obj.save()
-            
             return Response({
-                'message': f'Successfully converted to expense: ₹{total_amount}',
-                'expense_id': expense.expense_id,
-                'total_amount': float(total_amount),
-                'items_count': completed_items.count()
+                'message': f"Successfully converted to expense: ₹{result['total_amount']}",
+                'expense_id': result['expenses'][0],
+                'expense_ids': result['expenses'],
+                'total_amount': result['total_amount'],
+                'items_count': result['items_count']
             })
             
         except List.DoesNotExist:
@@ -651,30 +800,55 @@ class ConvertToExpenseView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BatchConvertToExpenseView(APIView):
+    """Convert many shopping lists to itemized expenses in one transaction"""
+    permission_classes = [IsAuthenticated]
+    MAX_LISTS = 200
+
+    def post(self, request):
+        try:
+            list_ids = request.data.get('list_ids', [])
+            if not list_ids or not isinstance(list_ids, list):
+                return Response({'error': 'list_ids required'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(list_ids) > self.MAX_LISTS:
+                return Response(
+                    {'error': f'Cannot convert more than {self.MAX_LISTS} lists at once'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            from .conversion import ShoppingExpenseConverter
+            result = ShoppingExpenseConverter().convert(request.user, list_ids)
+            converted = set(result['lists'])
+            return Response({
+                'message': f"Converted {len(converted)} lists into {len(result['expenses'])} expenses",
+                'converted_list_ids': result['lists'],
+                'skipped_list_ids': [list_id for list_id in list_ids if list_id not in converted],
+                'expense_ids': result['expenses'],
+                'total_amount': result['total_amount'],
+                'items_count': result['items_count']
+            }, status=status.HTTP_201_CREATED if converted else status.HTTP_200_OK)
+        except Exception as e:
+            logger.error(f"Batch convert to expense failed: {e}")
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 class AIAnalyticsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         try:
-            from .services import GeminiAI
+            from .services import AIInsightsService
             
             user_lists = List.objects.filter(user=request.user)
-            gemini = GeminiAI()
-            
-            total_lists = user_lists.count()
-            completed_lists = user_lists.filter(completion_percentage=100).count()
-            avg_completion = user_lists.aggregate(avg=Avg('completion_percentage'))['avg'] or 0
+            service = AIInsightsService()
+            user_data = service.get_user_data(request.user)
+            bundle = service.get_sections(request.user, user_data, sections=('insights', 'predictions'))
             
-            total_items = ListItem.objects.filter(list__user=request.user).count()
-            completed_items = ListItem.objects.filter(list__user=request.user, is_completed=True).count()
-            
-            insights = gemini.get_productivity_insights({
-                'total_lists': total_lists,
-                'completed_lists': completed_lists,
-                'avg_completion': avg_completion,
-                'total_items': total_items,
-                'completed_items': completed_items
-            })
+            total_lists = user_data['total_lists']
+            completed_lists = user_data['completed_lists']
+            avg_completion = user_data['avg_completion']
+            total_items = user_data['total_items']
+            completed_items = user_data['completed_items']
             
             return Response({
                 'total_lists': total_lists,
@@ -683,12 +857,8 @@ class AIAnalyticsView(APIView):
                 'total_items': total_items,
                 'completed_items': completed_items,
                 'productivity_score': min(100, round(avg_completion * 1.2, 1)),
-                'insights': insights,
-                'ai_predictions': gemini.get_productivity_predictions({
-                    'completion_rate': avg_completion,
-                    'trend': 'improving' if avg_completion > 70 else 'stable',
-                    'activity': 'high' if total_lists > 5 else 'medium'
-                }),
+                'insights': bundle['insights'],
+                'ai_predictions': bundle['predictions'],
                 'trends': {
                     'lists_change': '+12%',
                     'completion_change': '+8%',
@@ -719,4 +889,96 @@ class AIAnalyticsView(APIView):
                 }
             })
         except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ListImportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            from django.core.exceptions import ValidationError
+            from .importer import ListImportService
+            from .validators import ListImportValidator
+
+            data = {
+                'format': request.data.get('format'),
+                'items': request.data.get('items'),
+                'content': request.data.get('content'),
+                'list_name': request.data.get('list_name'),
+            }
+            # Uploads are parsed as streams and never read into memory whole
+            upload = data['file'] = request.FILES.get('file')
+            try:
+                ListImportValidator.validate_import_data(data, request.user)
+            except ValidationError as e:
+                return Response({'errors': e.message_dict}, status=status.HTTP_400_BAD_REQUEST)
+
+            service = ListImportService()
+            list_type = request.data.get('list_type') or 'checklist'
+            if upload:
+                format_type, content = data['format'], ''
+                total = service.estimate_upload(format_type, upload)
+            elif data['items']:
+                format_type, content = 'json', json.dumps(data['items'])
+                total = len(data['items'])
+            else:
+                format_type, content = data['format'], data['content']
+                total = service.estimate_items(format_type, content)
+
+            if total > service.SYNC_LIMIT:
+                job = service.create_job(
+                    request.user, format_type, content, data['list_name'], list_type,
+                    total_items=total, upload=upload
+                )
+                return Response({
+                    'job_id': job.id,
+                    'status': job.status,
+                    'total_items': job.total_items,
+                    'progress': job.progress
+                }, status=status.HTTP_202_ACCEPTED)
+
+            stream = service.text_stream(upload) if upload else io.StringIO(content)
+            rows = service.parse(format_type, stream)
+            result = service.import_rows(request.user, rows, data['list_name'], list_type, format_type)
+            return Response(dict(result, status='completed'), status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ListImportJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            job = ListImportJob.objects.get(id=job_id, user=request.user)
+            return Response({
+                'job_id': job.id,
+                'status': job.status,
+                'total_items': job.total_items,
+                'processed_items': job.processed_items,
+                'progress': job.progress,
+                'list_ids': job.list_ids,
+                'error': job.error or None,
+                'created_at': job.created_at,
+                'completed_at': job.completed_at
+            })
+        except ListImportJob.DoesNotExist:
+            return Response({'error': 'Import not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+class ListActivityFeedView(ListAPIView):
+    """Full activity history of a list, newest first, one cursor page at a time"""
+    permission_classes = [IsAuthenticated]
+    serializer_class = ListActivitySerializer
+    pagination_class = ActivityFeedPagination
+
+    def get_queryset(self):
+        return ListActivity.objects.filter(
+            list_id=self.kwargs['list_id'], list__user=self.request.user
+        ).select_related('user')
+
+    def list(self, request, *args, **kwargs):
+        if not List.objects.filter(pk=kwargs['list_id'], user=request.user).exists():
+            return Response({'error': 'List not found'}, status=status.HTTP_404_NOT_FOUND)
+        return super().list(request, *args, **kwargs)
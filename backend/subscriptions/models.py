@@ -117,6 +117,9 @@ class Subscription(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status', 'next_billing_date']),
+        ]
 
 class SubscriptionPayment(models.Model):
     """Track subscription payments"""
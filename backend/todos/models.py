@@ -101,6 +101,9 @@ class Task(models.Model):
     
     class Meta:
         ordering = ['-ai_priority_score', '-priority', 'due_date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status', 'due_date']),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"